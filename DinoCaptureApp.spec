@@ -5,7 +5,7 @@ a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
-    datas=[],
+    datas=[('inspection_template.json', '.'), ('pdf image', 'pdf image')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
@@ -0,0 +1,84 @@
+"""
+Đo bộ nhớ đỉnh (tracemalloc) khi gửi email kèm file lớn qua SMTP server giả local.
+
+So sánh cách cũ (đọc cả file, base64, msg.as_string()) với EmailSender hiện tại
+(stream file đính kèm theo khối vào lệnh DATA).
+
+Chạy từ thư mục gốc của app:
+    python benchmarks/bench_email_memory.py [--sizes 1 5 20 50]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+from email import encoders
+from email.mime.base import MIMEBase
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'tests')))
+
+from core.email_sender import EmailSender
+from smtp_stub import SMTPStub
+
+
+def build_in_memory(sender, attachment_path):
+    """Cách cũ: cả file + bản base64 + chuỗi message đầy đủ cùng nằm trong bộ nhớ."""
+    msg = MIMEMultipart()
+    msg['From'] = sender.sender_email
+    msg['To'] = "qa@example.com"
+    msg['Subject'] = "Benchmark"
+    msg.attach(MIMEText("<p>Report</p>", "html"))
+    with open(attachment_path, "rb") as attachment:
+        part = MIMEBase("application", "octet-stream")
+        part.set_payload(attachment.read())
+    encoders.encode_base64(part)
+    part.add_header("Content-Disposition", f"attachment; filename= {os.path.basename(attachment_path)}")
+    msg.attach(part)
+    return msg.as_string()
+
+
+def measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 5, 20, 50], help="Kích thước file (MB)")
+    args = parser.parse_args()
+
+    with SMTPStub(keep_data=False) as stub:
+        sender = EmailSender(smtp_server="127.0.0.1", smtp_port=stub.port, sender_email="qc@example.com",
+                             use_tls=False, timeout=30)
+        sender.send_email("qa@example.com", "warmup", "warmup") # Kết nối trước, không tính vào phép đo
+
+        print(f"{'size':>8} | {'in-memory peak':>15} | {'streamed peak':>14} | {'streamed time':>13}")
+        for size_mb in args.sizes:
+            fd, path = tempfile.mkstemp(suffix="_Report.pdf")
+            with os.fdopen(fd, "wb") as f:
+                for _ in range(size_mb):
+                    f.write(os.urandom(1024 * 1024))
+            try:
+                legacy_peak, _ = measure(lambda: build_in_memory(sender, path))
+                result = {}
+                stream_peak, elapsed = measure(lambda: result.update(
+                    ok=sender.send_email("qa@example.com", "Benchmark", "<p>Report</p>", path, is_html=True)))
+                assert result["ok"][0], result["ok"][1]
+                print(f"{size_mb:>5} MB | {legacy_peak / 2**20:>12.1f} MB | {stream_peak / 2**20:>11.2f} MB | "
+                      f"{elapsed * 1000:>10.0f} ms")
+            finally:
+                os.remove(path)
+        sender.close()
+
+
+if __name__ == "__main__":
+    main()
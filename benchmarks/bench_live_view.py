@@ -0,0 +1,98 @@
+"""
+So sánh chi phí CPU mỗi frame của live view: QLabel.setPixmap (cách cũ), LiveView (raster)
+và GLLiveView (OpenGL, bỏ qua nếu máy không có OpenGL).
+
+Phát frame giả với tốc độ --fps trong --seconds giây, đo thời gian CPU của process
+(time.process_time) chia cho số frame, số lần vẽ và độ trễ frame -> màn hình.
+
+Chạy từ thư mục gốc của app (Linux không màn hình: QT_QPA_PLATFORM=offscreen):
+    python benchmarks/bench_live_view.py [--width 1920 --height 1080 --fps 60 --seconds 3] [--no-pbo]
+"""
+import os
+import sys
+import time
+import argparse
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import cv2
+import numpy as np
+from PyQt6.QtWidgets import QApplication, QLabel
+from PyQt6.QtGui import QImage, QPixmap
+
+from gui.widgets import LiveView
+from gui.gl_view import GLLiveView, opengl_available
+
+
+class LabelView(QLabel):
+    """Cách cũ của MainWindow.update_live_view."""
+    def set_frame(self, cv_img):
+        rgb_img = cv2.cvtColor(cv_img, cv2.COLOR_BGR2RGB)
+        h, w, ch = rgb_img.shape
+        q_img = QImage(rgb_img.data, w, h, ch * w, QImage.Format.Format_RGB888)
+        self.setPixmap(QPixmap.fromImage(q_img))
+
+
+def make_frames(width, height, count=8):
+    frames = []
+    for i in range(count):
+        img = np.zeros((height, width, 3), dtype=np.uint8)
+        img[:] = (30 * i % 255, 80, 160)
+        cv2.circle(img, (width // 2, height // 2), height // 3, (255, 255, 255), 8)
+        frames.append(img)
+    return frames
+
+
+def run(app, view, frames, fps, seconds):
+    view.resize(960, 720)
+    view.show()
+    app.processEvents()
+    interval = 1.0 / fps
+    count = int(fps * seconds)
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    for i in range(count):
+        view.set_frame(frames[i % len(frames)].copy()) # Giống MainWindow: mỗi frame là array mới
+        app.processEvents()
+        next_time = wall_start + (i + 1) * interval
+        while time.perf_counter() < next_time:
+            app.processEvents()
+            time.sleep(0.001)
+    cpu = time.process_time() - cpu_start
+    view.hide()
+    return cpu / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--fps", type=float, default=60)
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--no-pbo", action="store_true", help="GLLiveView: upload texture trực tiếp, không qua PBO")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    frames = make_frames(args.width, args.height)
+    print(f"{args.width}x{args.height} @ {args.fps:.0f} fps, {args.seconds:.0f}s per backend")
+
+    label = LabelView()
+    label.setScaledContents(True)
+    cpu = run(app, label, frames, args.fps, args.seconds)
+    print(f"{'QLabel':>10}: {cpu * 1000:6.2f} ms CPU/frame")
+
+    views = [("LiveView", LiveView())]
+    if opengl_available():
+        gl_view = GLLiveView()
+        gl_view.use_pbo = not args.no_pbo
+        views.append(("GLLiveView", gl_view))
+    for name, view in views:
+        cpu = run(app, view, frames, args.fps, args.seconds)
+        stats = view.latency_stats()
+        print(f"{name:>10}: {cpu * 1000:6.2f} ms CPU/frame, painted {stats['painted']}/{stats['received']}, "
+              f"latency mean {stats['mean_ms']:.1f} ms, p95 {stats['p95_ms']:.1f} ms")
+    if len(views) == 1:
+        print(f"{'GLLiveView':>10}: skipped (OpenGL unavailable)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+So sánh tốc độ hai engine PDF ("table" và "canvas") trên báo cáo 32 ảnh.
+
+Chạy từ thư mục gốc của app:
+    python benchmarks/bench_pdf_engines.py [--runs 5] [--width 1920 --height 1080]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import cv2
+import numpy as np
+
+from core.pdf_generator import PDFGenerator
+from core.storage import StorageManager
+from core.inspection_template import load_template
+
+
+def make_session(base_dir, template, width, height):
+    """Tạo một phiên giả với đủ ảnh cho mọi điểm chụp của template."""
+    storage = StorageManager(base_dir=base_dir)
+    pid = "BENCH_PID"
+    session_path = storage.create_session_folder(pid)
+    for cat_idx, point_idx in template.slots:
+        img = np.zeros((height, width, 3), dtype=np.uint8)
+        img[:] = (40 * cat_idx % 255, 30 * point_idx % 255, 120)
+        cv2.circle(img, (width // 2, height // 2), height // 3, (255, 255, 255), 12)
+        cv2.putText(img, f"{cat_idx}-{point_idx}", (50, height // 4), cv2.FONT_HERSHEY_SIMPLEX, 4, (0, 0, 0), 8)
+        storage.save_image(session_path, img, template.categories[cat_idx].file_prefix, point_idx)
+    return pid, session_path
+
+
+def bench_engine(engine, template, pid, session_path, runs):
+    generator = PDFGenerator(template, engine=engine)
+    times = []
+    pdf_path = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        pdf_path = generator.generate_report(pid, session_path)
+        times.append(time.perf_counter() - start)
+    return times, os.path.getsize(pdf_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    args = parser.parse_args()
+
+    template = load_template()
+    tmp_dir = tempfile.mkdtemp(prefix="bench_pdf_")
+    try:
+        pid, session_path = make_session(tmp_dir, template, args.width, args.height)
+        print(f"{template.total_points} images {args.width}x{args.height}, {args.runs} runs per engine")
+
+        results = {}
+        for engine in ("table", "canvas"):
+            times, size = bench_engine(engine, template, pid, session_path, args.runs)
+            results[engine] = statistics.median(times)
+            print(f"{engine:>6}: median {results[engine] * 1000:8.1f} ms, "
+                  f"min {min(times) * 1000:8.1f} ms, size {size / 1024:8.1f} KB")
+
+        print(f"canvas speedup: {results['table'] / results['canvas']:.2f}x")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""
+Bộ benchmark end-to-end của pipeline, chạy headless (Linux / CI không màn hình):
+
+    frame_source   đọc frame (cv2.VideoCapture trên video MJPG giả, như webcam USB)
+    scan_decode    Scanner.scan trên frame 1080p có mã QR
+    focus_score    chấm độ nét một frame (camera thread làm mỗi frame ở chế độ chụp ảnh nét nhất)
+    save_encode    StorageManager.save_image (JPEG encode + ghi file)
+    thumbnail      ThumbnailCache của grid ảnh (decode thu nhỏ)
+    pdf_build      PDFGenerator.generate_report, engine table và canvas: thời gian + dung lượng
+    email_send     EmailSender.send_many kèm PDF qua SMTP server giả local
+
+Mỗi case chạy --repeat lần (mặc định 3), lấy trung vị từng chỉ số. Kết quả được so với
+baseline (benchmarks/baseline.json): chỉ số kém hơn baseline quá --tolerance (mặc định 25%)
+và quá ngưỡng tuyệt đối MIN_DELTA của đơn vị (VD: 0.5 ms) bị đánh dấu REGRESSION và script
+trả exit code 1. Baseline ghi ở chế độ khác (--quick / đầy đủ) thì không so.
+Baseline đo trên máy khác (host khác) chỉ để tham khảo: chạy --save-baseline trên máy dùng để so.
+
+Chạy từ thư mục gốc của app:
+    python benchmarks/suite.py [--quick] [--only pdf_build email_send] [--save-baseline] [--json out.json]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import argparse
+import platform
+import tempfile
+import statistics
+from datetime import datetime
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'tests')))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen") # Không cần màn hình
+
+import cv2
+import numpy as np
+import zxingcpp
+
+from core.metrics import LatencyHistogram
+from core.storage import StorageManager
+from core.scanner import Scanner
+from core.focus import focus_score
+from core.inspection_template import load_template
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+FRAME_SIZE = (1920, 1080)
+QR_TEXT = "SOCKET_BENCH_0001"
+
+HIGHER = "higher" # Chỉ số càng cao càng tốt (throughput)
+LOWER = "lower" # Chỉ số càng thấp càng tốt (thời gian, dung lượng)
+# Chênh lệch nhỏ hơn mức này là nhiễu đo, không tính regression dù vượt tolerance
+MIN_DELTA = {"ms": 0.5, "s": 0.0005}
+
+
+def make_frame(index=0, qr=False):
+    width, height = FRAME_SIZE
+    img = np.zeros((height, width, 3), dtype=np.uint8)
+    img[:] = (30 * index % 255, 90, 160)
+    cv2.circle(img, (width // 2, height // 2), height // 3, (255, 255, 255), 12)
+    cv2.putText(img, f"frame {index}", (60, 120), cv2.FONT_HERSHEY_SIMPLEX, 3, (0, 0, 0), 6)
+    if qr:
+        code = zxingcpp.create_barcode(QR_TEXT, zxingcpp.BarcodeFormat.QRCode)
+        code_img = np.array(zxingcpp.write_barcode_to_image(code, scale=8))
+        h, w = code_img.shape[:2]
+        img[100:100 + h, 200:200 + w] = cv2.cvtColor(code_img, cv2.COLOR_GRAY2BGR)
+    return img
+
+
+def timed(func, iterations, warmup=1):
+    """Chạy func iterations lần (sau warmup lần không tính); Returns: (tổng giây, LatencyHistogram từng lần)."""
+    for i in range(warmup):
+        func(i)
+    hist = LatencyHistogram()
+    total_start = time.perf_counter()
+    for i in range(iterations):
+        start = time.perf_counter()
+        func(i)
+        hist.record(time.perf_counter() - start)
+    return time.perf_counter() - total_start, hist
+
+
+class BenchContext:
+    def __init__(self, work_dir, quick):
+        self.work_dir = work_dir
+        self.quick = quick
+        self.template = load_template()
+        self.storage = StorageManager(base_dir=os.path.join(work_dir, "CapturedImages"))
+        self._session = None
+        self._app = None
+
+    def iterations(self, full, quick):
+        return quick if self.quick else full
+
+    def session(self):
+        """Phiên đủ ảnh cho mọi điểm của template (dùng chung cho thumbnail / PDF / email)."""
+        if self._session is None:
+            pid = "BENCH_PID"
+            session_path = self.storage.create_session_folder(pid)
+            self.storage.save_session_info(session_path, pid, "Model X", "Bench")
+            for i, (cat_idx, point_idx) in enumerate(self.template.slots):
+                self.storage.save_image(session_path, make_frame(i), self.template.categories[cat_idx].file_prefix,
+                                        point_idx)
+            self._session = (pid, session_path)
+        return self._session
+
+    def qt_app(self):
+        if self._app is None:
+            from PyQt6.QtWidgets import QApplication
+            self._app = QApplication.instance() or QApplication(sys.argv[:1])
+        return self._app
+
+
+def bench_frame_source(ctx):
+    n = ctx.iterations(120, 30)
+    path = os.path.join(ctx.work_dir, "source.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, FRAME_SIZE)
+    for i in range(n):
+        writer.write(make_frame(i))
+    writer.release()
+    cap = cv2.VideoCapture(path)
+
+    def read(_):
+        ok, _frame = cap.read()
+        assert ok, "frame read failed"
+    total, hist = timed(read, n, warmup=0) # Mỗi frame chỉ đọc được một lần
+    cap.release()
+    return [("fps", n / total, "frames/s", HIGHER), ("read_p50", hist.percentile(50), "ms", LOWER)]
+
+
+def bench_scan_decode(ctx):
+    frame = make_frame(qr=True)
+    scanner = Scanner()
+    assert scanner.scan(frame) == QR_TEXT
+    total, hist = timed(lambda _: scanner.scan(frame), ctx.iterations(40, 10))
+    return [("scans_per_s", hist.count / total, "scans/s", HIGHER), ("scan_p50", hist.percentile(50), "ms", LOWER)]
+
+
+def bench_focus_score(ctx):
+    frames = [make_frame(i) for i in range(4)]
+    _, hist = timed(lambda i: focus_score(frames[i % 4]), ctx.iterations(200, 50))
+    return [("score_p50", hist.percentile(50), "ms", LOWER), ("score_p95", hist.percentile(95), "ms", LOWER)]
+
+
+def bench_save_encode(ctx):
+    frames = [make_frame(i) for i in range(4)]
+    session_path = ctx.storage.create_session_folder("BENCH_SAVE")
+    n = ctx.iterations(40, 10)
+    total, hist = timed(lambda i: ctx.storage.save_image(session_path, frames[i % 4], "bench", i), n)
+    written = sum(os.path.getsize(os.path.join(session_path, f)) for f in os.listdir(session_path))
+    return [("images_per_s", n / total, "images/s", HIGHER), ("save_p50", hist.percentile(50), "ms", LOWER),
+            ("jpeg_kb", written / n / 1024, "KB", LOWER)]
+
+
+def bench_thumbnail(ctx):
+    ctx.qt_app()
+    from PyQt6.QtCore import QSize
+    from gui.image_grid import ThumbnailCache
+    _, session_path = ctx.session()
+    paths = [os.path.join(session_path, f) for f in sorted(os.listdir(session_path)) if f.endswith(".jpg")]
+    size = QSize(106, 72)
+    total, hist = timed(lambda i: ThumbnailCache._load(paths[i % len(paths)], size), ctx.iterations(64, 16))
+    return [("thumbs_per_s", hist.count / total, "thumbs/s", HIGHER), ("thumb_p50", hist.percentile(50), "ms", LOWER)]
+
+
+def bench_pdf_build(ctx):
+    from core.pdf_generator import PDFGenerator
+    pid, session_path = ctx.session()
+    results = []
+    runs = ctx.iterations(3, 1)
+    for engine in ("table", "canvas"):
+        generator = PDFGenerator(ctx.template, engine=engine)
+        pdf_path = os.path.join(ctx.work_dir, f"bench_{engine}.pdf")
+        total, hist = timed(lambda _: generator.generate_report(pid, session_path, pdf_path=pdf_path), runs)
+        assert os.path.exists(pdf_path)
+        results.append((f"{engine}_s", hist.percentile(50) / 1000, "s", LOWER))
+        results.append((f"{engine}_kb", os.path.getsize(pdf_path) / 1024, "KB", LOWER))
+    return results
+
+
+def bench_email_send(ctx):
+    from core.email_sender import EmailSender
+    from smtp_stub import SMTPStub
+    pdf_path = os.path.join(ctx.work_dir, "bench_table.pdf")
+    if not os.path.exists(pdf_path):
+        from core.pdf_generator import PDFGenerator
+        pid, session_path = ctx.session()
+        PDFGenerator(ctx.template).generate_report(pid, session_path, pdf_path=pdf_path)
+    n = ctx.iterations(10, 3)
+    messages = [{"recipient_email": "qa@example.com", "subject": f"Bench {i}", "body": "<p>Report</p>",
+                 "attachment_path": pdf_path, "is_html": True} for i in range(n)]
+    with SMTPStub(keep_data=False) as stub:
+        sender = EmailSender("127.0.0.1", stub.port, "qc@example.com", "", use_tls=False)
+        start = time.perf_counter()
+        results = sender.send_many(messages)
+        total = time.perf_counter() - start
+        sender.close()
+    assert all(ok for ok, _, _ in results), results
+    mb = os.path.getsize(pdf_path) * n / 2 ** 20
+    return [("ms_per_message", total / n * 1000, "ms", LOWER), ("mb_per_s", mb / total, "MB/s", HIGHER)]
+
+
+CASES = {
+    "frame_source": bench_frame_source,
+    "scan_decode": bench_scan_decode,
+    "focus_score": bench_focus_score,
+    "save_encode": bench_save_encode,
+    "thumbnail": bench_thumbnail,
+    "pdf_build": bench_pdf_build,
+    "email_send": bench_email_send,
+}
+
+
+def host_info():
+    return {"host": socket.gethostname(), "platform": platform.platform(), "python": platform.python_version(),
+            "cpu_count": os.cpu_count(), "opencv": cv2.__version__}
+
+
+def compare(name, value, unit, better, baseline, tolerance):
+    """Returns: (chuỗi thay đổi so với baseline, True nếu regression)."""
+    base = baseline.get(name, {}).get("value")
+    if not base:
+        return "new" if baseline else "-", False
+    change = (value - base) / base
+    worse = -change if better == HIGHER else change
+    regressed = worse > tolerance and abs(value - base) >= MIN_DELTA.get(unit, 0.0)
+    return f"{change * 100:+.1f}%", regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", choices=list(CASES), help="Chỉ chạy các case này")
+    parser.add_argument("--quick", action="store_true", help="Ít vòng lặp hơn (smoke test trong CI)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Ghi kết quả lần chạy này làm baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Mức kém hơn baseline được chấp nhận")
+    parser.add_argument("--repeat", type=int, default=3, help="Số lần chạy mỗi case, lấy trung vị")
+    parser.add_argument("--json", help="Ghi kết quả ra file JSON")
+    args = parser.parse_args()
+
+    baseline = {}
+    compared = {} # Baseline dùng để so: rỗng nếu khác chế độ chạy
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            saved = json.load(f)
+        baseline = saved.get("results", {})
+        compared = baseline
+        if saved.get("host_info", {}).get("host") != host_info()["host"]:
+            print(f"Note: baseline was recorded on {saved.get('host_info', {}).get('platform', 'another host')}")
+        if saved.get("quick", False) != args.quick:
+            mode = "quick" if saved.get("quick", False) else "full"
+            print(f"Note: baseline was recorded in {mode} mode, not compared (run with the same mode or --save-baseline)")
+            compared = {}
+
+    work_dir = tempfile.mkdtemp(prefix="dino_bench_")
+    results = {}
+    regressions = []
+    try:
+        ctx = BenchContext(work_dir, args.quick)
+        print(f"{'metric':<28} {'value':>10} {'unit':<9} {'baseline':>10} {'change':>8}")
+        for case in args.only or list(CASES):
+            runs = [CASES[case](ctx) for _ in range(max(1, args.repeat))]
+            for i, (metric, _, unit, better) in enumerate(runs[0]):
+                value = statistics.median(run[i][1] for run in runs)
+                name = f"{case}.{metric}"
+                results[name] = {"value": round(value, 3), "unit": unit, "better": better}
+                change, regressed = compare(name, value, unit, better, compared, args.tolerance)
+                base = compared.get(name, {}).get("value")
+                flag = "  REGRESSION" if regressed else ""
+                print(f"{name:<28} {value:>10.2f} {unit:<9} {base if base is not None else '-':>10} {change:>8}{flag}")
+                if regressed:
+                    regressions.append(name)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {"time": datetime.now().isoformat(timespec="seconds"), "quick": args.quick, "repeat": args.repeat,
+              "host_info": host_info(), "results": results}
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        if baseline and args.only:
+            merged = dict(baseline)
+            merged.update(results)
+            report["results"] = merged
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved: {args.baseline}")
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import os
+import time
+import shutil
+import zipfile
+
+DEFAULT_MAX_BYTES = 18 * 1024 * 1024 # Base64 tăng ~33% -> ~24 MB, vừa giới hạn 25 MB của Gmail/Outlook
+# (max_px, JPEG quality) thử lần lượt, từ nét nhất đến nhẹ nhất
+DEFAULT_RECOMPRESS_STEPS = ((1600, 85), (1024, 80), (640, 70))
+
+METHOD_ORIGINAL = "original"
+METHOD_RECOMPRESSED = "recompressed"
+METHOD_ZIPPED = "zipped"
+METHOD_SHARED_LINK = "shared_link"
+METHOD_OVERSIZE = "oversize" # Không cách nào vừa budget và không có thư mục chia sẻ
+
+
+def session_report_regenerator(storage, generator_factory):
+    """
+    Tạo hàm regenerate cho AttachmentPolicy: dựng lại báo cáo {pid}_Report.pdf của
+    một phiên (đọc session.json) với ảnh chụp thu nhỏ qua ImageCache.
+    generator_factory: callable() -> PDFGenerator (engine/template theo cấu hình app).
+    """
+    def regenerate(pdf_path, max_px, quality, out_path):
+        from core.pdf_generator import ImageCache
+        session_path = os.path.dirname(pdf_path)
+        info = storage.load_session_info(session_path)
+        if not info or os.path.basename(pdf_path) != f"{info.get('pid')}_Report.pdf":
+            return None
+        return generator_factory().generate_report(
+            info["pid"], session_path, info.get("model", "N/A"), info.get("inspector", "N/A"),
+            pdf_path=out_path, image_cache=ImageCache(max_px=max_px, quality=quality))
+    return regenerate
+
+
+class DeliveryPlan:
+    """Kết quả của AttachmentPolicy.prepare: gửi file nào, hay gửi link."""
+    def __init__(self, method, attachment_path, original_bytes, final_bytes, encode_seconds=0.0, link=None):
+        self.method = method
+        self.attachment_path = attachment_path # None nếu gửi link
+        self.original_bytes = original_bytes
+        self.final_bytes = final_bytes
+        self.encode_seconds = encode_seconds
+        self.link = link
+
+    @property
+    def bytes_saved(self):
+        return self.original_bytes - self.final_bytes
+
+    def apply_to_body(self, body, is_html=False):
+        """Thêm đường dẫn chia sẻ vào nội dung email khi file không được đính kèm."""
+        if not self.link:
+            return body
+        if is_html:
+            note = (f'<p>The report is too large for email and was saved to the shared folder:<br>'
+                    f'<a href="{self.link}">{self.link}</a></p>')
+            if "</body>" in body:
+                return body.replace("</body>", note + "\n</body>", 1)
+            return body + note
+        return body + f"\n\nThe report is too large for email and was saved to the shared folder:\n{self.link}\n"
+
+    def summary(self):
+        return (f"{self.method}: {self.original_bytes / 1024:.0f} KB -> {self.final_bytes / 1024:.0f} KB "
+                f"(saved {self.bytes_saved / 1024:.0f} KB, {self.encode_seconds * 1000:.0f} ms)")
+
+
+class AttachmentPolicy:
+    """
+    Chọn cách gửi file đính kèm theo giới hạn dung lượng của mail server:
+
+    1. Nhỏ hơn max_bytes: gửi nguyên bản.
+    2. Tạo lại PDF với ảnh thu nhỏ / JPEG nén hơn (regenerate) theo từng bước
+       của recompress_steps, dừng ở bước đầu tiên vừa budget.
+    3. Nén zip (deflate mức 9).
+    4. Chép vào share_dir (VD: thư mục mạng) và gửi đường dẫn thay cho file.
+
+    regenerate: callable(attachment_path, max_px, quality, out_path) -> path hoặc None,
+        tạo lại file với ảnh nhỏ hơn; trả về None nếu file không tạo lại được
+        (VD: không phải báo cáo của một phiên).
+    File trung gian được đặt cạnh file gốc ({tên}_email_{max_px}.pdf / {tên}_email.zip) và dùng lại
+    nếu mới hơn file gốc, nên gửi lại (retry) không phải encode lại.
+    """
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, share_dir=None, regenerate=None,
+                 recompress_steps=DEFAULT_RECOMPRESS_STEPS):
+        self.max_bytes = max_bytes
+        self.share_dir = share_dir
+        self.regenerate = regenerate
+        self.recompress_steps = recompress_steps
+
+    def prepare(self, attachment_path):
+        """Returns: DeliveryPlan."""
+        start = time.perf_counter()
+        original = os.path.getsize(attachment_path)
+        if original <= self.max_bytes:
+            return DeliveryPlan(METHOD_ORIGINAL, attachment_path, original, original)
+
+        stem, ext = os.path.splitext(attachment_path)
+        smallest = (attachment_path, original)
+
+        # --- 2. Recompress ---
+        if self.regenerate is not None:
+            candidates = []
+            for max_px, quality in self.recompress_steps:
+                out_path = f"{stem}_email_{max_px}{ext}"
+                path = out_path if self._is_fresh(out_path, attachment_path) else \
+                    self.regenerate(attachment_path, max_px, quality, out_path)
+                if not path or not os.path.exists(path):
+                    break
+                candidates.append((path, os.path.getsize(path)))
+                if candidates[-1][1] <= self.max_bytes:
+                    break
+            if candidates:
+                best = min(candidates, key=lambda c: c[1])
+                for path, _ in candidates:
+                    if path != best[0]:
+                        os.remove(path)
+                if best[1] <= self.max_bytes:
+                    return DeliveryPlan(METHOD_RECOMPRESSED, best[0], original, best[1], time.perf_counter() - start)
+                if best[1] < smallest[1]:
+                    smallest = best
+
+        # --- 3. Zip ---
+        if ext.lower() != ".zip":
+            zip_path = f"{stem}_email.zip"
+            if not self._is_fresh(zip_path, smallest[0]):
+                with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=9) as zf:
+                    zf.write(smallest[0], arcname=os.path.basename(attachment_path))
+            size = os.path.getsize(zip_path)
+            if size <= self.max_bytes:
+                return DeliveryPlan(METHOD_ZIPPED, zip_path, original, size, time.perf_counter() - start)
+            os.remove(zip_path)
+
+        # --- 4. Shared folder ---
+        if self.share_dir:
+            os.makedirs(self.share_dir, exist_ok=True)
+            shared_path = os.path.join(self.share_dir, os.path.basename(attachment_path))
+            shutil.copy2(attachment_path, shared_path)
+            return DeliveryPlan(METHOD_SHARED_LINK, None, original, 0, time.perf_counter() - start,
+                                link=os.path.abspath(shared_path))
+
+        return DeliveryPlan(METHOD_OVERSIZE, smallest[0], original, smallest[1], time.perf_counter() - start)
+
+    @staticmethod
+    def _is_fresh(path, source):
+        return os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(source)
@@ -1,19 +1,26 @@
 from PyQt6.QtCore import QThread, pyqtSignal, Qt
-import cv2
 import time
 
+from core.metrics import metrics
+from core.trigger import FrameHistory
+from core.focus import focus_score
+
 class CameraThread(QThread):
     """
     Thread riêng để đọc dữ liệu từ Camera, tránh làm đơ UI.
     """
-    image_data = pyqtSignal(object) # Gửi ảnh OpenCV (numpy array) ra UI
+    image_data = pyqtSignal(object, float) # Gửi ảnh OpenCV (numpy array) ra UI, kèm time.perf_counter() lúc đọc xong
     status_update = pyqtSignal(str) # Gửi thông báo trạng thái
 
-    def __init__(self, camera_id=None):
+    def __init__(self, camera_id=None, history_size=15, score_frames=False):
         super().__init__()
         self.camera_id = camera_id
         self.is_running = False
         self.cap = None
+        # Các frame gần nhất, ghi ngay trong camera thread: lệnh chụp không phụ thuộc độ trễ chuyển frame lên GUI
+        self.history = FrameHistory(history_size)
+        # Chấm độ nét mỗi frame ngay khi đọc (~1 ms): lúc chụp chỉ còn so điểm có sẵn
+        self.score_frames = score_frames
 
     @staticmethod
     def get_available_cameras():
@@ -61,6 +68,7 @@ class CameraThread(QThread):
             # Cập nhật camera_id thực tế
             self.camera_id = target_id
             
+        import cv2 # Import trong camera thread: cửa sổ hiện lên không phải chờ OpenCV
         self.cap = cv2.VideoCapture(self.camera_id)
         
         if not self.cap.isOpened():
@@ -75,10 +83,21 @@ class CameraThread(QThread):
         # self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
 
         while self.is_running:
+            read_start = metrics.now()
             ret, frame = self.cap.read()
             if ret:
-                self.image_data.emit(frame)
+                timestamp = time.perf_counter() # Đơn điệu, cùng đồng hồ với timestamp lúc bấm MicroTouch
+                metrics.observe("frame_read", read_start)
+                metrics.inc("frames_read")
+                score = None
+                if self.score_frames:
+                    score_start = metrics.now()
+                    score = focus_score(frame)
+                    metrics.observe("focus_score", score_start)
+                self.history.add(frame, timestamp, score)
+                self.image_data.emit(frame, timestamp)
             else:
+                metrics.inc("frame_read_errors")
                 self.status_update.emit("Error: Failed to read frame.")
                 time.sleep(1) # Chờ 1 chút để tránh spam lỗi
             
@@ -0,0 +1,199 @@
+import os
+import json
+import html
+import zipfile
+from datetime import datetime, timedelta
+
+from PyQt6.QtCore import QObject, QThread, QTimer, pyqtSignal
+
+DIGEST_STATE_FILE = "digest_state.json"
+MAX_CATCHUP_DAYS = 7 # App tắt lâu hơn: chỉ gửi bù các mốc trong 7 ngày gần nhất
+
+
+def find_report(session):
+    """PDF báo cáo của phiên ({pid}_Report.pdf, xem PDFGenerator), hoặc None nếu chưa xuất."""
+    folder = session["session_path"]
+    for name in (f"{session['pid']}_Report.pdf", f"{os.path.basename(folder)}_Report.pdf"):
+        path = os.path.join(folder, name)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def build_digest_html(sessions, since, until):
+    """Bảng HTML tổng hợp các socket trong khoảng thời gian."""
+    rows = []
+    for i, session in enumerate(sessions, start=1):
+        report = "Attached" if find_report(session) else "Not exported"
+        cells = [str(i), session["pid"], session.get("model") or "N/A", session.get("inspector") or "N/A",
+                 session.get("started") or "", str(session.get("image_count", "")), "PASS", report]
+        rows.append("<tr>" + "".join(f"<td>{html.escape(c)}</td>" for c in cells) + "</tr>")
+
+    header = ["No.", "Socket Infor", "Model", "Inspector(IQC)", "Started", "Images", "Result", "Report"]
+    return f"""
+        <html>
+        <body>
+            <p>Dear Team,</p>
+            <p>Socket inspection summary from <b>{since:%Y-%m-%d %H:%M}</b> to <b>{until:%Y-%m-%d %H:%M}</b>
+               ({len(sessions)} sockets). Reports are attached as a zip file.</p>
+            <table border="1" cellspacing="0" cellpadding="4" style="border-collapse: collapse; font-size: small;">
+                <tr style="background-color: lightgrey;">{"".join(f"<th>{h}</th>" for h in header)}</tr>
+                {"".join(rows)}
+            </table>
+            <p>Best regards,<br>QC Team</p>
+            <br>
+            <hr>
+            <p style="color: gray; font-size: small;"><i>Note: This is an automated email system. Please do not reply to this email.</i></p>
+        </body>
+        </html>
+        """
+
+
+def zip_reports(sessions, zip_path):
+    """
+    Gom PDF báo cáo của các phiên vào một file zip.
+    PDF đã nén sẵn (JPEG/Flate) nên dùng ZIP_STORED: nhanh, dung lượng gần như không đổi.
+    Returns: số PDF trong zip (0 thì không tạo file).
+    """
+    reports = [(session, find_report(session)) for session in sessions]
+    reports = [(session, path) for session, path in reports if path]
+    if not reports:
+        return 0
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_STORED) as zf:
+        for session, path in reports:
+            zf.write(path, arcname=os.path.basename(path))
+    return len(reports)
+
+
+class DigestThread(QThread):
+    """
+    Dựng email digest (HTML + zip PDF) ngoài GUI thread rồi đưa vào outbox,
+    để việc zip nhiều MB PDF không làm đơ màn hình chụp.
+    """
+    digest_queued = pyqtSignal(int, int) # (id trong outbox, số socket)
+    digest_skipped = pyqtSignal(str) # Không có socket nào trong khoảng thời gian
+    digest_failed = pyqtSignal(str)
+
+    def __init__(self, storage, outbox, recipient, since, until, parent=None):
+        super().__init__(parent)
+        self.storage = storage
+        self.outbox = outbox
+        self.recipient = recipient
+        self.since = since
+        self.until = until
+
+    def run(self):
+        try:
+            sessions = self.storage.list_sessions(since=self.since, until=self.until)
+            if not sessions:
+                self.digest_skipped.emit(f"No sessions between {self.since:%H:%M} and {self.until:%H:%M}.")
+                return
+
+            zip_path = os.path.join(self.storage.base_dir, f"Digest_{self.until:%Y%m%d_%H%M}.zip")
+            attachment = zip_path if zip_reports(sessions, zip_path) else None
+            subject = (f"[QA] [Socket Inspection] [Digest] [{self.since:%Y-%m-%d %H:%M} - {self.until:%H:%M}] "
+                       f"[{len(sessions)} sockets]")
+            item_id = self.outbox.enqueue(self.recipient, subject,
+                                          build_digest_html(sessions, self.since, self.until),
+                                          attachment_path=attachment, is_html=True)
+            self.digest_queued.emit(item_id, len(sessions))
+        except Exception as e:
+            self.digest_failed.emit(str(e))
+
+
+class DigestScheduler(QObject):
+    """
+    Hẹn giờ gửi digest theo ca: tại mỗi mốc trong `times` (VD: ["06:00", "14:00", "22:00"])
+    gom các socket của `shift_hours` giờ trước đó thành một email.
+
+    Mốc đã gửi được lưu trong digest_state.json nên khởi động lại app không gửi trùng,
+    và mỗi mốc bị lỡ (app tắt lúc hết ca) được gửi bù một digest riêng ở lần kiểm tra kế tiếp,
+    theo thứ tự thời gian (tối đa MAX_CATCHUP_DAYS ngày).
+    """
+    digest_due = pyqtSignal(object, object) # (since, until) datetime
+
+    def __init__(self, state_dir, times, shift_hours=8, check_interval_ms=60000, parent=None):
+        super().__init__(parent)
+        self.state_path = os.path.join(state_dir, DIGEST_STATE_FILE)
+        self.set_schedule(times, shift_hours)
+        self.timer = QTimer(self)
+        self.timer.setInterval(check_interval_ms)
+        self.timer.timeout.connect(self.check)
+        self.last_sent = self._load_last_sent()
+
+    def set_schedule(self, times, shift_hours=8):
+        """times: list chuỗi "HH:MM" (giá trị sai định dạng bị bỏ qua); list rỗng = tắt digest."""
+        if isinstance(times, str): # config.json ghi "06:00, 14:00" thay vì list
+            times = times.replace(";", ",").split(",")
+        parsed = set()
+        for t in times:
+            try:
+                parsed.add(datetime.strptime(str(t).strip(), "%H:%M").time())
+            except ValueError:
+                print(f"Invalid digest time {t!r} in config (expected HH:MM), skipped.")
+        self.times = sorted(parsed)
+        self.shift_hours = shift_hours
+
+    def start(self):
+        if self.times:
+            self.timer.start()
+            self.check()
+
+    def stop(self):
+        self.timer.stop()
+
+    def latest_slot(self, now):
+        """Mốc digest gần nhất <= now, hoặc None nếu chưa cấu hình giờ."""
+        for day_offset in (0, 1):
+            day = (now - timedelta(days=day_offset)).date()
+            for t in reversed(self.times):
+                slot = datetime.combine(day, t)
+                if slot <= now:
+                    return slot
+        return None
+
+    def missed_slots(self, since, now):
+        """Các mốc digest trong (since, now], theo thứ tự; quá MAX_CATCHUP_DAYS thì bỏ các mốc cũ hơn."""
+        start = max(since, now - timedelta(days=MAX_CATCHUP_DAYS))
+        if start > since:
+            print(f"Digest slots before {start:%Y-%m-%d %H:%M} skipped (app was off since {since:%Y-%m-%d %H:%M}).")
+        slots = []
+        day = start.date()
+        while day <= now.date():
+            for t in self.times:
+                slot = datetime.combine(day, t)
+                if start < slot <= now:
+                    slots.append(slot)
+            day += timedelta(days=1)
+        return slots
+
+    def check(self, now=None):
+        now = now or datetime.now()
+        slot = self.latest_slot(now)
+        if slot is None:
+            return
+        if self.last_sent is None:
+            # Lần chạy đầu: bắt đầu tính từ mốc hiện tại, không gửi bù lịch sử cũ
+            self.mark_sent(slot)
+            return
+        for slot in self.missed_slots(self.last_sent, now):
+            self.mark_sent(slot)
+            self.digest_due.emit(slot - timedelta(hours=self.shift_hours), slot)
+
+    def mark_sent(self, slot):
+        self.last_sent = slot
+        try:
+            with open(self.state_path, "w", encoding="utf-8") as f:
+                json.dump({"last_sent": slot.isoformat(timespec="minutes")}, f)
+        except Exception as e:
+            print(f"Error saving digest state: {e}")
+
+    def _load_last_sent(self):
+        if not os.path.exists(self.state_path):
+            return None
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return datetime.fromisoformat(json.load(f)["last_sent"])
+        except Exception as e:
+            print(f"Error reading digest state: {e}")
+            return None
@@ -0,0 +1,118 @@
+import threading
+from concurrent.futures import Future
+
+# (khóa preset, lệnh DNX64) theo thứ tự gửi: tắt / bật AE trước khi đặt exposure, LED trước FLC
+DEVICE_SETTINGS = (
+    ("auto_exposure", "SetAutoExposure"),
+    ("ae_target", "SetAETarget"),
+    ("exposure", "SetExposureValue"),
+    ("led", "SetLEDState"),
+    ("flc_switch", "SetFLCSwitch"),
+    ("flc_level", "SetFLCLevel"),
+    ("lens", "SetLensPos"),
+)
+SETTING_COMMANDS = dict(DEVICE_SETTINGS)
+
+# Các giá trị đọc lại được từ thiết bị (LED / FLC / lens không có hàm Get)
+READBACK_COMMANDS = (
+    ("auto_exposure", "GetAutoExposure"),
+    ("ae_target", "GetAETarget"),
+    ("exposure", "GetExposureValue"),
+)
+
+
+class DinoDeviceState:
+    """
+    Trạng thái đã biết của Dino-Lite (exposure, AE, LED / FLC, lens) để chỉ gọi DLL
+    khi giá trị thực sự đổi. apply() gửi mọi thay đổi của một preset trong một lô
+    (DinoService.call_batch) nên không có lệnh khác chen vào giữa preset.
+
+    Cache được cập nhật ngay khi gửi (lần apply sau so với giá trị sắp có);
+    lô lỗi thì mọi khóa của lô bị quên (không biết lệnh nào đã tới thiết bị) để lần sau gửi lại.
+    """
+    def __init__(self, service, device_index=0):
+        self.service = service
+        self.device_index = device_index
+        self.values = {}
+        self.calls_skipped = 0
+        self._lock = threading.Lock()
+
+    def changes(self, settings):
+        """[(khóa, giá trị)] khác với cache, theo thứ tự gửi của DEVICE_SETTINGS."""
+        unknown = set(settings) - set(SETTING_COMMANDS)
+        if unknown:
+            raise ValueError(f"Unknown camera settings: {', '.join(sorted(unknown))}")
+        settings = dict(settings)
+        if "exposure" in settings:
+            settings.setdefault("auto_exposure", 0) # Exposure tay chỉ có tác dụng khi tắt AE
+        with self._lock:
+            result = []
+            for key, _ in DEVICE_SETTINGS:
+                if key not in settings:
+                    continue
+                value = int(settings[key])
+                if self.values.get(key) == value:
+                    self.calls_skipped += 1
+                else:
+                    result.append((key, value))
+            return result
+
+    def apply(self, settings):
+        """
+        Gửi các giá trị thay đổi trong settings (VD: preset của category).
+        Returns: Future list kết quả ([] ngay lập tức nếu không có gì đổi).
+        """
+        changes = self.changes(settings)
+        if not changes:
+            future = Future()
+            future.set_result([])
+            return future
+        with self._lock:
+            self.values.update(changes)
+        calls = [(SETTING_COMMANDS[key], (self.device_index, value)) for key, value in changes]
+        result = Future()
+
+        def done(f):
+            # Cập nhật cache trước khi báo kết quả cho bên chờ Future
+            if f.exception() is not None:
+                keys = [key for key, _ in changes]
+                print(f"Dino-Lite settings failed ({', '.join(keys)}): {f.exception()}")
+                self.invalidate(keys)
+                result.set_exception(f.exception())
+            else:
+                result.set_result(f.result())
+        self.service.call_batch(calls).add_done_callback(done)
+        return result
+
+    def set(self, key, value):
+        return self.apply({key: value})
+
+    def invalidate(self, keys=None):
+        """Quên giá trị đã biết (VD: sau khi cắm lại thiết bị) để lần apply sau gửi lại."""
+        with self._lock:
+            if keys is None:
+                self.values.clear()
+            else:
+                for key in keys:
+                    self.values.pop(key, None)
+
+    def refresh(self):
+        """
+        Đọc AE / AE target / exposure từ thiết bị vào cache (chỉ điền khóa chưa biết:
+        giá trị của apply() đang chờ gửi không bị ghi đè). Returns: Future dict đọc được.
+        """
+        calls = [(command, (self.device_index,)) for _, command in READBACK_COMMANDS]
+        future = self.service.call_batch(calls)
+        result = Future()
+
+        def done(f):
+            if f.exception() is not None:
+                result.set_exception(f.exception())
+                return
+            values = {key: int(value) for (key, _), value in zip(READBACK_COMMANDS, f.result())}
+            with self._lock:
+                for key, value in values.items():
+                    self.values.setdefault(key, value)
+            result.set_result(values)
+        future.add_done_callback(done)
+        return result
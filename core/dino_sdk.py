@@ -1,6 +1,7 @@
 import ctypes
 from typing import Callable, List, Tuple
 import os
+import time
 
 # Global variables
 VID_POINTERS: int = 5
@@ -59,13 +60,18 @@ METHOD_SIGNATURES: dict = {
 
 
 class DNX64:
-    def __init__(self, dll_path: str = "DNX64.dll") -> None:
+    def __init__(self, dll_path: str = "DNX64.dll", dll=None) -> None:
         """
         Initialize the DNX64 class.
 
         Parameters:
             dll_path (str): Path to the DNX64.dll library file.
+            dll: Object thay cho DLL đã nạp (VD: FakeDNX64Dll khi test / chạy trên Linux).
         """
+        if dll is not None:
+            self.dnx64 = dll
+            return
+
         # Try to find DLL in current directory if not absolute path
         if not os.path.isabs(dll_path):
             dll_path = os.path.abspath(dll_path)
@@ -117,6 +123,124 @@ class DNX64:
         if not self.dnx64: return False
         return self.dnx64.EnableMicroTouch(flag)
 
+    def GetVideoDeviceCount(self) -> int:
+        """
+        Get the number of video devices.
+        Returns:
+            int: Number of Dino-Lite video devices.
+        """
+        if not self.dnx64: return 0
+        return self.dnx64.GetVideoDeviceCount()
+
+    def SetVideoDeviceIndex(self, device_index: int) -> None:
+        """
+        Select the video device (index of the camera in DirectShow) controlled by the SDK.
+        """
+        if not self.dnx64: return
+        self.dnx64.SetVideoDeviceIndex(device_index)
+
+    def GetConfig(self, device_index: int) -> int:
+        """
+        Get the device configuration bit mask (EDOF, AMR, eFLC, AimPoint, LED / FLC support).
+        """
+        if not self.dnx64: return 0
+        return self.dnx64.GetConfig(device_index)
+
+    def GetAMR(self, device_index: int) -> float:
+        """
+        Get the current magnification (Automatic Magnification Reading).
+        """
+        if not self.dnx64: return 0.0
+        return self.dnx64.GetAMR(device_index)
+
+    def GetAutoExposure(self, device_index: int) -> int:
+        """
+        Returns:
+            int: 1 if auto exposure is on, 0 otherwise.
+        """
+        if not self.dnx64: return 0
+        return self.dnx64.GetAutoExposure(device_index)
+
+    def SetAutoExposure(self, device_index: int, ae_state: int) -> None:
+        """
+        Turn auto exposure on (1) or off (0).
+        """
+        if not self.dnx64: return
+        self.dnx64.SetAutoExposure(device_index, int(ae_state))
+
+    def GetAETarget(self, device_index: int) -> int:
+        """
+        Get the auto exposure target (brightness the AE aims for).
+        """
+        if not self.dnx64: return 0
+        return self.dnx64.GetAETarget(device_index)
+
+    def SetAETarget(self, device_index: int, ae_target: int) -> None:
+        """
+        Set the auto exposure target (used when auto exposure is on).
+        """
+        if not self.dnx64: return
+        self.dnx64.SetAETarget(device_index, int(ae_target))
+
+    def GetExposureValue(self, device_index: int) -> int:
+        """
+        Get the manual exposure value.
+        """
+        if not self.dnx64: return 0
+        return self.dnx64.GetExposureValue(device_index)
+
+    def SetExposureValue(self, device_index: int, exposure_value: int) -> None:
+        """
+        Set the manual exposure value (auto exposure must be off).
+        """
+        if not self.dnx64: return
+        self.dnx64.SetExposureValue(device_index, int(exposure_value))
+
+    def SetLEDState(self, device_index: int, led_state: int) -> None:
+        """
+        Set the LED state: 0 = off, 1 = LED 1 on, 2 = LED 2 on (models with two LED sets).
+        """
+        if not self.dnx64: return
+        self.dnx64.SetLEDState(device_index, int(led_state))
+
+    def SetFLCSwitch(self, device_index: int, flc_quadrant: int) -> None:
+        """
+        Select the FLC (Flexible LED Control) quadrants that are lit, bit mask 1..15.
+        """
+        if not self.dnx64: return
+        self.dnx64.SetFLCSwitch(device_index, int(flc_quadrant))
+
+    def SetFLCLevel(self, device_index: int, flc_level: int) -> None:
+        """
+        Set the FLC brightness level (1..6).
+        """
+        if not self.dnx64: return
+        self.dnx64.SetFLCLevel(device_index, int(flc_level))
+
+    def GetLensPosLimits(self, device_index: int) -> Tuple[int, int]:
+        """
+        Returns:
+            (int, int): Upper and lower limits of the lens (focus) position.
+        """
+        if not self.dnx64: return (0, 0)
+        upper, lower = ctypes.c_long(), ctypes.c_long()
+        self.dnx64.GetLensPosLimits(device_index, ctypes.byref(upper), ctypes.byref(lower))
+        return upper.value, lower.value
+
+    def SetLensInitPos(self, device_index: int) -> None:
+        """
+        Move the lens back to its initial position.
+        """
+        if not self.dnx64: return
+        self.dnx64.SetLensInitPos(device_index)
+
+    def SetLensPos(self, device_index: int, lens_position: int) -> None:
+        """
+        Set the lens (focus) position, within GetLensPosLimits.
+        """
+        if not self.dnx64: return
+        self.dnx64.SetLensPos(device_index, int(lens_position))
+
     def SetEventCallback(self, external_callback: Callable) -> None:
         """
         Set callback function for MicroTouch pressed event.
@@ -127,3 +251,57 @@ class DNX64:
         self.EventCallback = ctypes.CFUNCTYPE(None)
         self.callback_func = self.EventCallback(external_callback)
         self.dnx64.SetEventCallback(self.callback_func)
+
+
+class FakeDNX64Dll:
+    """
+    DLL giả cho test / máy không có Dino-Lite: Set<X>(device, value) lưu giá trị,
+    Get<X>(device) trả lại giá trị đó. Mọi lệnh gọi được ghi vào `calls`;
+    `delay` (giây) giả lập thiết bị chậm, press() giả lập nhấn nút MicroTouch.
+    """
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+        self.state = {}
+        self.callback = None
+        self.lens_limits = (1000, 0)
+
+    def _call(self, name, args):
+        self.calls.append((name, args))
+        if self.delay:
+            time.sleep(self.delay)
+
+    def Init(self):
+        self._call("Init", ())
+        return True
+
+    def EnableMicroTouch(self, flag):
+        self._call("EnableMicroTouch", (flag,))
+        self.state["MicroTouch"] = flag
+        return True
+
+    def SetEventCallback(self, callback):
+        self._call("SetEventCallback", ())
+        self.callback = callback
+
+    def GetLensPosLimits(self, device_index, upper, lower):
+        self._call("GetLensPosLimits", (device_index,))
+        upper._obj.value, lower._obj.value = self.lens_limits
+        return 0
+
+    def press(self):
+        if self.callback is not None and self.state.get("MicroTouch"):
+            self.callback()
+
+    def __getattr__(self, name):
+        if name not in METHOD_SIGNATURES:
+            raise AttributeError(name)
+
+        def method(*args):
+            self._call(name, args)
+            if name.startswith("Set") and len(args) >= 2:
+                self.state[name[3:]] = args[1] if len(args) == 2 else args[1:]
+            elif name.startswith("Get"):
+                return self.state.get(name[3:], 0)
+            return None
+        return method
@@ -0,0 +1,164 @@
+import time
+import queue
+import threading
+from concurrent.futures import Future
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from core.metrics import metrics, LatencyHistogram
+from core.startup import startup_profiler
+from core.event_log import event_log
+
+SLOW_CALL_S = 0.5 # Lệnh DLL lâu hơn mức này được ghi log
+
+# DinoService vẫn kẹt trong lệnh DLL sau shutdown(): giữ tham chiếu tới khi thread tự kết thúc,
+# vì hủy QThread đang chạy (VD: khi cửa sổ đóng) làm Qt abort cả app
+_stalled = set()
+
+
+class DinoService(QThread):
+    """
+    Thread duy nhất được gọi vào DNX64.dll: nạp DLL, Init, bật MicroTouch rồi chạy
+    lần lượt các lệnh trong hàng đợi. GUI gửi lệnh bằng call() và nhận Future,
+    không bao giờ chờ DLL, nên thiết bị treo / chậm cũng không làm đơ màn hình.
+
+    backend: DLL giả (FakeDNX64Dll) thay cho DNX64.dll, dùng khi test trên Linux.
+    Không đặt parent là cửa sổ: dừng bằng shutdown(), thread kẹt trong DLL sống lâu hơn cửa sổ.
+    """
+    sdk_ready = pyqtSignal(bool) # True nếu có SDK và Init thành công
+    microtouch_pressed = pyqtSignal(float) # time.perf_counter() lúc bấm; emit từ thread của DLL, Qt tự chuyển về GUI thread
+    call_finished = pyqtSignal(str, float, str) # (tên lệnh, giây, lỗi hoặc "")
+
+    def __init__(self, dll_path="DNX64.dll", backend=None, parent=None):
+        super().__init__(parent)
+        self.dll_path = dll_path
+        self.backend = backend
+        self.dino = None
+        self.available = False
+        self._queue = queue.Queue()
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+        self._current = None # (tên lệnh, lúc bắt đầu) khi đang gọi DLL
+
+    def call(self, name, *args):
+        """Đưa lệnh DNX64 (VD: "SetLEDState", 0, 1) vào hàng đợi. Returns: Future kết quả."""
+        future = Future()
+        self._queue.put(([(name, args)], future, True))
+        return future
+
+    def call_batch(self, calls):
+        """
+        Chạy liên tiếp nhiều lệnh [(tên, args), ...], không lệnh nào khác chen vào giữa.
+        Dừng ở lệnh lỗi đầu tiên. Returns: Future list kết quả.
+        """
+        future = Future()
+        self._queue.put(([(name, tuple(args)) for name, args in calls], future, False))
+        return future
+
+    def pending(self):
+        """Số lệnh đang chờ, tính cả lệnh đang chạy."""
+        return self._queue.qsize() + (1 if self._current is not None else 0)
+
+    def busy(self):
+        """(tên lệnh, số giây đã chạy) nếu đang gọi DLL, hoặc None."""
+        current = self._current
+        if current is None:
+            return None
+        return current[0], time.perf_counter() - current[1]
+
+    def latency_stats(self):
+        """Độ trễ từng loại lệnh: {tên: snapshot của LatencyHistogram}."""
+        with self._stats_lock:
+            return {name: hist.snapshot() for name, hist in sorted(self._stats.items())}
+
+    def stop(self):
+        self._queue.put(None)
+
+    def shutdown(self, timeout_ms=2000):
+        """
+        stop() rồi chờ tối đa timeout_ms. Thiết bị treo trong một lệnh DLL thì không chờ thêm:
+        object được giữ lại tới khi lệnh đó trả về. Returns: True nếu thread đã dừng.
+        """
+        self.stop()
+        if self.wait(timeout_ms):
+            return True
+        busy = self.busy()
+        print(f"DinoService did not stop ({busy[0] if busy else 'device'} call stalled).")
+        event_log.log("dino_stalled", call=busy[0] if busy else None)
+        _stalled.add(self)
+        self.finished.connect(lambda: _stalled.discard(self))
+        return False
+
+    def run(self):
+        with startup_profiler.phase("Dino-Lite SDK init"):
+            self.available = self._init_sdk()
+        self.sdk_ready.emit(self.available)
+
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            calls, future, single = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            self._execute(calls, future, single)
+
+        # Lệnh còn lại sau khi dừng: báo lỗi thay vì để Future chờ mãi
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None:
+                item[1].set_exception(RuntimeError("DinoService stopped"))
+
+    def _init_sdk(self):
+        try:
+            from core.dino_sdk import DNX64
+            self.dino = DNX64(self.dll_path, dll=self.backend)
+            if not self.dino.dnx64:
+                return False
+            if not self._timed("Init", self.dino.Init):
+                print("Dino-Lite SDK Init failed.")
+                return False
+            self._timed("EnableMicroTouch", self.dino.EnableMicroTouch, True)
+            self._timed("SetEventCallback", self.dino.SetEventCallback, self._on_microtouch)
+            return True
+        except Exception as e:
+            print(f"Failed to init Dino SDK: {e}")
+            event_log.error("dino_error", e, call="Init")
+            return False
+
+    def _on_microtouch(self):
+        # Lấy timestamp ngay trong callback: độ trễ chuyển signal về GUI thread không làm lệch frame được chụp
+        self.microtouch_pressed.emit(time.perf_counter())
+
+    def _execute(self, calls, future, single):
+        try:
+            if not self.available:
+                raise RuntimeError("Dino-Lite SDK not available")
+            results = []
+            for name, args in calls:
+                # Hàm đã bọc trong DNX64 nếu có, không thì gọi thẳng hàm của DLL (argtypes đã khai báo)
+                func = getattr(self.dino, name, None) or getattr(self.dino.dnx64, name)
+                results.append(self._timed(name, func, *args))
+            future.set_result(results[0] if single else results)
+        except Exception as e:
+            future.set_exception(e)
+
+    def _timed(self, name, func, *args):
+        self._current = (name, time.perf_counter())
+        error = ""
+        try:
+            return func(*args)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            elapsed = time.perf_counter() - self._current[1]
+            self._current = None
+            with self._stats_lock:
+                self._stats.setdefault(name, LatencyHistogram()).record(elapsed)
+            metrics.record(f"dino_{name}", elapsed)
+            if error:
+                event_log.log("dino_call", call=name, duration_ms=round(elapsed * 1000, 1), error=error)
+            elif elapsed > SLOW_CALL_S:
+                event_log.log("dino_call", call=name, duration_ms=round(elapsed * 1000, 1))
+            self.call_finished.emit(name, elapsed, error)
@@ -1,51 +1,250 @@
 import smtplib
+import time
+import base64
+import mimetypes
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.base import MIMEBase
-from email import encoders
+from email.policy import SMTP as SMTP_POLICY
 import os
 
+# Đọc file đính kèm theo từng khối: bội số của 57 byte = đúng một dòng base64 76 ký tự
+ATTACHMENT_LINE_BYTES = 57
+ATTACHMENT_CHUNK_LINES = 1024 # ~57 KB mỗi lần đọc
+_ATTACHMENT_MARKER = "@@ATTACHMENT_PAYLOAD@@"
+
 class EmailSender:
-    def __init__(self, smtp_server="smtp.gmail.com", smtp_port=587, sender_email="", password=""):
+    """
+    Gửi email qua SMTP, giữ kết nối đã đăng nhập để dùng lại giữa các lần gửi.
+
+    Handshake (connect + STARTTLS + login) chỉ chạy khi chưa có kết nối; kết nối
+    rảnh quá keepalive_interval được kiểm tra bằng NOOP, không gửi email nào quá
+    max_idle thì đóng (NOOP không tính là dùng kết nối). Kết nối bị server cắt sẽ được mở lại và gửi lại một lần.
+    Gọi close() khi không dùng nữa.
+
+    File đính kèm không được đọc hết vào bộ nhớ: nội dung được base64 theo từng
+    khối và ghi thẳng vào lệnh DATA, nên bộ nhớ dùng không phụ thuộc kích thước file.
+    """
+    def __init__(self, smtp_server="smtp.gmail.com", smtp_port=587, sender_email="", password="",
+                 use_tls=True, timeout=30, keepalive_interval=60, max_idle=300):
         self.smtp_server = smtp_server
         self.smtp_port = smtp_port
         self.sender_email = sender_email
         self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.keepalive_interval = keepalive_interval
+        self.max_idle = max_idle
+        self._server = None
+        self._last_used = 0.0 # Lần gửi / kết nối cuối, tính max_idle
+        self._last_noop = 0.0 # Lần NOOP cuối, chỉ để giãn NOOP theo keepalive_interval
+        self.connect_count = 0 # Số lần handshake, để kiểm tra việc dùng lại kết nối
+        self.last_batch_stats = {}
+
+    def _connect(self):
+        self.close()
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls() # Secure the connection
+            if self.password:
+                server.login(self.sender_email, self.password)
+        except Exception:
+            server.close()
+            raise
+        self._server = server
+        self._last_used = time.monotonic()
+        self.connect_count += 1
+        return server
+
+    def _ensure_connection(self):
+        """Trả về kết nối còn sống, mở mới nếu chưa có / quá max_idle / NOOP lỗi."""
+        if self._server is None:
+            return self._connect()
+        idle = time.monotonic() - self._last_used
+        if idle >= self.max_idle:
+            return self._connect()
+        if idle >= self.keepalive_interval and not self.keepalive():
+            return self._connect()
+        return self._server
+
+    def keepalive(self):
+        """
+        Gửi NOOP để giữ kết nối (tối đa một lần mỗi keepalive_interval).
+        Đóng kết nối nếu không gửi email nào quá max_idle.
+        Returns: True nếu kết nối vẫn dùng được.
+        """
+        if self._server is None:
+            return False
+        now = time.monotonic()
+        if now - self._last_used >= self.max_idle:
+            self.close()
+            return False
+        if now - max(self._last_used, self._last_noop) < self.keepalive_interval:
+            return True
+        try:
+            code, _ = self._server.noop()
+        except (smtplib.SMTPException, OSError):
+            code = None
+        if code != 250:
+            self.close()
+            return False
+        self._last_noop = now
+        return True
+
+    @property
+    def is_connected(self):
+        return self._server is not None
+
+    def close(self):
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except (smtplib.SMTPException, OSError):
+            try:
+                self._server.close()
+            except OSError:
+                pass
+        self._server = None
+
+    def _build_message(self, recipient_email, subject, body, attachment_path=None, is_html=False):
+        """
+        Dựng khung MIME (header, phần text, header của phần đính kèm).
+        Payload đính kèm chỉ là marker, được thay bằng dữ liệu stream trong _message_chunks.
+        """
+        msg = MIMEMultipart(policy=SMTP_POLICY) # Header tiếng Việt được mã hóa RFC 2047
+        msg['From'] = self.sender_email
+        msg['To'] = recipient_email
+        msg['Subject'] = subject
+
+        subtype = 'html' if is_html else 'plain'
+        msg.attach(MIMEText(body, subtype))
+
+        if attachment_path and os.path.exists(attachment_path):
+            filename = os.path.basename(attachment_path)
+            # VD: application/pdf, application/zip để mail client mở đúng trình xem
+            ctype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+            part = MIMEBase(*ctype.split("/", 1))
+            part.set_payload(_ATTACHMENT_MARKER)
+            part["Content-Transfer-Encoding"] = "base64"
+            part.add_header(
+                "Content-Disposition",
+                f"attachment; filename= {filename}",
+            )
+            msg.attach(part)
+        return msg
+
+    def _message_chunks(self, recipient_email, subject, body, attachment_path=None, is_html=False):
+        """
+        Sinh nội dung email (bytes, dòng kết thúc CRLF) theo từng khối.
+        File đính kèm được đọc và base64 từng ~57 KB một.
+        """
+        msg = self._build_message(recipient_email, subject, body, attachment_path, is_html)
+        raw = msg.as_bytes(policy=SMTP_POLICY)
+        marker = _ATTACHMENT_MARKER.encode("ascii")
+        if marker not in raw:
+            yield raw
+            return
+
+        head, tail = raw.split(marker, 1)
+        yield head
+        with open(attachment_path, "rb") as f:
+            while True:
+                chunk = f.read(ATTACHMENT_LINE_BYTES * ATTACHMENT_CHUNK_LINES)
+                if not chunk:
+                    break
+                # encodebytes chèn "\n" sau mỗi 76 ký tự -> đổi sang CRLF của SMTP
+                yield base64.encodebytes(chunk).replace(b"\n", b"\r\n")
+        yield tail
+
+    @staticmethod
+    def _write_data(server, chunks):
+        """
+        Gửi lệnh DATA và nội dung theo từng khối (thay cho sendmail(msg.as_string())).
+        Áp dụng dot-stuffing: dòng bắt đầu bằng "." được gửi thành "..".
+        """
+        code, resp = server.docmd("DATA")
+        if code != 354:
+            raise smtplib.SMTPDataError(code, resp)
+        at_line_start = True
+        for chunk in chunks:
+            if not chunk:
+                continue
+            chunk = chunk.replace(b"\r\n.", b"\r\n..")
+            if at_line_start and chunk.startswith(b"."):
+                chunk = b"." + chunk
+            server.send(chunk)
+            at_line_start = chunk.endswith(b"\r\n")
+        server.send(b".\r\n" if at_line_start else b"\r\n.\r\n")
+        code, resp = server.getreply()
+        if code != 250:
+            raise smtplib.SMTPDataError(code, resp)
+
+    def _transaction(self, server, recipient_email, chunks):
+        server.ehlo_or_helo_if_needed()
+        code, resp = server.mail(self.sender_email)
+        if code != 250:
+            raise smtplib.SMTPSenderRefused(code, resp, self.sender_email)
+        code, resp = server.rcpt(recipient_email)
+        if code not in (250, 251):
+            server.rset()
+            raise smtplib.SMTPRecipientsRefused({recipient_email: (code, resp)})
+        self._write_data(server, chunks)
+
+    def _send(self, recipient_email, make_chunks):
+        """
+        Gửi trên kết nối đang giữ; server đã cắt kết nối thì mở lại và gửi lại một lần.
+        make_chunks: callable() -> iterable bytes, gọi lại khi cần gửi lại.
+        """
+        server = self._ensure_connection()
+        try:
+            self._transaction(server, recipient_email, make_chunks())
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            server = self._connect()
+            self._transaction(server, recipient_email, make_chunks())
+        self._last_used = time.monotonic()
 
     def send_email(self, recipient_email, subject, body, attachment_path=None, is_html=False):
         """
         Sends an email with an optional attachment.
         """
         try:
-            msg = MIMEMultipart()
-            msg['From'] = self.sender_email
-            msg['To'] = recipient_email
-            msg['Subject'] = subject
-
-            subtype = 'html' if is_html else 'plain'
-            msg.attach(MIMEText(body, subtype))
-
-            if attachment_path and os.path.exists(attachment_path):
-                filename = os.path.basename(attachment_path)
-                with open(attachment_path, "rb") as attachment:
-                    part = MIMEBase("application", "octet-stream")
-                    part.set_payload(attachment.read())
-                
-                encoders.encode_base64(part)
-                part.add_header(
-                    "Content-Disposition",
-                    f"attachment; filename= {filename}",
-                )
-                msg.attach(part)
-
-            # Connect to server
-            server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-            server.starttls() # Secure the connection
-            server.login(self.sender_email, self.password)
-            text = msg.as_string()
-            server.sendmail(self.sender_email, recipient_email, text)
-            server.quit()
+            self._send(recipient_email, lambda: self._message_chunks(
+                recipient_email, subject, body, attachment_path, is_html))
             return True, "Email sent successfully!"
 
         except Exception as e:
+            # Lỗi giữa chừng có thể để lại kết nối ở trạng thái không rõ
+            self.close()
             return False, str(e)
+
+    def send_many(self, messages):
+        """
+        Gửi nhiều email trên cùng một phiên SMTP (một lần handshake cho cả lô).
+
+        Args:
+            messages: list dict có các key như tham số của send_email
+                (recipient_email, subject, body, attachment_path, is_html).
+        Returns:
+            list (success, msg, latency_giây) theo thứ tự messages.
+            Thống kê của lô nằm ở self.last_batch_stats.
+        """
+        start = time.perf_counter()
+        connects_before = self.connect_count
+        results = []
+        for message in messages:
+            t0 = time.perf_counter()
+            success, msg = self.send_email(**message)
+            results.append((success, msg, time.perf_counter() - t0))
+
+        latencies = sorted(r[2] for r in results)
+        self.last_batch_stats = {
+            "count": len(results),
+            "sent": sum(1 for r in results if r[0]),
+            "seconds": time.perf_counter() - start,
+            "connects": self.connect_count - connects_before,
+            "latency_p50": latencies[len(latencies) // 2] if latencies else 0.0,
+            "latency_max": latencies[-1] if latencies else 0.0,
+        }
+        return results
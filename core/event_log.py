@@ -0,0 +1,197 @@
+import os
+import sys
+import json
+import time
+import queue
+import threading
+from datetime import datetime
+
+DEFAULT_LOG_PATH = os.path.join("logs", "events.jsonl") # Ngoài CapturedImages: không bị coi là một phiên
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+DEFAULT_BACKUPS = 5
+
+
+class EventLog:
+    """
+    Log sự kiện dạng JSONL (mỗi dòng một object: ts, event, ...) cho phiên, chụp, xóa ảnh,
+    export, email và lỗi. log() chỉ đưa dict vào queue; thread nền gom lại, ghi theo lô
+    và xoay file khi vượt max_bytes (events.jsonl -> events.jsonl.1 ... .N), nên không
+    chặn camera / GUI thread. Chưa open() thì log() không làm gì.
+
+    Bản build windowed (console=False) không có stdout: capture_stdio() đưa các
+    print() cũ và traceback vào log dưới dạng event "stdout" / "stderr".
+    """
+    def __init__(self):
+        self.path = None
+        self.max_bytes = DEFAULT_MAX_BYTES
+        self.backups = DEFAULT_BACKUPS
+        self._queue = queue.Queue()
+        self._thread = None
+
+    @property
+    def enabled(self):
+        return self.path is not None
+
+    def open(self, path, max_bytes=DEFAULT_MAX_BYTES, backups=DEFAULT_BACKUPS, flush_interval=1.0):
+        if self._thread is not None:
+            self.close()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._thread = threading.Thread(target=self._run, args=(path, flush_interval), name="EventLogWriter", daemon=True)
+        self._thread.start()
+
+    def log(self, event, **fields):
+        if self.path is None:
+            return
+        record = {"ts": datetime.now().isoformat(timespec="milliseconds"), "event": event}
+        record.update(fields)
+        self._queue.put(record)
+
+    def error(self, event, exc, **fields):
+        self.log(event, error=f"{type(exc).__name__}: {exc}", **fields)
+
+    def close(self):
+        """Ghi nốt các event còn trong queue rồi dừng thread ghi."""
+        if self._thread is None:
+            return
+        self.path = None # Event đến sau lúc này bị bỏ qua
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def _run(self, path, flush_interval):
+        f = open(path, "a", encoding="utf-8")
+        try:
+            while True:
+                try:
+                    batch = [self._queue.get(timeout=flush_interval)]
+                except queue.Empty:
+                    continue
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                for record in batch:
+                    if record is None:
+                        continue
+                    f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                    if f.tell() >= self.max_bytes:
+                        f.close()
+                        self._rotate(path)
+                        f = open(path, "a", encoding="utf-8")
+                f.flush()
+                if None in batch:
+                    break
+        except Exception as e:
+            if sys.__stderr__ is not None: # Không print: stdout có thể đang được chép vào chính log này
+                sys.__stderr__.write(f"Event log writer stopped: {e}\n")
+        finally:
+            f.close()
+
+    def _rotate(self, path):
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(path, f"{path}.1")
+        else:
+            os.remove(path)
+
+    def capture_stdio(self):
+        """Chép stdout / stderr (print, traceback) vào log; vẫn in ra console nếu có."""
+        sys.stdout = _StreamToLog(self, "stdout", sys.stdout)
+        sys.stderr = _StreamToLog(self, "stderr", sys.stderr)
+
+
+class _StreamToLog:
+    def __init__(self, log, event, stream):
+        self.log = log
+        self.event = event
+        self.stream = stream
+        self._buffer = ""
+
+    def write(self, text):
+        if self.stream is not None:
+            self.stream.write(text)
+        self._buffer += text
+        if "\n" in self._buffer:
+            *lines, self._buffer = self._buffer.split("\n")
+            message = "\n".join(line for line in lines if line.strip())
+            if message:
+                self.log.log(self.event, msg=message)
+        return len(text)
+
+    def flush(self):
+        if self.stream is not None:
+            self.stream.flush()
+
+
+event_log = EventLog()
+
+
+def read_events(path, event=None, since=None):
+    """
+    Đọc log (kể cả các file đã xoay, cũ trước) -> các dict event.
+    event: lọc theo tên (chuỗi hoặc tập tên); since: datetime.
+    """
+    names = {event} if isinstance(event, str) else event
+    folder, base = os.path.split(os.path.abspath(path))
+    rotated = []
+    if os.path.isdir(folder):
+        for name in os.listdir(folder):
+            suffix = name[len(base) + 1:]
+            if name.startswith(base + ".") and suffix.isdigit():
+                rotated.append((int(suffix), os.path.join(folder, name)))
+    files = [p for _, p in sorted(rotated, reverse=True)] + [path]
+    for file_path in files:
+        if not os.path.exists(file_path):
+            continue
+        with open(file_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue # Dòng dở dang khi app bị tắt ngang
+                if names and record.get("event") not in names:
+                    continue
+                if since and datetime.fromisoformat(record["ts"]) < since:
+                    continue
+                yield record
+
+
+def summarize(events):
+    """Số lượng, số lỗi và thời lượng (duration_ms) trung bình / p95 / tổng theo từng loại event."""
+    groups = {}
+    for record in events:
+        group = groups.setdefault(record["event"], {"count": 0, "errors": 0, "durations": []})
+        group["count"] += 1
+        if "error" in record:
+            group["errors"] += 1
+        if "duration_ms" in record:
+            group["durations"].append(record["duration_ms"])
+    summary = {}
+    for name, group in sorted(groups.items()):
+        durations = sorted(group.pop("durations"))
+        if durations:
+            group["mean_ms"] = round(sum(durations) / len(durations), 1)
+            group["p95_ms"] = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+            group["total_s"] = round(sum(durations) / 1000, 1)
+        summary[name] = group
+    return summary
+
+
+def elapsed_ms(start):
+    """Thời lượng (ms) từ start = time.perf_counter(), làm tròn cho log."""
+    return round((time.perf_counter() - start) * 1000, 1)
+
+
+if __name__ == "__main__":
+    # python -m core.event_log logs/events.jsonl [YYYY-MM-DDTHH:MM]
+    log_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_LOG_PATH
+    since_arg = datetime.fromisoformat(sys.argv[2]) if len(sys.argv) > 2 else None
+    for name, stats in summarize(read_events(log_path, since=since_arg)).items():
+        print(f"{name:<20} {json.dumps(stats)}")
@@ -0,0 +1,47 @@
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from core.pdf_generator import ExportCancelled
+
+
+class PDFExportThread(QThread):
+    """
+    Thread riêng để xuất PDF, tránh làm đơ UI trong lúc decode và nhúng ảnh.
+
+    job là một callable nhận (progress_callback, cancel_check) và trả về
+    đường dẫn file PDF (hoặc None nếu lỗi), ví dụ một lambda bọc
+    PDFGenerator.generate_report.
+    """
+    progress = pyqtSignal(int, int) # (số ảnh đã xử lý, tổng số ảnh)
+    export_done = pyqtSignal(str) # Đường dẫn PDF khi thành công
+    export_failed = pyqtSignal(str) # Thông báo lỗi
+    export_cancelled = pyqtSignal()
+
+    def __init__(self, job, parent=None):
+        super().__init__(parent)
+        self.job = job
+        self._cancel_requested = False
+
+    def cancel(self):
+        """Yêu cầu hủy. Thread sẽ dừng ở ảnh kế tiếp."""
+        self._cancel_requested = True
+
+    def is_cancelled(self):
+        return self._cancel_requested
+
+    def run(self):
+        try:
+            pdf_path = self.job(progress_callback=self.progress.emit,
+                                cancel_check=self.is_cancelled)
+        except ExportCancelled:
+            self.export_cancelled.emit()
+            return
+        except Exception as e:
+            self.export_failed.emit(str(e))
+            return
+
+        if self._cancel_requested:
+            self.export_cancelled.emit()
+        elif pdf_path:
+            self.export_done.emit(pdf_path)
+        else:
+            self.export_failed.emit("Failed to generate PDF.")
@@ -0,0 +1,15 @@
+def focus_score(frame, roi=0.5, max_side=320):
+    """
+    Độ nét của frame: phương sai Laplacian trên vùng giữa (roi = tỉ lệ mỗi cạnh),
+    lấy mẫu cách đều còn khoảng max_side px mỗi cạnh. Càng lớn càng nét; chỉ dùng
+    để so các frame của cùng một cảnh (~1 ms với frame 1280x1024).
+    """
+    import cv2 # Import khi chấm điểm lần đầu: không làm chậm lúc mở app
+    h, w = frame.shape[:2]
+    rh, rw = max(1, int(h * roi)), max(1, int(w * roi))
+    y, x = (h - rh) // 2, (w - rw) // 2
+    step = max(1, max(rh, rw) // max_side)
+    crop = frame[y:y + rh:step, x:x + rw:step]
+    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+    _, stddev = cv2.meanStdDev(cv2.Laplacian(gray, cv2.CV_16S))
+    return float(stddev[0, 0]) ** 2
@@ -0,0 +1,269 @@
+import os
+import sys
+import json
+import math
+
+DEFAULT_TEMPLATE_PATH = "inspection_template.json"
+
+# Template mặc định (giống inspection_template.json đi kèm app), dùng khi file thiếu / sai định dạng
+DEFAULT_TEMPLATE = {
+    "name": "Socket 4x8",
+    "title": "Socket Inspection Report",
+    "points_per_row": 4,
+    "dept": ["Non-\nDestructive\nInspection", "IQC", "Microscope\nInspection"],
+    "categories": [
+        {"name": "Linh kiện của adapter", "item": "Linh kiện của\nadapter",
+         "criteria": "Không vỡ,\nkhông cầu", "ng_image": "Adapter Components.png", "points": 8},
+        {"name": "Bụi bẩn", "item": "Bụi bẩn",
+         "criteria": "Không có dị\nvật, không có\nbụi bẩn", "ng_image": "Foreign material.png", "points": 8},
+        {"name": "Các chân tiếp xúc của socket", "item": "Các chân tiếp xúc\ncủa socket",
+         "criteria": "Không biến\ndạng, không\nxước, không\nhỏng", "ng_image": "Pin.png", "points": 8},
+        {"name": "Các điểm tiếp nối", "item": "Các điểm tiếp nối",
+         "criteria": "Không biến\ndạng, không\nxước, không\nhỏng", "ng_image": "Pad.png", "points": 8},
+    ],
+}
+
+
+def resource_path(relative):
+    """
+    Đường dẫn file đi kèm app (template, "pdf image"): ưu tiên bản trong thư mục chạy (sửa được),
+    bản build PyInstaller không có thì lấy bản đóng gói trong sys._MEIPASS.
+    """
+    if os.path.isabs(relative) or os.path.exists(relative):
+        return relative
+    bundle = getattr(sys, "_MEIPASS", None)
+    if bundle and os.path.exists(os.path.join(bundle, relative)):
+        return os.path.join(bundle, relative)
+    return relative
+
+INCH = 72.0 # reportlab.lib.units.inch, khai báo lại để GUI không phải import reportlab
+
+# Layout trang A4 landscape (đơn vị inch), khớp với báo cáo gốc 4x8:
+# Dept(3): 0.6, 0.4, 0.7 | Item: 1.1 | Criteria: 1.1 | NGEx: 1.3 | Pts: 4.8 | Result: 0.6 | Note: 0.7
+DEPT_COL_WIDTHS = [0.6, 0.4, 0.7]
+ITEM_COL_WIDTH = 1.1
+CRITERIA_COL_WIDTH = 1.1
+NG_COL_WIDTH = 1.3
+POINTS_AREA_WIDTH = 4.8
+RESULT_COL_WIDTH = 0.6
+NOTE_COL_WIDTH = 0.7
+HEADER_ROW_HEIGHT = 0.4
+DATA_AREA_HEIGHT = 5.2 # Tổng chiều cao các hàng dữ liệu để vừa 1 trang
+MAX_DATA_ROW_HEIGHT = 0.65
+
+
+class InspectionCategory:
+    """
+    Một mục kiểm tra (VD: "Bụi bẩn") với số điểm chụp và ảnh NG mẫu.
+    camera: preset Dino-Lite khi chụp mục này, VD: {"auto_exposure": 0, "exposure": 120, "led": 1, "lens": 500}
+    (các khóa xem DEVICE_SETTINGS trong core/dino_device.py).
+    """
+    def __init__(self, index, name, item=None, criteria="", ng_image="", points=8, camera=None):
+        self.index = index
+        self.name = name
+        self.item = item or name
+        self.criteria = criteria
+        self.ng_image = ng_image
+        self.points = int(points)
+        self.camera = dict(camera or {})
+
+    @property
+    def label(self):
+        """Tên hiển thị trên GUI, VD: "1. Linh kiện của adapter"."""
+        return f"{self.index + 1}. {self.name}"
+
+    @property
+    def file_prefix(self):
+        """Tiền tố tên file ảnh, VD: "1_Linh_kiện_của_adapter"."""
+        return f"{self.index + 1}_{self.name.replace(' ', '_').replace(',', '')}"
+
+
+class TableLayout:
+    """
+    Layout bảng báo cáo đã tính sẵn từ template: độ rộng cột, chiều cao hàng,
+    danh sách TableStyle và vị trí (row, col) của từng ô ảnh.
+    """
+    def __init__(self, col_widths, row_heights, style, category_rows, point_cells,
+                 image_size, ng_image_size):
+        self.col_widths = col_widths
+        self.row_heights = row_heights
+        self.style = style
+        self.category_rows = category_rows # cat_idx -> (start_row, end_row)
+        self.point_cells = point_cells # (cat_idx, point_idx) -> (row, col)
+        self.image_size = image_size # (width, height) của ảnh chụp trong ô
+        self.ng_image_size = ng_image_size
+        self._regions = None
+
+    @property
+    def num_cols(self):
+        return len(self.col_widths)
+
+    @property
+    def num_rows(self):
+        return len(self.row_heights)
+
+    @property
+    def regions(self):
+        """
+        Các ô sau khi gộp SPAN: list (row0, col0, row1, col1), mỗi ô thật đúng một lần.
+        Dùng cho renderer vẽ trực tiếp lên canvas.
+        """
+        if self._regions is None:
+            owner = {}
+            regions = []
+            for cmd in self.style:
+                if cmd[0] != 'SPAN':
+                    continue
+                (c0, r0), (c1, r1) = cmd[1], cmd[2]
+                regions.append((r0, c0, r1, c1))
+                for r in range(r0, r1 + 1):
+                    for c in range(c0, c1 + 1):
+                        owner[(r, c)] = True
+            for r in range(self.num_rows):
+                for c in range(self.num_cols):
+                    if (r, c) not in owner:
+                        regions.append((r, c, r, c))
+            regions.sort()
+            self._regions = regions
+        return self._regions
+
+
+class InspectionTemplate:
+    """
+    Template kiểm tra dùng chung cho GUI và PDF: danh sách category,
+    số điểm chụp mỗi category, ảnh NG mẫu và tiêu chí.
+    """
+    def __init__(self, categories, points_per_row=4, title="Socket Inspection Report",
+                 dept=None, inspection_points_text=None, name=""):
+        self.name = name
+        self.title = title
+        self.points_per_row = int(points_per_row)
+        self.dept = dept or ["", "", ""]
+        self.categories = categories
+        self.inspection_points_text = inspection_points_text or ", ".join(c.name for c in categories)
+
+        # Slot index (thứ tự chụp) -> (cat_idx, point_idx 1-based)
+        self.slots = [(c.index, p) for c in categories for p in range(1, c.points + 1)]
+        self._layouts = {}
+
+    @classmethod
+    def from_dict(cls, data):
+        categories = [
+            InspectionCategory(i, c["name"], item=c.get("item"), criteria=c.get("criteria", ""),
+                               ng_image=c.get("ng_image", ""), points=c.get("points", 8), camera=c.get("camera"))
+            for i, c in enumerate(data["categories"])
+        ]
+        return cls(categories,
+                   points_per_row=data.get("points_per_row", 4),
+                   title=data.get("title", "Socket Inspection Report"),
+                   dept=data.get("dept"),
+                   inspection_points_text=data.get("inspection_points_text"),
+                   name=data.get("name", ""))
+
+    @property
+    def total_points(self):
+        return len(self.slots)
+
+    @property
+    def max_points(self):
+        return max((c.points for c in self.categories), default=0)
+
+    def rows_for(self, category):
+        return max(1, math.ceil(category.points / self.points_per_row))
+
+    def layout(self, font_name="Helvetica"):
+        """Trả về TableLayout, chỉ tính một lần cho mỗi font."""
+        if font_name not in self._layouts:
+            self._layouts[font_name] = self._compile(font_name)
+        return self._layouts[font_name]
+
+    def _compile(self, font_name):
+        ppr = self.points_per_row
+        point_col_width = POINTS_AREA_WIDTH / ppr
+        col_widths = [w * INCH for w in (
+            DEPT_COL_WIDTHS + [ITEM_COL_WIDTH, CRITERIA_COL_WIDTH, NG_COL_WIDTH]
+            + [point_col_width] * ppr + [RESULT_COL_WIDTH, NOTE_COL_WIDTH])]
+
+        data_rows = sum(self.rows_for(c) for c in self.categories)
+        row_height = min(MAX_DATA_ROW_HEIGHT, DATA_AREA_HEIGHT / max(data_rows, 1))
+        row_heights = [HEADER_ROW_HEIGHT * INCH] + [row_height * INCH] * data_rows
+
+        first_point_col = 6
+        last_point_col = first_point_col + ppr - 1
+        result_col = last_point_col + 1
+        note_col = result_col + 1
+
+        style = [
+            ('GRID', (0,0), (-1,-1), 1, 'grey'),
+            ('FONTNAME', (0,0), (-1,-1), font_name),
+            ('FONTSIZE', (0,0), (-1,-1), 8),
+            ('ALIGN', (0,0), (-1,-1), 'CENTER'),
+            ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+
+            # Header
+            ('BACKGROUND', (0,0), (-1,0), 'lightgrey'),
+            ('SPAN', (0,0), (2,0)), # Merge Dept Header
+            ('SPAN', (first_point_col,0), (last_point_col,0)), # Merge Inspection Point Header
+
+            # Dept Vertical Spans (All data rows)
+            ('SPAN', (0,1), (0,data_rows)),
+            ('SPAN', (1,1), (1,data_rows)),
+            ('SPAN', (2,1), (2,data_rows)),
+        ]
+
+        category_rows = {}
+        point_cells = {}
+        start_row = 1
+        for category in self.categories:
+            end_row = start_row + self.rows_for(category) - 1
+            category_rows[category.index] = (start_row, end_row)
+            for point_idx in range(1, category.points + 1):
+                offset = point_idx - 1
+                point_cells[(category.index, point_idx)] = (start_row + offset // ppr,
+                                                            first_point_col + offset % ppr)
+            if end_row > start_row:
+                # Item, Criteria, NG Example, Result, Note span các hàng của category
+                for col in (3, 4, 5, result_col, note_col):
+                    style.append(('SPAN', (col, start_row), (col, end_row)))
+            start_row = end_row + 1
+
+        # Ảnh chụp nhỏ hơn ô một chút (1.0 x 0.58 trong ô 1.2 x 0.65)
+        image_size = ((point_col_width - 0.2) * INCH, (row_height - 0.07) * INCH)
+        ng_rows_height = min(self.rows_for(c) for c in self.categories) * row_height
+        ng_image_size = ((NG_COL_WIDTH - 0.2) * INCH, max(ng_rows_height - 0.15, row_height - 0.07) * INCH)
+
+        return TableLayout(col_widths, row_heights, style, category_rows, point_cells,
+                           image_size, ng_image_size)
+
+
+_template_cache = {}
+
+
+def load_template(path=DEFAULT_TEMPLATE_PATH):
+    """
+    Đọc template JSON. Kết quả được cache theo (path, mtime) nên layout
+    chỉ được compile một lần dù nhiều báo cáo dùng chung.
+    """
+    abs_path = os.path.abspath(path)
+    mtime = os.path.getmtime(abs_path)
+    cached = _template_cache.get(abs_path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with open(abs_path, 'r', encoding='utf-8') as f:
+        template = InspectionTemplate.from_dict(json.load(f))
+    _template_cache[abs_path] = (mtime, template)
+    return template
+
+
+def load_template_or_default(path=DEFAULT_TEMPLATE_PATH):
+    """
+    Như load_template nhưng không raise: file thiếu / sai định dạng thì dùng DEFAULT_TEMPLATE.
+    Returns: (template, thông báo lỗi hoặc None).
+    """
+    try:
+        return load_template(resource_path(path)), None
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        message = f"Cannot load inspection template {path}: {e}"
+        print(f"{message} - using the built-in default template.")
+        return InspectionTemplate.from_dict(DEFAULT_TEMPLATE), message
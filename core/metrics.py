@@ -0,0 +1,204 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+# Histogram log-linear kiểu HDR: 2^SUB_BUCKET_BITS ô con mỗi bậc lũy thừa 2,
+# sai số tương đối <= 1 / 2^(SUB_BUCKET_BITS - 1) (~1.6%) ở mọi độ lớn
+SUB_BUCKET_BITS = 7
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+SUB_BUCKET_HALF = SUB_BUCKET_COUNT >> 1
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, n=1):
+        with self._lock:
+            self.value += n
+
+    def snapshot(self):
+        return self.value
+
+
+class Gauge:
+    def __init__(self):
+        self.value = None
+
+    def set(self, value):
+        self.value = value
+
+    def snapshot(self):
+        return self.value
+
+
+class LatencyHistogram:
+    """
+    Histogram độ trễ (lưu theo micro giây) với bucket log-linear: ghi O(1), bộ nhớ
+    chỉ tăng theo số bucket thực sự có giá trị, percentile sai số ~1.6%.
+    """
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_us = 0
+        self.min_us = None
+        self.max_us = 0
+
+    @staticmethod
+    def bucket_of(value_us):
+        if value_us < SUB_BUCKET_COUNT:
+            return value_us
+        shift = value_us.bit_length() - SUB_BUCKET_BITS
+        return SUB_BUCKET_COUNT + (shift - 1) * SUB_BUCKET_HALF + ((value_us >> shift) - SUB_BUCKET_HALF)
+
+    @staticmethod
+    def bucket_value(bucket):
+        """Giá trị lớn nhất (µs) mà bucket chứa."""
+        if bucket < SUB_BUCKET_COUNT:
+            return bucket
+        shift = (bucket - SUB_BUCKET_COUNT) // SUB_BUCKET_HALF + 1
+        mantissa = (bucket - SUB_BUCKET_COUNT) % SUB_BUCKET_HALF + SUB_BUCKET_HALF
+        return ((mantissa + 1) << shift) - 1
+
+    def record(self, seconds):
+        value_us = max(0, int(seconds * 1_000_000))
+        bucket = self.bucket_of(value_us)
+        with self._lock:
+            self._buckets[bucket] = self._buckets.get(bucket, 0) + 1
+            self.count += 1
+            self.total_us += value_us
+            if self.min_us is None or value_us < self.min_us:
+                self.min_us = value_us
+            if value_us > self.max_us:
+                self.max_us = value_us
+
+    def percentile(self, q):
+        """Percentile q (0-100) theo ms; 0.0 nếu chưa có mẫu."""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = max(1, int(round(q / 100.0 * self.count)))
+            seen = 0
+            for bucket in sorted(self._buckets):
+                seen += self._buckets[bucket]
+                if seen >= rank:
+                    return min(self.bucket_value(bucket), self.max_us) / 1000.0
+            return self.max_us / 1000.0
+
+    def snapshot(self):
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_us / self.count / 1000.0, 3),
+            "min_ms": self.min_us / 1000.0,
+            "p50_ms": self.percentile(50),
+            "p90_ms": self.percentile(90),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max_us / 1000.0,
+        }
+
+
+class MetricsRegistry:
+    """
+    Counter / gauge / histogram độ trễ cho các đoạn code nóng (đọc frame, scan, lưu ảnh,
+    thumbnail, PDF, email). Tắt mặc định: khi tắt, now() trả 0 và observe()/time()
+    không làm gì, nên instrument ở mỗi frame gần như không tốn gì.
+
+    Dùng trên đường nóng:
+        t0 = metrics.now()
+        ...
+        metrics.observe("frame_read", t0)
+    """
+    def __init__(self):
+        self.enabled = False
+        self.started = datetime.now()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def _get(self, table, name, factory):
+        item = table.get(name)
+        if item is None:
+            with self._lock:
+                item = table.setdefault(name, factory())
+        return item
+
+    def counter(self, name):
+        return self._get(self._counters, name, Counter)
+
+    def gauge(self, name):
+        return self._get(self._gauges, name, Gauge)
+
+    def histogram(self, name):
+        return self._get(self._histograms, name, LatencyHistogram)
+
+    def now(self):
+        return time.perf_counter() if self.enabled else 0.0
+
+    def observe(self, name, start):
+        """Ghi thời gian từ start (giá trị của now()) đến hiện tại vào histogram name."""
+        if self.enabled and start:
+            self.histogram(name).record(time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        if self.enabled:
+            self.histogram(name).record(seconds)
+
+    def inc(self, name, n=1):
+        if self.enabled:
+            self.counter(name).inc(n)
+
+    def set(self, name, value):
+        if self.enabled:
+            self.gauge(name).set(value)
+
+    def time(self, name):
+        """Context manager đo một đoạn code; nullcontext khi tắt."""
+        if not self.enabled:
+            return nullcontext()
+        return self._timed(name)
+
+    @contextmanager
+    def _timed(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.histogram(name).record(time.perf_counter() - start)
+
+    def snapshot(self):
+        return {
+            "started": self.started.isoformat(timespec="seconds"),
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "counters": {k: v.snapshot() for k, v in sorted(self._counters.items())},
+            "gauges": {k: v.snapshot() for k, v in sorted(self._gauges.items())},
+            "latency": {k: v.snapshot() for k, v in sorted(self._histograms.items())},
+        }
+
+    def dump(self, path):
+        """Ghi snapshot ra file JSON (ghi file tạm rồi thay thế, không để file dở dang)."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(tmp_path, path)
+        return path
+
+    def reset(self):
+        with self._lock:
+            self._counters = {}
+            self._gauges = {}
+            self._histograms = {}
+            self.started = datetime.now()
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,271 @@
+import os
+import time
+import random
+import sqlite3
+import threading
+from datetime import datetime
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from core.metrics import metrics
+from core.event_log import event_log
+
+STATUS_QUEUED = "queued"
+STATUS_SENT = "sent"
+STATUS_FAILED = "failed"
+
+
+class EmailOutbox:
+    """
+    Hàng đợi email lưu trong SQLite, còn nguyên sau khi tắt app hoặc mất mạng.
+
+    Mỗi email có trạng thái queued -> sent / failed, số lần thử và thời điểm
+    được phép thử lại (next_attempt, epoch giây). Dùng chung một connection
+    giữa GUI thread (enqueue) và OutboxWorker nên mọi truy cập đi qua lock.
+    """
+    def __init__(self, db_path="outbox.db"):
+        self.db_path = db_path
+        folder = os.path.dirname(db_path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    recipient TEXT NOT NULL,
+                    subject TEXT NOT NULL,
+                    body TEXT NOT NULL,
+                    attachment_path TEXT,
+                    is_html INTEGER NOT NULL DEFAULT 0,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt REAL NOT NULL,
+                    last_error TEXT,
+                    created TEXT NOT NULL,
+                    sent_at TEXT
+                )""")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, next_attempt)")
+
+    def enqueue(self, recipient, subject, body, attachment_path=None, is_html=False):
+        """Thêm email vào hàng đợi, gửi được ngay. Returns: id của email."""
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "INSERT INTO outbox (recipient, subject, body, attachment_path, is_html, status, next_attempt, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (recipient, subject, body, attachment_path, int(bool(is_html)), STATUS_QUEUED,
+                 time.time(), datetime.now().isoformat(timespec="seconds")))
+            return cur.lastrowid
+
+    def due(self, now=None, limit=20):
+        """Tối đa `limit` email queued đã đến hạn (list dict), theo thứ tự gửi."""
+        now = time.time() if now is None else now
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM outbox WHERE status = ? AND next_attempt <= ? ORDER BY next_attempt, id LIMIT ?",
+                (STATUS_QUEUED, now, limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    def next_wakeup(self):
+        """Thời điểm (epoch) của lần thử kế tiếp, hoặc None nếu hàng đợi rỗng."""
+        with self._lock:
+            row = self._conn.execute("SELECT MIN(next_attempt) FROM outbox WHERE status = ?",
+                                     (STATUS_QUEUED,)).fetchone()
+        return row[0]
+
+    def mark_sent(self, item_id):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE outbox SET status = ?, attempts = attempts + 1, last_error = NULL, sent_at = ? WHERE id = ?",
+                (STATUS_SENT, datetime.now().isoformat(timespec="seconds"), item_id))
+
+    def mark_retry(self, item_id, error, delay):
+        """Gửi lỗi, thử lại sau delay giây."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE outbox SET attempts = attempts + 1, last_error = ?, next_attempt = ? WHERE id = ?",
+                (error, time.time() + delay, item_id))
+
+    def mark_failed(self, item_id, error):
+        """Hết số lần thử, không gửi nữa (có thể retry_failed thủ công)."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE outbox SET status = ?, attempts = attempts + 1, last_error = ? WHERE id = ?",
+                (STATUS_FAILED, error, item_id))
+
+    def retry_failed(self):
+        """Đưa các email failed về hàng đợi. Returns: số email được đưa lại."""
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "UPDATE outbox SET status = ?, attempts = 0, next_attempt = ? WHERE status = ?",
+                (STATUS_QUEUED, time.time(), STATUS_FAILED))
+            return cur.rowcount
+
+    def counts(self):
+        """Returns: dict {"queued": n, "sent": n, "failed": n}."""
+        result = {STATUS_QUEUED: 0, STATUS_SENT: 0, STATUS_FAILED: 0}
+        with self._lock:
+            for status, count in self._conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status"):
+                result[status] = count
+        return result
+
+    def get(self, item_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM outbox WHERE id = ?", (item_id,)).fetchone()
+        return dict(row) if row else None
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class OutboxWorker(QThread):
+    """
+    Thread gửi email nền từ EmailOutbox, không chặn GUI.
+
+    Lỗi gửi (mất mạng, SMTP timeout...) được thử lại với exponential backoff:
+    base_delay * 2^(n-1), tối đa max_delay, cộng jitter ±10% để nhiều máy
+    không cùng thử lại một lúc. Sau max_attempts lần email chuyển sang failed.
+
+    Các email cùng đến hạn được gửi thành lô qua EmailSender.send_many trên một
+    kết nối SMTP. sender_factory là callable trả về EmailSender, gọi lại mỗi lô
+    để cấu hình mới nhất (Settings) luôn được dùng; factory nên trả về cùng một
+    object khi cấu hình không đổi để kết nối được giữ lại giữa các lô. Sender cũ
+    được đóng trong thread này khi factory trả về object khác.
+
+    attachment_policy (tùy chọn, xem core.attachment_policy) quyết định gửi file
+    gốc, bản nén lại, bản zip hay đường dẫn chia sẻ khi file vượt giới hạn.
+    """
+    counts_changed = pyqtSignal(int, int, int) # (queued, sent, failed)
+    message_sent = pyqtSignal(int, str) # (id, recipient)
+    message_failed = pyqtSignal(int, str) # (id, lỗi) khi hết số lần thử
+
+    def __init__(self, outbox, sender_factory, max_attempts=6, base_delay=30.0, max_delay=3600.0,
+                 idle_interval=60.0, batch_size=20, attachment_policy=None, parent=None):
+        super().__init__(parent)
+        self.outbox = outbox
+        self.sender_factory = sender_factory
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.idle_interval = idle_interval
+        self.batch_size = batch_size
+        self.attachment_policy = attachment_policy
+        self._sender = None
+        self._wake_event = threading.Event()
+        self._running = True
+
+    def wake(self):
+        """Gọi sau khi enqueue để gửi ngay, không chờ hết lượt ngủ."""
+        self._wake_event.set()
+
+    def stop(self):
+        self._running = False
+        self._wake_event.set()
+        self.wait()
+
+    def retry_delay(self, attempts):
+        """Thời gian chờ (giây) sau lần thử thất bại thứ `attempts` (1-based)."""
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempts - 1)))
+        return delay * random.uniform(0.9, 1.1)
+
+    def emit_counts(self):
+        counts = self.outbox.counts()
+        metrics.set("outbox_queued", counts[STATUS_QUEUED])
+        self.counts_changed.emit(counts[STATUS_QUEUED], counts[STATUS_SENT], counts[STATUS_FAILED])
+
+    def run(self):
+        self.emit_counts()
+        while self._running:
+            items = self.outbox.due(limit=self.batch_size)
+            if not items:
+                # Rảnh: NOOP giữ kết nối (hoặc đóng nếu rảnh quá lâu)
+                if self._sender is not None and hasattr(self._sender, "keepalive"):
+                    self._sender.keepalive()
+                next_wakeup = self.outbox.next_wakeup()
+                timeout = self.idle_interval
+                if next_wakeup is not None:
+                    timeout = max(0.0, min(timeout, next_wakeup - time.time()))
+                self._wake_event.wait(timeout)
+                self._wake_event.clear()
+                continue
+
+            self.send_items(items)
+            self.emit_counts()
+        self._close_sender()
+
+    def _current_sender(self):
+        sender = self.sender_factory()
+        if sender is not self._sender:
+            self._close_sender()
+            self._sender = sender
+        return sender
+
+    def _close_sender(self):
+        if self._sender is not None and hasattr(self._sender, "close"):
+            self._sender.close()
+        self._sender = None
+
+    def send_items(self, items):
+        """Gửi một lô email trên cùng kết nối rồi cập nhật trạng thái từng email."""
+        messages = [self.prepare_message(item) for item in items]
+        sender = None
+        try:
+            sender = self._current_sender()
+            results = sender.send_many(messages)
+        except Exception as e:
+            results = [(False, str(e), 0.0)] * len(items)
+
+        for item, (success, msg, latency) in zip(items, results):
+            if success:
+                metrics.record("email_send", latency)
+                event_log.log("email_sent", item_id=item["id"], recipient=item["recipient"],
+                              duration_ms=round(latency * 1000, 1))
+            else:
+                event_log.log("email_failed", item_id=item["id"], recipient=item["recipient"],
+                              attempt=item["attempts"] + 1, error=msg)
+            metrics.inc("emails_sent" if success else "email_errors")
+            self.handle_result(item, success, msg)
+        if len(items) > 1:
+            stats = getattr(sender, "last_batch_stats", {})
+            print(f"Email batch: {stats.get('sent', 0)}/{len(items)} sent, {stats.get('connects', 0)} connects, "
+                  f"p50 {stats.get('latency_p50', 0) * 1000:.0f} ms, max {stats.get('latency_max', 0) * 1000:.0f} ms")
+
+    def prepare_message(self, item):
+        message = {
+            "recipient_email": item["recipient"],
+            "subject": item["subject"],
+            "body": item["body"],
+            "attachment_path": item["attachment_path"],
+            "is_html": bool(item["is_html"]),
+        }
+        path = item["attachment_path"]
+        if self.attachment_policy is None or not path or not os.path.exists(path):
+            return message
+        try:
+            plan = self.attachment_policy.prepare(path)
+        except Exception as e:
+            print(f"Error preparing attachment {path}: {e}")
+            return message
+        if plan.method != "original":
+            print(f"Email {item['id']} attachment {plan.summary()}")
+        message["attachment_path"] = plan.attachment_path
+        message["body"] = plan.apply_to_body(message["body"], message["is_html"])
+        return message
+
+    def handle_result(self, item, success, msg):
+        if success:
+            self.outbox.mark_sent(item["id"])
+            self.message_sent.emit(item["id"], item["recipient"])
+            return
+
+        attempts = item["attempts"] + 1
+        if attempts >= self.max_attempts:
+            self.outbox.mark_failed(item["id"], msg)
+            self.message_failed.emit(item["id"], msg)
+        else:
+            delay = self.retry_delay(attempts)
+            print(f"Email {item['id']} failed (attempt {attempts}/{self.max_attempts}), retry in {delay:.0f}s: {msg}")
+            self.outbox.mark_retry(item["id"], msg, delay)
@@ -0,0 +1,237 @@
+import hashlib
+from io import BytesIO
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.units import inch
+from reportlab.lib.utils import ImageReader
+
+PAGE_SIZE = landscape(A4)
+PAGE_MARGIN = 0.2 * inch
+FRAME_PADDING = 6 # Padding mặc định của Frame trong SimpleDocTemplate
+
+# Các khoảng cách khớp với flowables của engine "table"
+TITLE_ROW_HEIGHT = 28 # Paragraph 20pt (leading 22) + padding 3/3
+TITLE_COL_WIDTHS = (8 * inch, 3.2 * inch)
+TITLE_SPACER = 0.1 * inch
+INFO_LEADING = 14
+INFO_FONT_SIZE = 11
+TABLE_SPACER = 0.15 * inch
+FOOTER_SPACER = 0.1 * inch
+FOOTER_LEADING = 12
+FOOTER_FONT_SIZE = 10
+CELL_FONT_SIZE = 8
+CELL_LEADING = 12
+CELL_PADDING = 6 # left/right; top/bottom = 3 đối xứng nên chỉ cần căn giữa
+NBSP = "\xa0"
+DATE_FORMAT = "%d , %m , %Y"
+
+
+def date_text(date_str):
+    """Ô ngày ở đầu trang, dùng chung cho cả hai engine và trang tổng hợp."""
+    return f"Date : {date_str}"
+
+
+def info_lines(pid, inspector_name, points_text):
+    """Ba dòng thông tin dưới tiêu đề (NBSP giữ khoảng trắng khi Paragraph gộp dấu cách)."""
+    return [
+        f"1.{NBSP * 3}Socket Infor : {NBSP * 10}{pid}",
+        f"2.{NBSP * 3}Inspector(IQC) : {NBSP * 6}{inspector_name}",
+        f"3.{NBSP * 3}Inspection Points : {NBSP * 3}{points_text}",
+    ]
+
+
+def draw_shared_image(c, key, data, x, y, width, height):
+    """
+    Vẽ ảnh tĩnh (VD: ảnh NG mẫu) dưới dạng Form XObject dùng chung cho cả file PDF.
+
+    Lần đầu gặp (key, kích thước) ảnh được decode và nhúng một lần vào form;
+    các trang sau chỉ tham chiếu form (`/Form Do`), không decode PNG + tính digest lại
+    như canvas.drawImage, và file không phình theo số trang.
+
+    Args:
+        key: định danh ổn định của ảnh (VD: tên file).
+        data: bytes của ảnh, chỉ dùng khi form chưa tồn tại.
+    """
+    digest = hashlib.md5(f"{key}|{width:.3f}x{height:.3f}".encode("utf-8")).hexdigest()
+    name = "SharedImg" + digest[:16]
+    if not c.hasForm(name):
+        c.beginForm(name, 0, 0, width, height)
+        c.drawImage(ImageReader(BytesIO(data)), 0, 0, width, height, mask='auto')
+        c.endForm()
+    c.saveState()
+    c.translate(x, y)
+    c.doForm(name)
+    c.restoreState()
+
+
+class CanvasReportRenderer:
+    """
+    Vẽ trang báo cáo trực tiếp lên reportlab canvas tại các tọa độ tính sẵn,
+    không qua platypus Table (không wrap/split, không xử lý 40+ lệnh SPAN mỗi trang).
+
+    Tọa độ được tính một lần từ TableLayout của template, khớp với vị trí mà
+    engine "table" (SimpleDocTemplate) đặt các flowables.
+    """
+    def __init__(self, template, font_name):
+        self.template = template
+        self.font_name = font_name
+        self.layout = template.layout(font_name)
+        self._compile()
+
+    def _compile(self):
+        layout = self.layout
+        page_w, page_h = PAGE_SIZE
+        frame_x = PAGE_MARGIN + FRAME_PADDING
+        frame_w = page_w - 2 * (PAGE_MARGIN + FRAME_PADDING)
+        top = page_h - PAGE_MARGIN - FRAME_PADDING
+
+        # --- TITLE --- (Table căn giữa trong frame)
+        title_w = sum(TITLE_COL_WIDTHS)
+        title_x = frame_x + (frame_w - title_w) / 2.0
+        title_bottom = top - TITLE_ROW_HEIGHT
+        self.title_pos = (title_x + CELL_PADDING, title_bottom + 5)
+        self.date_pos = (title_x + title_w - CELL_PADDING, title_bottom + 8)
+
+        # --- INFO --- (3 dòng, baseline = đỉnh dòng - font size)
+        y = title_bottom - TITLE_SPACER
+        self.info_pos = []
+        for _ in range(3):
+            y -= INFO_LEADING
+            self.info_pos.append((frame_x, y + INFO_LEADING - INFO_FONT_SIZE))
+
+        # --- MAIN TABLE ---
+        table_top = y - TABLE_SPACER
+        table_w = sum(layout.col_widths)
+        table_x = frame_x + (frame_w - table_w) / 2.0
+
+        col_x = [table_x]
+        for w in layout.col_widths:
+            col_x.append(col_x[-1] + w)
+        row_y = [table_top] # row_y[r] = cạnh trên của hàng r
+        for h in layout.row_heights:
+            row_y.append(row_y[-1] - h)
+        self.table_bottom = row_y[-1]
+
+        # Hình chữ nhật của mỗi ô đã gộp: (x, y, w, h)
+        self.region_rects = {}
+        for (r0, c0, r1, c1) in layout.regions:
+            self.region_rects[(r0, c0)] = (col_x[c0], row_y[r1 + 1],
+                                           col_x[c1 + 1] - col_x[c0], row_y[r0] - row_y[r1 + 1])
+
+        self.header_bg = (table_x, row_y[1], table_w, row_y[0] - row_y[1])
+
+        # Nội dung text cố định của bảng (header, dept, item, criteria, result)
+        texts = {
+            (0, 0): "Dept.", (0, 3): "Item", (0, 4): "Criteria", (0, 5): "NG Example",
+            (0, 6): f"Inspection Point ({self.template.max_points} Point)",
+            (0, layout.num_cols - 2): "Result", (0, layout.num_cols - 1): "Note",
+        }
+        for col, text in enumerate(self.template.dept[:3]):
+            texts[(1, col)] = text
+        self.ng_rects = []
+        for category in self.template.categories:
+            start_row, _ = layout.category_rows[category.index]
+            texts[(start_row, 3)] = category.item
+            texts[(start_row, 4)] = category.criteria
+            texts[(start_row, layout.num_cols - 2)] = "PASS"
+            if category.ng_image:
+                cell_rect = self.region_rects[(start_row, 5)]
+                self.ng_rects.append((category.ng_image, cell_rect,
+                                      self._centered(cell_rect, layout.ng_image_size)))
+
+        # Mỗi dòng text: (x căn giữa, baseline y, chuỗi)
+        self.text_lines = []
+        for cell, text in texts.items():
+            if not text or cell not in self.region_rects:
+                continue
+            x, y, w, h = self.region_rects[cell]
+            lines = text.split("\n")
+            baseline = y + (h + len(lines) * CELL_LEADING) / 2.0 - CELL_FONT_SIZE
+            for line in lines:
+                self.text_lines.append((x + w / 2.0, baseline, line))
+                baseline -= CELL_LEADING
+
+        # Vị trí ảnh chụp: (cat_idx, point_idx) -> (x, y, w, h)
+        self.point_rects = {}
+        for key, (r, c) in layout.point_cells.items():
+            self.point_rects[key] = self._centered(self.region_rects[(r, c)], layout.image_size)
+
+        # --- FOOTER ---
+        y = self.table_bottom - FOOTER_SPACER
+        self.footer_pos = []
+        for _ in range(2):
+            y -= FOOTER_LEADING
+            self.footer_pos.append((frame_x, y + FOOTER_LEADING - FOOTER_FONT_SIZE))
+
+    @staticmethod
+    def _centered(rect, size):
+        x, y, w, h = rect
+        iw, ih = size
+        return (x + (w - iw) / 2.0, y + (h - ih) / 2.0, iw, ih)
+
+    def draw_page(self, c, pid, inspector_name, date_str, captured, static_image_data, on_image_drawn=None):
+        """
+        Vẽ một trang báo cáo lên canvas (không gọi showPage).
+
+        Args:
+            captured: dict (cat_idx, point_idx) -> nguồn ảnh (path hoặc file-like).
+            static_image_data: callable(filename) -> bytes của ảnh NG, hoặc None.
+            on_image_drawn: callable() gọi sau mỗi ảnh chụp được vẽ.
+        """
+        font = self.font_name
+
+        # --- TITLE ---
+        c.setFillColor(colors.black)
+        c.setFont(font, 20)
+        c.drawString(*self.title_pos, self.template.title)
+        c.setFont(font, 12)
+        c.drawRightString(*self.date_pos, date_text(date_str))
+
+        # --- INFO ---
+        c.setFont(font, INFO_FONT_SIZE)
+        info = info_lines(pid, inspector_name, self.template.inspection_points_text)
+        for (x, y), text in zip(self.info_pos, info):
+            c.drawString(x, y, text)
+
+        # --- MAIN TABLE ---
+        c.setFillColor(colors.lightgrey)
+        c.rect(*self.header_bg, stroke=0, fill=1)
+
+        c.setFillColor(colors.black)
+        c.setFont(font, CELL_FONT_SIZE)
+        for x, y, text in self.text_lines:
+            c.drawCentredString(x, y, text)
+
+        for filename, cell_rect, rect in self.ng_rects:
+            data = static_image_data(filename)
+            if data is None:
+                x, y, w, h = cell_rect
+                c.drawCentredString(x + w / 2.0, y + (h + CELL_LEADING) / 2.0 - CELL_FONT_SIZE, "Image not found")
+                continue
+            draw_shared_image(c, filename, data, *rect)
+
+        for key, rect in self.point_rects.items():
+            source = captured.get(key)
+            if source is None:
+                continue
+            if not isinstance(source, str):
+                source = ImageReader(source)
+            c.drawImage(source, *rect)
+            if on_image_drawn:
+                on_image_drawn()
+
+        # Grid vẽ sau cùng, đè lên ảnh giống platypus Table
+        c.setStrokeColor(colors.grey)
+        c.setLineWidth(1)
+        for x, y, w, h in self.region_rects.values():
+            c.rect(x, y, w, h, stroke=1, fill=0)
+
+        # --- FOOTER ---
+        c.setFillColor(colors.black)
+        c.setFont(font, FOOTER_FONT_SIZE)
+        footer = [
+            "Inspect periodically (IQC Inspector)",
+            "Report any problems during inspection immediately (Managers / Supervisors)",
+        ]
+        for (x, y), text in zip(self.footer_pos, footer):
+            c.drawString(x, y, text)
@@ -1,26 +1,144 @@
 import os
+import time
+from collections import OrderedDict
+from io import BytesIO
 from reportlab.lib.pagesizes import A4, landscape
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Image, Paragraph, Spacer
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Image, Paragraph, Spacer, Frame, Flowable
+from reportlab.platypus.doctemplate import LayoutError
+from reportlab.pdfgen import canvas as pdf_canvas
 from datetime import datetime
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
+from reportlab import rl_config
+
+from core.inspection_template import load_template_or_default, resource_path
+from core.pdf_canvas import draw_shared_image, date_text, info_lines, DATE_FORMAT
+from core.metrics import metrics
+
+
+# Không dùng ASCII85 cho stream ảnh/nội dung: bản pure-Python (khi thiếu rl_accel)
+# chiếm phần lớn thời gian nhúng JPEG, và file binary nhỏ hơn ~20%.
+rl_config.useA85 = 0
+
+
+class ExportCancelled(Exception):
+    """Raised khi người dùng hủy việc xuất PDF giữa chừng."""
+
+
+class _TrackedImage(Image):
+    """
+    Image flowable báo tiến độ khi được vẽ lên trang.
+    ReportLab chỉ decode ảnh lúc build, nên đây là thời điểm chính xác để đếm.
+    """
+    def __init__(self, filename, on_draw=None, **kwargs):
+        super().__init__(filename, **kwargs)
+        self._on_draw = on_draw
+
+    def draw(self):
+        super().draw()
+        if self._on_draw:
+            self._on_draw()
+
+
+class _SharedImage(Flowable):
+    """
+    Ảnh tĩnh trong ô Table, vẽ qua Form XObject dùng chung (xem draw_shared_image)
+    nên ảnh NG mẫu chỉ được nhúng một lần dù báo cáo có nhiều trang.
+    """
+    def __init__(self, key, data, width, height):
+        super().__init__()
+        self.key = key
+        self.data = data
+        self.drawWidth = width
+        self.drawHeight = height
+
+    def wrap(self, availWidth, availHeight):
+        return self.drawWidth, self.drawHeight
+
+    def draw(self):
+        draw_shared_image(self.canv, self.key, self.data, 0, 0, self.drawWidth, self.drawHeight)
+
+
+class ImageCache:
+    """
+    Cache LRU cho ảnh đã thu nhỏ (JPEG bytes), dùng chung giữa các trang PDF.
+    Key gồm đường dẫn + mtime nên ảnh chụp lại sẽ tự động được encode lại.
+    """
+    def __init__(self, max_px=320, quality=85, max_entries=256):
+        self.max_px = max_px
+        self.quality = quality
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path):
+        """Trả về JPEG bytes đã thu nhỏ của ảnh, hoặc None nếu không đọc được."""
+        try:
+            key = (path, os.path.getmtime(path))
+        except OSError:
+            return None
+
+        data = self._entries.get(key)
+        if data is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+        self.misses += 1
+        data = self._downscale(path)
+        if data is not None:
+            self._entries[key] = data
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return data
+
+    def _downscale(self, path):
+        from PIL import Image as PILImage
+        try:
+            with PILImage.open(path) as im:
+                # draft() cho libjpeg decode thẳng ở 1/2, 1/4, 1/8 kích thước (DCT scaling),
+                # nhanh hơn nhiều so với decode full-size rồi resize
+                im.draft("RGB", (self.max_px, self.max_px))
+                im = im.convert("RGB")
+                im.thumbnail((self.max_px, self.max_px))
+                buffer = BytesIO()
+                im.save(buffer, "JPEG", quality=self.quality)
+                return buffer.getvalue()
+        except Exception as e:
+            print(f"Error downscaling image {path}: {e}")
+            return None
+
+    def clear(self):
+        self._entries.clear()
+
 
 class PDFGenerator:
     """
     Class tạo báo cáo PDF từ các ảnh đã chụp.
     """
-    def __init__(self):
+    def __init__(self, template=None, engine="table", pdfa=False):
         # Base path for static resources
         self.base_path = os.getcwd() # Assumption: running from app root
-        self.pdf_image_path = os.path.join(self.base_path, "pdf image")
+        self.pdf_image_path = os.path.abspath(resource_path("pdf image"))
+        # Layout báo cáo (categories, số điểm, ảnh NG) lấy từ inspection template
+        self.template = template or load_template_or_default()[0]
+        # "table": platypus Table (mặc định) | "canvas": vẽ trực tiếp, xem core.pdf_canvas
+        self.engine = engine
+        # PDF/A-2b cho lưu trữ lâu dài: XMP, OutputIntent sRGB và font nhúng, xem core.pdfa
+        self.pdfa = pdfa
+        self._canvas_renderer = None
+        self._font_name = None
+        # Static assets (NG Example) chỉ đọc một lần cho mọi trang
+        self._static_cache = {}
+        self.last_stats = {}
 
-    def generate_report(self, pid, session_path, model_name="N/A", inspector_name="N/A"):
-        """
-        Tạo file PDF báo cáo Socket Inspection Report.
-        Format: 2 hàng x 4 cột ảnh cho mỗi mục. Full A4 page height.
-        """
+    def _register_font(self):
         # Register Font
+        if self._font_name:
+            return self._font_name
+
         from reportlab.pdfbase import pdfmetrics
         from reportlab.pdfbase.ttfonts import TTFont
 
@@ -32,214 +150,404 @@ class PDFGenerator:
                 font_name = 'Arial'
         except Exception:
             pass
+        if font_name == 'Helvetica' and self.pdfa:
+            # PDF/A không cho phép font chuẩn không nhúng -> dùng Vera (TTF đi kèm reportlab)
+            from core.pdfa import FALLBACK_FONT_NAME, fallback_font_path
+            pdfmetrics.registerFont(TTFont(FALLBACK_FONT_NAME, fallback_font_path()))
+            font_name = FALLBACK_FONT_NAME
+        self._font_name = font_name
+        return font_name
+
+    def generate_report(self, pid, session_path, model_name="N/A", inspector_name="N/A",
+                        progress_callback=None, cancel_check=None, pdf_path=None, image_cache=None):
+        """
+        Tạo file PDF báo cáo Socket Inspection Report.
+        Format theo inspection template (mặc định 2 hàng x 4 cột ảnh cho mỗi mục). Full A4 page height.
+
+        Args:
+            progress_callback: callable(done, total) gọi sau mỗi ảnh chụp được nhúng.
+            cancel_check: callable() -> bool, trả về True để hủy. Khi hủy sẽ raise
+                ExportCancelled và xóa file PDF dở dang.
+            pdf_path: Đường dẫn đầu ra (mặc định {session_path}/{pid}_Report.pdf).
+            image_cache: ImageCache để nhúng ảnh đã thu nhỏ thay vì ảnh gốc
+                (VD: bản nhẹ để gửi email, xem core.attachment_policy).
+        """
+        if pdf_path is None:
+            pdf_path = os.path.join(session_path, f"{pid}_Report.pdf")
+        build_start = metrics.now()
+
+        # Progress: đếm số ảnh chụp đã được nhúng vào PDF
+        progress = {"done": 0, "total": 0}
+
+        def on_image_drawn():
+            if cancel_check and cancel_check():
+                raise ExportCancelled()
+            progress["done"] += 1
+            if progress_callback:
+                progress_callback(progress["done"], progress["total"])
+
+        captured = self._collect_captured_images(session_path, image_cache)
+        progress["total"] = len(captured)
+
+        if cancel_check and cancel_check():
+            raise ExportCancelled()
+        if progress_callback:
+            progress_callback(0, progress["total"])
+
+        try:
+            title = f"{self.template.title} - {pid}"
+            if self.engine == "canvas":
+                c = self._new_canvas(pdf_path, title, inspector_name)
+                self._draw_canvas_page(c, pid, inspector_name, captured, on_image_drawn)
+                c.save()
+            else:
+                # A4 Landscape: 297mm x 210mm (~11.7 x 8.3 inch)
+                # Margins: 0.2 inch
+                doc = SimpleDocTemplate(pdf_path, pagesize=landscape(A4),
+                                        rightMargin=0.2*inch, leftMargin=0.2*inch,
+                                        topMargin=0.2*inch, bottomMargin=0.2*inch,
+                                        initialFontName=self._register_font() if self.pdfa else None)
+                elements = self._build_report_elements(pid, model_name, inspector_name, captured,
+                                                       on_image_drawn=on_image_drawn)
+                if self.pdfa:
+                    from core.pdfa import apply_pdfa
+                    doc.build(elements, onFirstPage=lambda c, d: apply_pdfa(c, title, inspector_name))
+                else:
+                    doc.build(elements)
+            print(f"PDF generated: {pdf_path}")
+            metrics.observe("pdf_build", build_start)
+            if metrics.enabled:
+                metrics.set("pdf_last_bytes", os.path.getsize(pdf_path))
+            return pdf_path
+        except ExportCancelled:
+            print(f"PDF export cancelled: {pdf_path}")
+            self._remove_partial(pdf_path)
+            raise
+        except Exception as e:
+            print(f"Error generating PDF: {e}")
+            metrics.inc("pdf_errors")
+            import traceback
+            traceback.print_exc()
+            return None
+
+    def generate_combined_report(self, sessions, pdf_path, progress_callback=None, cancel_check=None,
+                                 image_cache=None):
+        """
+        Tạo một file PDF cho nhiều socket (VD: cả ca làm việc).
+        Trang đầu là bảng tổng hợp, sau đó mỗi socket một trang.
+
+        Các trang được vẽ lần lượt lên canvas rồi showPage() ngay, nên flowables
+        của trang trước được giải phóng; ảnh chụp được thu nhỏ qua ImageCache
+        nên dung lượng giữ trong bộ nhớ chỉ tăng theo ảnh thumbnail.
+
+        Args:
+            sessions: list dict có các key "pid", "session_path", và tùy chọn
+                "model", "inspector", "started" (xem StorageManager.list_sessions).
+            pdf_path: Đường dẫn file PDF đầu ra.
+            progress_callback: callable(done, total) gọi sau mỗi trang.
+            cancel_check: callable() -> bool, trả về True để hủy.
+            image_cache: ImageCache dùng chung (tạo mới nếu None).
+        Returns:
+            str: Đường dẫn PDF, hoặc None nếu lỗi. Thống kê nằm ở self.last_stats.
+        """
+        if image_cache is None:
+            image_cache = ImageCache()
+
+        page_size = landscape(A4)
+        margin = 0.2 * inch
+        total_pages = len(sessions) + 1 # Cho progress; bảng tổng hợp dài có thể cần thêm trang
+        pages = 0
+        start = time.perf_counter()
+
+        def new_frame():
+            return Frame(margin, margin, page_size[0] - 2 * margin, page_size[1] - 2 * margin,
+                         leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0)
+
+        def check_cancel():
+            if cancel_check and cancel_check():
+                raise ExportCancelled()
+
+        try:
+            c = self._new_canvas(pdf_path, "Socket Inspection Summary")
+
+            if progress_callback:
+                progress_callback(0, total_pages)
+
+            # --- SUMMARY PAGE ---
+            pages += self._draw_pages(c, self._build_summary_elements(sessions), new_frame)
+            c.showPage()
+            if progress_callback:
+                progress_callback(1, total_pages)
+
+            # --- ONE PAGE PER SOCKET ---
+            for page_idx, session in enumerate(sessions, start=2):
+                check_cancel()
+                captured = self._collect_captured_images(session["session_path"], image_cache)
+                if self.engine == "canvas":
+                    self._draw_canvas_page(c, session["pid"], session.get("inspector") or "N/A", captured)
+                    pages += 1
+                else:
+                    elements = self._build_report_elements(
+                        session["pid"], session.get("model") or "N/A", session.get("inspector") or "N/A",
+                        captured)
+                    pages += self._draw_pages(c, elements, new_frame)
+                c.showPage()
+                if progress_callback:
+                    progress_callback(page_idx, total_pages)
+
+            check_cancel()
+            c.save()
+        except ExportCancelled:
+            print(f"PDF export cancelled: {pdf_path}")
+            self._remove_partial(pdf_path)
+            raise
+        except Exception as e:
+            print(f"Error generating combined PDF: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
+
+        elapsed = time.perf_counter() - start
+        self.last_stats = {
+            "pages": pages,
+            "seconds": elapsed,
+            "pages_per_second": pages / elapsed if elapsed > 0 else 0.0,
+            "image_cache_hits": image_cache.hits,
+            "image_cache_misses": image_cache.misses,
+        }
+        print(f"Combined PDF generated: {pdf_path} "
+              f"({pages} pages, {self.last_stats['pages_per_second']:.1f} pages/s)")
+        return pdf_path
+
+    @staticmethod
+    def _draw_pages(c, elements, new_frame):
+        """
+        Vẽ elements lên canvas, sang trang mới khi hết chỗ: Frame.addFromList dừng ở flowable
+        không vừa (để lại trong list, không báo lỗi). Flowable không vừa phần còn lại của trang
+        được chia (VD: Table theo hàng, lặp lại hàng tiêu đề). Trang cuối chưa showPage().
+        Returns: số trang đã vẽ.
+        Raises: LayoutError nếu một flowable không chia được và lớn hơn cả trang.
+        """
+        elements = list(elements)
+        frame = new_frame()
+        pages, placed = 1, False
+        while True:
+            count = len(elements)
+            frame.addFromList(elements, c)
+            placed = placed or len(elements) < count
+            if not elements:
+                return pages
+            pieces = frame.split(elements[0], c)
+            if len(pieces) > 1 and frame.add(pieces[0], c):
+                elements[0:1] = pieces[1:]
+                placed = True
+                continue
+            if not placed:
+                raise LayoutError(f"{type(elements[0]).__name__} is too large for a PDF page")
+            c.showPage()
+            frame = new_frame()
+            pages, placed = pages + 1, False
+
+    def _new_canvas(self, pdf_path, title, author="N/A"):
+        """Canvas A4 ngang; với pdfa=True gắn sẵn metadata PDF/A và font nhúng."""
+        if not self.pdfa:
+            c = pdf_canvas.Canvas(pdf_path, pagesize=landscape(A4))
+            c.setTitle(title)
+            return c
+        from core.pdfa import apply_pdfa
+        # initialFontName: tránh preamble trang tham chiếu Helvetica không nhúng
+        c = pdf_canvas.Canvas(pdf_path, pagesize=landscape(A4), initialFontName=self._register_font())
+        apply_pdfa(c, title, author)
+        return c
+
+    def _build_summary_elements(self, sessions):
+        """Bảng tổng hợp: mỗi socket một dòng."""
+        font_name = self._register_font()
+        styles = getSampleStyleSheet()
+        title_style = ParagraphStyle('Title', parent=styles['Heading1'], fontName=font_name, fontSize=20, spaceAfter=5)
+
+        date_str = datetime.now().strftime(DATE_FORMAT)
+        elements = [
+            Paragraph("Socket Inspection Summary", title_style),
+            Paragraph(f"{date_text(date_str)}&nbsp;&nbsp;&nbsp;&nbsp;Sockets : {len(sessions)}",
+                      ParagraphStyle('Info', parent=styles['Normal'], fontName=font_name, fontSize=11, leading=14)),
+            Spacer(1, 0.15*inch),
+        ]
+
+        data = [["No.", "Socket Infor", "Model", "Inspector(IQC)", "Started", "Images", "Result"]]
+        for i, session in enumerate(sessions, start=1):
+            data.append([
+                str(i), session["pid"],
+                session.get("model") or "N/A", session.get("inspector") or "N/A",
+                session.get("started") or "",
+                str(session.get("image_count", "")),
+                "PASS",
+            ])
+
+        t = Table(data, colWidths=[0.5*inch, 3.0*inch, 2.2*inch, 2.0*inch, 1.6*inch, 0.8*inch, 0.8*inch],
+                  repeatRows=1)
+        t.setStyle(TableStyle([
+            ('GRID', (0,0), (-1,-1), 1, colors.grey),
+            ('FONTNAME', (0,0), (-1,-1), font_name),
+            ('FONTSIZE', (0,0), (-1,-1), 9),
+            ('ALIGN', (0,0), (-1,-1), 'CENTER'),
+            ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+            ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
+        ]))
+        elements.append(t)
+        return elements
+
+    def _collect_captured_images(self, session_path, image_cache=None):
+        """
+        Tìm ảnh chụp của phiên theo tên file của template.
+        Returns:
+            dict (cat_idx, point_idx) -> nguồn ảnh (path, hoặc BytesIO đã thu nhỏ nếu có image_cache)
+        """
+        session_files = set(os.listdir(session_path)) if os.path.exists(session_path) else set()
+
+        def find_captured_file(category, point_idx):
+            target = f"{category.file_prefix}_{point_idx}.jpg"
+            if target in session_files:
+                return os.path.join(session_path, target)
+            for f in session_files:
+                if f.endswith(target):
+                    return os.path.join(session_path, f)
+            return None
+
+        captured = {}
+        for cat_idx, point_idx in self.template.slots:
+            found_file = find_captured_file(self.template.categories[cat_idx], point_idx)
+            if not found_file:
+                continue
+            if image_cache is not None:
+                data = image_cache.get(found_file)
+                if data is None:
+                    continue
+                captured[(cat_idx, point_idx)] = BytesIO(data)
+            else:
+                captured[(cat_idx, point_idx)] = found_file
+        return captured
+
+    def _static_image_data(self, filename):
+        """Bytes của ảnh NG mẫu, đọc một lần cho mọi trang."""
+        path = os.path.join(self.pdf_image_path, filename)
+        if path not in self._static_cache:
+            data = None
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    data = f.read()
+            self._static_cache[path] = data
+        return self._static_cache[path]
+
+    def _draw_canvas_page(self, c, pid, inspector_name, captured, on_image_drawn=None):
+        """Engine "canvas": vẽ trang trực tiếp tại tọa độ tính sẵn."""
+        if self._canvas_renderer is None:
+            from core.pdf_canvas import CanvasReportRenderer
+            self._canvas_renderer = CanvasReportRenderer(self.template, self._register_font())
+        date_str = datetime.now().strftime(DATE_FORMAT)
+        self._canvas_renderer.draw_page(c, pid, inspector_name, date_str, captured,
+                                        self._static_image_data, on_image_drawn)
+
+    def _build_report_elements(self, pid, model_name="N/A", inspector_name="N/A", captured=None,
+                               on_image_drawn=None):
+        """
+        Engine "table": dựng danh sách flowables cho một trang báo cáo theo InspectionTemplate.
+        Args:
+            captured: dict (cat_idx, point_idx) -> nguồn ảnh, xem _collect_captured_images.
+        """
+        font_name = self._register_font()
+        template = self.template
+        layout = template.layout(font_name)
 
-        pdf_filename = f"{pid}_Report.pdf"
-        pdf_path = os.path.join(session_path, pdf_filename)
-        
-        # A4 Landscape: 297mm x 210mm (~11.7 x 8.3 inch)
-        # Margins: 0.2 inch
-        doc = SimpleDocTemplate(pdf_path, pagesize=landscape(A4),
-                                rightMargin=0.2*inch, leftMargin=0.2*inch,
-                                topMargin=0.2*inch, bottomMargin=0.2*inch)
-        
         elements = []
         styles = getSampleStyleSheet()
-        
+
         title_style = ParagraphStyle('Title', parent=styles['Heading1'], fontName=font_name, fontSize=20, spaceAfter=5)
         info_style = ParagraphStyle('Info', parent=styles['Normal'], fontName=font_name, fontSize=11, leading=14)
-        
+
         # --- TITLE ---
-        date_str = datetime.now().strftime("%d , %m , %Y")
-        
+        date_str = datetime.now().strftime(DATE_FORMAT)
+
         header_table_data = [
-            [Paragraph("Socket Inspection Report", title_style), 
-             Paragraph(f"Date :  {date_str}", ParagraphStyle('Date', parent=styles['Normal'], fontName=font_name, fontSize=12, alignment=2))]
+            [Paragraph(template.title, title_style),
+             Paragraph(date_text(date_str), ParagraphStyle('Date', parent=styles['Normal'], fontName=font_name, fontSize=12, alignment=2))]
         ]
         t_title = Table(header_table_data, colWidths=[8*inch, 3.2*inch])
-        t_title.setStyle(TableStyle([('VALIGN', (0,0), (-1,-1), 'MIDDLE')]))
+        # FONTNAME: font mặc định của ô là Helvetica (không nhúng, không hợp lệ với PDF/A)
+        t_title.setStyle(TableStyle([('VALIGN', (0,0), (-1,-1), 'MIDDLE'), ('FONTNAME', (0,0), (-1,-1), font_name)]))
         elements.append(t_title)
         elements.append(Spacer(1, 0.1*inch))
-        
+
         # --- INFO ---
-        elements.append(Paragraph(f"1.&nbsp;&nbsp;&nbsp;Socket Infor : &nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;{pid}", info_style))
-        elements.append(Paragraph(f"2.&nbsp;&nbsp;&nbsp;Inspector(IQC) : &nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;{inspector_name}", info_style))
-        # Shorten text to fit line if needed or keep full
-        inspection_points_text = "Linh kiện của adapter, Bụi bẩn, Các chân tiếp xúc của socket, Các điểm tiếp nối"
-        elements.append(Paragraph(f"3.&nbsp;&nbsp;&nbsp;Inspection Points : &nbsp;&nbsp;&nbsp;{inspection_points_text}", info_style))
-        
+        for line in info_lines(pid, inspector_name, template.inspection_points_text):
+            elements.append(Paragraph(line, info_style))
+
         elements.append(Spacer(1, 0.15*inch))
 
         # --- MAIN TABLE ---
         # Structure:
-        # Dept(3) | Item | Criteria | NGEx | P1 | P2 | P3 | P4 | Result | Note
-        # 12 Columns Total
-        
-        def get_captured_image(cat_idx, point_idx):
-            cat_names = [
-                "1_Linh_kiện_của_adapter", "2_Bụi_bẩn",
-                "3_Các_chân_tiếp_xúc_của_socket", "4_Các_điểm_tiếp_nối"
-            ]
-            if cat_idx < 0 or cat_idx >= len(cat_names): return ""
-            target_suffix = f"{cat_names[cat_idx]}_{point_idx}.jpg"
-            
-            # Find file
-            found_file = None
-            if os.path.exists(session_path):
-                for f in os.listdir(session_path):
-                    if f.endswith(target_suffix):
-                        found_file = os.path.join(session_path, f)
-                        break
-            
-            if found_file:
-                # Resize logic: 
-                # Cell size is roughly 1.3 inch width, 0.65 inch height (reduced to fit page)
-                img = Image(found_file)
-                img.drawHeight = 0.58 * inch 
-                img.drawWidth = 1.0 * inch # Slightly narrower to be safe
+        # Dept(3) | Item | Criteria | NGEx | P1 ... Pn | Result | Note
+        # Số cột điểm chụp, số hàng và các SPAN đã được tính sẵn trong layout.
+
+        captured = captured or {}
+
+        def get_captured_image(category, point_idx):
+            source = captured.get((category.index, point_idx))
+            if source is not None:
+                img = _TrackedImage(source, on_draw=on_image_drawn)
+                img.drawWidth, img.drawHeight = layout.image_size
                 return img
             return ""
 
         def get_static_image(filename):
-            path = os.path.join(self.pdf_image_path, filename)
-            if os.path.exists(path):
-                img = Image(path)
-                img.drawHeight = 1.15 * inch # Fit within 2 rows of 0.65 (1.3 total)
-                img.drawWidth = 1.1 * inch 
-                return img
+            data = self._static_image_data(filename)
+            if data is not None:
+                return _SharedImage(filename, data, *layout.ng_image_size)
             return "Image not found"
 
+        # Khởi tạo lưới rỗng rồi điền các ô theo vị trí tính sẵn
+        data = [["" for _ in range(layout.num_cols)] for _ in range(layout.num_rows)]
+
         # Headers
-        # Span Pts 1-4 (cols 6-9)
-        header_row = [
-            "Dept.", "", "", 
-            "Item", "Criteria", "NG Example", 
-            "Inspection Point (8 Point)", "", "", "", 
-            "Result", "Note"
-        ]
-        
-        # We have 4 Categories (Items). Each Item has 2 Rows.
-        # Total Data Rows: 8 rows.
-        # Plus Header: 1 row.
-        # Total Table Rows: 9 rows.
-        
-        # Dept text only on first row, will span down 8 rows.
-        
-        data = [header_row]
-        
-        categories_info = [
-            ("Linh kiện của\nadapter", "Không vỡ,\nkhông cầu", "Adapter Components.png"),
-            ("Bụi bẩn", "Không có dị\nvật, không có\nbụi bẩn", "Foreign material.png"),
-            ("Các chân tiếp xúc\ncủa socket", "Không biến\ndạng, không\nxước, không\nhỏng", "Pin.png"),
-            ("Các điểm tiếp nối", "Không biến\ndạng, không\nxước, không\nhỏng", "Pad.png")
-        ]
-        
-        dept_texts = ["Non-\nDestructive\nInspection", "IQC", "Microscope\nInspection"]
-        
-        for cat_idx, (item, criteria, ng_img) in enumerate(categories_info):
-            # Row 1 of Item
-            row1 = [
-                dept_texts[0] if cat_idx == 0 else "",
-                dept_texts[1] if cat_idx == 0 else "",
-                dept_texts[2] if cat_idx == 0 else "",
-                item, criteria, get_static_image(ng_img),
-                # Images 1-4
-                get_captured_image(cat_idx, 1), get_captured_image(cat_idx, 2),
-                get_captured_image(cat_idx, 3), get_captured_image(cat_idx, 4),
-                "PASS", ""
-            ]
-            
-            # Row 2 of Item
-            row2 = [
-                "", "", "", 
-                "", "", "", # Spanned cells
-                # Images 5-8
-                get_captured_image(cat_idx, 5), get_captured_image(cat_idx, 6),
-                get_captured_image(cat_idx, 7), get_captured_image(cat_idx, 8),
-                "", "" # Spanned Result/Note
-            ]
-            data.append(row1)
-            data.append(row2)
-
-        # Column Widths
-        # Page usable width ~11.3 inch
-        # Dept(3): 0.6, 0.4, 0.7 = 1.7
-        # Item: 1.1
-        # Criteria: 1.1
-        # NGEx: 1.3
-        # Pt(4): 1.2 * 4 = 4.8
-        # Result: 0.6
-        # Note: 0.7
-        # Total: 11.3 -> Perfect
-        
-        col_widths = [
-            0.6*inch, 0.4*inch, 0.7*inch,
-            1.1*inch, 1.1*inch, 1.3*inch,
-            1.2*inch, 1.2*inch, 1.2*inch, 1.2*inch,
-            0.6*inch, 0.7*inch
-        ]
-        
-        # Row Heights
-        # Reduce rows to fit one page.
-        # Header 0.4.
-        # Rows: 0.65 * 8 = 5.2.
-        # Total = 5.6 inch Table.
-        row_heights = [0.4*inch] + [0.65*inch]*8 
-        
-        t = Table(data, colWidths=col_widths, rowHeights=row_heights)
-        
-        # Styling
-        style = [
-            ('GRID', (0,0), (-1,-1), 1, colors.grey),
-            ('FONTNAME', (0,0), (-1,-1), font_name),
-            ('FONTSIZE', (0,0), (-1,-1), 8),
-            ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-            ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-            
-            # Header
-            ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
-            ('SPAN', (0,0), (2,0)), # Merge Dept Header
-            ('SPAN', (6,0), (9,0)), # Merge Inspection Point Header (cols 6,7,8,9)
-            
-            # Dept Vertical Spans (All 8 data rows: 1 to 8)
-            ('SPAN', (0,1), (0,8)),
-            ('SPAN', (1,1), (1,8)),
-            ('SPAN', (2,1), (2,8)),
-        ]
-        
-        # Loop to add spans for each Category (2 rows each)
-        # Cat 0: Rows 1-2
-        # Cat 1: Rows 3-4
-        # ...
-        for i in range(4):
-            start_row = 1 + i*2
-            end_row = start_row + 1
-            # Item
-            style.append(('SPAN', (3, start_row), (3, end_row)))
-            # Criteria
-            style.append(('SPAN', (4, start_row), (4, end_row)))
-            # NG Example
-            style.append(('SPAN', (5, start_row), (5, end_row)))
-            # Result
-            style.append(('SPAN', (10, start_row), (10, end_row)))
-            # Note
-            style.append(('SPAN', (11, start_row), (11, end_row)))
-        
-        t.setStyle(TableStyle(style))
+        data[0][0] = "Dept."
+        data[0][3] = "Item"
+        data[0][4] = "Criteria"
+        data[0][5] = "NG Example"
+        data[0][6] = f"Inspection Point ({template.max_points} Point)"
+        data[0][-2] = "Result"
+        data[0][-1] = "Note"
+
+        # Dept text only on first row, spans all data rows.
+        for col, text in enumerate(template.dept[:3]):
+            data[1][col] = text
+
+        for category in template.categories:
+            start_row, _ = layout.category_rows[category.index]
+            row = data[start_row]
+            row[3] = category.item
+            row[4] = category.criteria
+            row[5] = get_static_image(category.ng_image) if category.ng_image else ""
+            row[-2] = "PASS"
+            for point_idx in range(1, category.points + 1):
+                r, c = layout.point_cells[(category.index, point_idx)]
+                data[r][c] = get_captured_image(category, point_idx)
+
+        t = Table(data, colWidths=layout.col_widths, rowHeights=layout.row_heights)
+        t.setStyle(TableStyle(layout.style))
         elements.append(t)
-        
+
         # Footer
         elements.append(Spacer(1, 0.1*inch)) # Reduced spacer
-        elements.append(Paragraph("Inspect periodically (IQC Inspector)", 
+        elements.append(Paragraph("Inspect periodically (IQC Inspector)",
                                   ParagraphStyle('Footer', parent=styles['Normal'], fontName=font_name, fontSize=10)))
-        elements.append(Paragraph("Report any problems during inspection immediately (Managers / Supervisors)", 
+        elements.append(Paragraph("Report any problems during inspection immediately (Managers / Supervisors)",
                                   ParagraphStyle('Footer2', parent=styles['Normal'], fontName=font_name, fontSize=10)))
 
-        try:
-            doc.build(elements)
-            print(f"PDF generated: {pdf_path}")
-            return pdf_path
-        except Exception as e:
-            print(f"Error generating PDF: {e}")
-            import traceback
-            traceback.print_exc()
-            return None
+        return elements
+
+    def _remove_partial(self, pdf_path):
+        if os.path.exists(pdf_path):
+            try:
+                os.remove(pdf_path)
+            except OSError:
+                pass
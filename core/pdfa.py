@@ -0,0 +1,97 @@
+"""
+Hỗ trợ xuất PDF/A-2b (lưu trữ lâu dài) cho reportlab canvas.
+
+PDF/A yêu cầu: XMP metadata khớp với Info dictionary, OutputIntent kèm ICC profile,
+và mọi font phải được nhúng (không dùng Helvetica chuẩn không nhúng).
+"""
+import os
+from xml.sax.saxutils import escape
+
+from reportlab.pdfbase.pdfdoc import (XMP, PDFDictionary, PDFArray, PDFName, PDFString,
+                                      PDFStream, PDFStreamFilterZCompress)
+
+PDFA_PART = 2
+PDFA_CONFORMANCE = "B"
+OUTPUT_CONDITION = "sRGB IEC61966-2.1"
+
+# Font TTF đi kèm reportlab, dùng khi không có Arial (VD: chạy trên Linux)
+FALLBACK_FONT_NAME = "Vera"
+
+_srgb_profile = None
+
+
+def fallback_font_path():
+    import reportlab
+    return os.path.join(os.path.dirname(reportlab.__file__), "fonts", "Vera.ttf")
+
+
+def srgb_icc_profile():
+    """ICC profile sRGB (bytes), tạo một lần bằng littlecms của Pillow."""
+    global _srgb_profile
+    if _srgb_profile is None:
+        from PIL import ImageCms
+        _srgb_profile = ImageCms.ImageCmsProfile(ImageCms.createProfile("sRGB")).tobytes()
+    return _srgb_profile
+
+
+def _xmp_date(ts):
+    yyyy, mm, dd, hh, mi, ss = ts.YMDhms
+    return "%04d-%02d-%02dT%02d:%02d:%02d%+03d:%02d" % (yyyy, mm, dd, hh, mi, ss, ts.dhh, abs(ts.dmm))
+
+
+def _make_xmp(doc):
+    """XMP packet (bytes UTF-8, tên người kiểm tra có thể là tiếng Việt)."""
+    info = doc.info
+    date = _xmp_date(doc._timeStamp)
+    return f"""<?xpacket begin="﻿" id="W5M0MpCehiHzreSzNTczkc9d"?>
+<x:xmpmeta xmlns:x="adobe:ns:meta/">
+ <rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">
+  <rdf:Description rdf:about=""
+    xmlns:dc="http://purl.org/dc/elements/1.1/"
+    xmlns:xmp="http://ns.adobe.com/xap/1.0/"
+    xmlns:pdf="http://ns.adobe.com/pdf/1.3/"
+    xmlns:pdfaid="http://www.aiim.org/pdfa/ns/id/">
+   <dc:format>application/pdf</dc:format>
+   <dc:title><rdf:Alt><rdf:li xml:lang="x-default">{escape(info.title)}</rdf:li></rdf:Alt></dc:title>
+   <dc:creator><rdf:Seq><rdf:li>{escape(info.author)}</rdf:li></rdf:Seq></dc:creator>
+   <dc:description><rdf:Alt><rdf:li xml:lang="x-default">{escape(info.subject)}</rdf:li></rdf:Alt></dc:description>
+   <xmp:CreatorTool>{escape(info.creator)}</xmp:CreatorTool>
+   <xmp:CreateDate>{date}</xmp:CreateDate>
+   <xmp:ModifyDate>{date}</xmp:ModifyDate>
+   <pdf:Producer>{escape(info.producer)}</pdf:Producer>
+   <pdf:Keywords>{escape(info.keywords)}</pdf:Keywords>
+   <pdfaid:part>{PDFA_PART}</pdfaid:part>
+   <pdfaid:conformance>{PDFA_CONFORMANCE}</pdfaid:conformance>
+  </rdf:Description>
+ </rdf:RDF>
+</x:xmpmeta>
+<?xpacket end="w"?>""".encode("utf-8")
+
+
+def apply_pdfa(canv, title, author="N/A", subject="Socket Inspection Report"):
+    """
+    Gắn metadata PDF/A-2b vào canvas. Gọi trước canv.save()
+    (với SimpleDocTemplate: truyền qua onFirstPage).
+    """
+    canv.setTitle(title)
+    canv.setAuthor(author)
+    canv.setSubject(subject)
+    canv.setCreator("Socket Inspection App")
+
+    doc = canv._doc
+    catalog = doc.Catalog
+    catalog.Metadata = XMP(creator=_make_xmp)
+
+    icc = PDFStream(dictionary=PDFDictionary({"N": 3}), content=srgb_icc_profile(),
+                    filters=[PDFStreamFilterZCompress()])
+    intent = PDFDictionary({
+        "Type": PDFName("OutputIntent"),
+        "S": PDFName("GTS_PDFA1"),
+        "OutputConditionIdentifier": PDFString(OUTPUT_CONDITION),
+        "Info": PDFString(OUTPUT_CONDITION),
+        "DestOutputProfile": doc.Reference(icc),
+    })
+    # PDFCatalog chỉ xuất các key khai báo trong __NoDefault__, thêm OutputIntents cho catalog này
+    if "OutputIntents" not in catalog.__NoDefault__:
+        catalog.__NoDefault__ = list(catalog.__NoDefault__) + ["OutputIntents"]
+    catalog.OutputIntents = PDFArray([intent])
@@ -0,0 +1,93 @@
+import os
+import sys
+import time
+import threading
+from collections import Counter
+from datetime import datetime
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _thread_label(ident, root_frame, names):
+    """GUI cho main thread, tên lớp với QThread (frame gốc là run(self)), còn lại tên threading."""
+    if ident == threading.main_thread().ident:
+        return "GUI"
+    if root_frame.f_code.co_name == "run" and "self" in root_frame.f_locals:
+        return type(root_frame.f_locals["self"]).__name__
+    return names.get(ident, f"thread-{ident}")
+
+
+class SamplingProfiler:
+    """
+    Profiler lấy mẫu: mỗi interval giây chụp stack Python của mọi thread
+    (GUI, camera, worker) qua sys._current_frames() và đếm theo stack.
+    Không cần cài hook vào code đang chạy nên bật / tắt được khi app đang chạy,
+    overhead chỉ là một lần duyệt stack mỗi mẫu.
+
+    Kết quả ghi ở dạng "folded stacks" (thread;hàm;...;hàm số_mẫu), mở bằng
+    flamegraph.pl hoặc https://www.speedscope.app. Thời gian trong code C
+    (OpenCV, ReportLab...) được tính cho hàm Python gọi nó.
+    """
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.stacks = Counter()
+        self.sample_count = 0
+
+    def sample(self, skip=()):
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident in skip:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame)
+                frame = frame.f_back
+            stack.reverse()
+            labels = [_thread_label(ident, stack[0], names)] + [_frame_label(f) for f in stack]
+            self.stacks[";".join(labels)] += 1
+        self.sample_count += 1
+
+    def run(self, duration, should_stop=lambda: False):
+        """Lấy mẫu trong duration giây (dừng sớm khi should_stop() trả True)."""
+        me = threading.get_ident()
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline and not should_stop():
+            self.sample(skip=(me,))
+            time.sleep(self.interval)
+
+    def write_folded(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+
+class ProfilerThread(QThread):
+    """Ghi profile duration giây trong thread nền rồi lưu file .folded vào out_dir."""
+    profile_saved = pyqtSignal(str, int) # Đường dẫn, số mẫu
+    profile_failed = pyqtSignal(str)
+
+    def __init__(self, duration, out_dir, interval=0.005, parent=None):
+        super().__init__(parent)
+        self.duration = duration
+        self.out_dir = out_dir
+        self.profiler = SamplingProfiler(interval)
+        self._stop = False
+
+    def run(self):
+        try:
+            self.profiler.run(self.duration, lambda: self._stop)
+            path = os.path.join(self.out_dir, f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.folded")
+            self.profile_saved.emit(self.profiler.write_folded(path), self.profiler.sample_count)
+        except Exception as e:
+            print(f"Profiler error: {e}")
+            self.profile_failed.emit(str(e))
+
+    def stop(self):
+        """Dừng sớm; vẫn lưu các mẫu đã có."""
+        self._stop = True
@@ -1,6 +1,4 @@
-import zxingcpp
-import cv2
-import numpy as np
+from core.metrics import metrics
 
 class Scanner:
     """
@@ -14,7 +12,12 @@ class Scanner:
         Returns:
             str: Nội dung mã detect được hoặc None
         """
+        scan_start = metrics.now()
         try:
+            # Import khi quét frame đầu tiên: không làm chậm lúc mở app
+            import cv2
+            import zxingcpp
+
             # zxing-cpp hỗ trợ đọc trực tiếp từ numpy array (nếu bản mới), 
             # hoặc cần convert sang grayscale. Thử grayscale cho an toàn.
             gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
@@ -35,3 +38,5 @@ class Scanner:
         except Exception as e:
             print(f"Scanner Error: {e}")
             return None
+        finally:
+            metrics.observe("scan_decode", scan_start)
@@ -0,0 +1,86 @@
+import heapq
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+SLOT_EMPTY = 0
+SLOT_FILLED = 1
+
+
+class SessionModel(QObject):
+    """
+    Trạng thái các ô ảnh của một phiên chụp - nguồn dữ liệu duy nhất cho grid ảnh.
+
+    Trạng thái từng ô nằm trong một bytearray, ô trống nhỏ nhất lấy từ min-heap,
+    số ô đã chụp được đếm sẵn: tìm ô trống / đếm / kiểm tra ô đều không phải duyệt
+    pixmap của từng ImageBox, nên số ô lớn vẫn rẻ. Widget chỉ là view, cập nhật
+    theo signal của model.
+    """
+    slot_filled = pyqtSignal(int, str) # (index, đường dẫn ảnh)
+    slot_cleared = pyqtSignal(int)
+    counts_changed = pyqtSignal(int, int) # (số ô đã chụp, tổng số ô)
+    model_reset = pyqtSignal()
+
+    def __init__(self, total_slots, parent=None):
+        super().__init__(parent)
+        self.total = total_slots
+        self._init_state()
+
+    def _init_state(self):
+        self._states = bytearray(self.total)
+        self._paths = [None] * self.total
+        self._free = list(range(self.total)) # Đã là heap hợp lệ
+        self.filled_count = 0
+
+    def is_filled(self, index):
+        return self._states[index] == SLOT_FILLED
+
+    def is_full(self):
+        return self.filled_count == self.total
+
+    def path(self, index):
+        return self._paths[index]
+
+    def filled_slots(self):
+        """[(index, path)] của các ô đã chụp, theo thứ tự ô."""
+        return [(i, p) for i, p in enumerate(self._paths) if p is not None]
+
+    def first_free(self):
+        """Ô trống có index nhỏ nhất, hoặc -1 nếu đã đầy."""
+        # Heap có thể còn index của ô đã được fill trực tiếp (fill(index) không qua first_free): bỏ lười
+        while self._free and self._states[self._free[0]] == SLOT_FILLED:
+            heapq.heappop(self._free)
+        return self._free[0] if self._free else -1
+
+    def fill(self, index, path):
+        """Gán ảnh cho ô (ghi đè nếu ô đã có ảnh)."""
+        was_filled = self.is_filled(index)
+        self._states[index] = SLOT_FILLED
+        self._paths[index] = path
+        if self._free and self._free[0] == index:
+            heapq.heappop(self._free)
+        if not was_filled:
+            self.filled_count += 1
+        self.slot_filled.emit(index, path)
+        if not was_filled:
+            self.counts_changed.emit(self.filled_count, self.total)
+
+    def clear(self, index):
+        """Xóa ảnh khỏi ô. Returns: đường dẫn ảnh cũ, hoặc None nếu ô đang trống."""
+        if not self.is_filled(index):
+            return None
+        old_path = self._paths[index]
+        self._states[index] = SLOT_EMPTY
+        self._paths[index] = None
+        heapq.heappush(self._free, index)
+        self.filled_count -= 1
+        self.slot_cleared.emit(index)
+        self.counts_changed.emit(self.filled_count, self.total)
+        return old_path
+
+    def reset(self, total_slots=None):
+        """Xóa hết các ô (phiên mới); total_slots đổi số ô nếu template thay đổi."""
+        if total_slots is not None:
+            self.total = total_slots
+        self._init_state()
+        self.model_reset.emit()
+        self.counts_changed.emit(0, self.total)
@@ -0,0 +1,84 @@
+import time
+import threading
+from contextlib import contextmanager
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+# Các bước phải xong trước khi in bảng: hai bước chạy nền và lần đầu event loop chạy
+STARTUP_PHASES = ("camera enumeration", "Dino-Lite SDK init", "event loop running")
+
+
+class StartupProfiler:
+    """
+    Đo thời gian từng giai đoạn khởi động (bật bằng `python main.py --profile-startup`).
+    Ghi được từ nhiều thread: các bước chạy nền (tìm camera, init SDK) hiện cùng bảng
+    với các bước trên GUI thread, cột start cho thấy chúng chạy song song.
+    Bảng được in khi mọi bước trong `expected` đã được ghi.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.t0 = time.perf_counter()
+        self._records = [] # (tên, start, end, thread)
+        self._lock = threading.Lock()
+        self._reported = False
+        self.expected = set(STARTUP_PHASES)
+
+    def enable(self, t0=None):
+        """t0: time.perf_counter() lúc process bắt đầu (mặc định: lúc tạo profiler)."""
+        self.enabled = True
+        if t0 is not None:
+            self.t0 = t0
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, start, time.perf_counter())
+
+    def mark(self, name):
+        """Ghi một mốc (không có thời lượng), VD: event loop bắt đầu chạy."""
+        now = time.perf_counter()
+        self._record(name, now, now)
+
+    def _record(self, name, start, end):
+        if not self.enabled:
+            return
+        if threading.current_thread() is threading.main_thread():
+            thread = "GUI"
+        else:
+            thread = type(QThread.currentThread()).__name__
+        with self._lock:
+            self._records.append((name, start, end, thread))
+            self.expected.discard(name)
+            done = not self.expected
+        if done:
+            self.report()
+
+    def report(self):
+        """In bảng thời gian một lần (lần gọi sau bỏ qua)."""
+        if not self.enabled or self._reported:
+            return
+        self._reported = True
+        with self._lock:
+            records = sorted(self._records, key=lambda r: r[1])
+        print("Startup profile (ms since process start):")
+        print(f"  {'phase':<32} {'start':>8} {'duration':>9}  thread")
+        for name, start, end, thread in records:
+            print(f"  {name:<32} {(start - self.t0) * 1000:8.1f} {(end - start) * 1000:9.1f}  {thread}")
+
+
+startup_profiler = StartupProfiler()
+
+
+class CameraEnumThread(QThread):
+    """Liệt kê camera (DirectShow, có thể mất hàng trăm ms) ngoài GUI thread."""
+    cameras_found = pyqtSignal(list)
+
+    def run(self):
+        from core.camera import CameraThread
+        with startup_profiler.phase("camera enumeration"):
+            cameras = CameraThread.get_available_cameras()
+        self.cameras_found.emit(cameras)
+
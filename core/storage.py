@@ -1,7 +1,11 @@
 import os
-import cv2
+import json
 from datetime import datetime
 
+from core.metrics import metrics
+
+SESSION_INFO_FILE = "session.json"
+
 class StorageManager:
     """
     Quản lý việc tạo thư mục và lưu ảnh.
@@ -41,6 +45,7 @@ class StorageManager:
         file_path = os.path.join(folder_path, filename)
         
         try:
+            import cv2 # Import khi lưu ảnh đầu tiên: không làm chậm lúc mở app
             # cv2.imwrite fails with unicode paths on Windows. 
             # Solution: Encode to buffer and write to file.
             success, buffer = cv2.imencode(".jpg", image)
@@ -48,6 +53,7 @@ class StorageManager:
                 mode = 'wb'
                 with open(file_path, mode) as f:
                     f.write(buffer)
+                metrics.inc("bytes_saved", len(buffer))
                 return file_path
             else:
                  print("Error encoding image")
@@ -55,3 +61,77 @@ class StorageManager:
         except Exception as e:
             print(f"Error saving image: {e}")
             return None
+
+    def save_session_info(self, session_path, pid, model_name="N/A", inspector_name="N/A"):
+        """
+        Ghi thông tin phiên (PID, model, inspector) vào session.json trong folder phiên.
+        Giữ nguyên thời điểm bắt đầu nếu file đã tồn tại.
+        """
+        info = self.load_session_info(session_path) or {}
+        info.update({
+            "pid": pid,
+            "model": model_name,
+            "inspector": inspector_name,
+        })
+        info.setdefault("started", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        try:
+            with open(os.path.join(session_path, SESSION_INFO_FILE), 'w', encoding='utf-8') as f:
+                json.dump(info, f, ensure_ascii=False, indent=4)
+        except Exception as e:
+            print(f"Error saving session info: {e}")
+        return info
+
+    def load_session_info(self, session_path):
+        """Đọc session.json, trả về dict hoặc None nếu không có."""
+        info_path = os.path.join(session_path, SESSION_INFO_FILE)
+        if not os.path.exists(info_path):
+            return None
+        try:
+            with open(info_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Error reading session info {info_path}: {e}")
+            return None
+
+    def list_sessions(self, since=None, until=None):
+        """
+        Liệt kê các phiên trong base_dir, sắp theo thời gian sửa đổi.
+        Args:
+            since, until: datetime lọc theo thời gian sửa đổi cuối của folder phiên.
+        Returns:
+            list dict: pid, session_path, model, inspector, started, image_count, modified
+        """
+        sessions = []
+        if not os.path.exists(self.base_dir):
+            return sessions
+
+        for name in os.listdir(self.base_dir):
+            session_path = os.path.join(self.base_dir, name)
+            if not os.path.isdir(session_path):
+                continue
+
+            files = os.listdir(session_path)
+            images = [f for f in files if f.endswith(".jpg")]
+            if SESSION_INFO_FILE not in files and not images:
+                continue # Không phải folder phiên (VD: logs/ của bản cũ)
+            # Thời gian sửa đổi = file mới nhất trong phiên
+            mtimes = [os.path.getmtime(os.path.join(session_path, f)) for f in files]
+            modified = datetime.fromtimestamp(max(mtimes) if mtimes else os.path.getmtime(session_path))
+            if since and modified < since:
+                continue
+            if until and modified > until:
+                continue
+
+            info = self.load_session_info(session_path) or {}
+            sessions.append({
+                "pid": info.get("pid", name),
+                "session_path": session_path,
+                "model": info.get("model", "N/A"),
+                "inspector": info.get("inspector", "N/A"),
+                "started": info.get("started", ""),
+                "image_count": len(images),
+                "modified": modified,
+            })
+
+        sessions.sort(key=lambda s: s["modified"])
+        return sessions
@@ -0,0 +1,143 @@
+import time
+import threading
+from collections import deque
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+from core.metrics import metrics
+
+RETRY_MS = 15 # Chu kỳ kiểm tra lại lần bấm đang chờ frame
+
+
+class FrameHistory:
+    """
+    Vòng các frame gần nhất kèm timestamp (time.perf_counter() lúc đọc xong) để lệnh chụp
+    lấy đúng frame lúc bấm thay vì frame đến sau đó. CameraThread ghi, GUI thread đọc.
+    Chỉ giữ tham chiếu (không copy): frame từ camera là mảng mới mỗi lần đọc và không bị sửa sau khi emit.
+    Mỗi frame có thể kèm điểm độ nét tính sẵn trong camera thread (None nếu chưa chấm).
+    """
+    def __init__(self, size=15):
+        self._frames = deque(maxlen=max(1, size))
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._frames)
+
+    def add(self, frame, timestamp, score=None):
+        with self._lock:
+            self._frames.append((timestamp, frame, score))
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+
+    def count_since(self, timestamp):
+        """Số frame đọc từ timestamp trở đi."""
+        with self._lock:
+            return sum(1 for item in self._frames if item[0] >= timestamp)
+
+    def select(self, timestamp, window=0.0, score=None):
+        """
+        Frame cho lần bấm lúc timestamp: frame gần nhất, hoặc (score và window > 0) frame có
+        điểm cao nhất trong khoảng timestamp ± window giây (VD: nét nhất).
+        score(frame) chỉ được gọi cho frame chưa có điểm tính sẵn.
+        Returns: (frame, timestamp của frame, điểm hoặc None), hoặc None nếu chưa có frame.
+        """
+        with self._lock:
+            frames = list(self._frames)
+        if not frames:
+            return None
+        candidates = [item for item in frames if abs(item[0] - timestamp) <= window]
+        if score is None or not candidates:
+            frame_time, frame, frame_score = min(frames, key=lambda item: abs(item[0] - timestamp))
+            return frame, frame_time, frame_score
+        return _best(candidates, score)
+
+    def best_of(self, timestamp, count, after=True, score=None, partial=False):
+        """
+        Frame có điểm cao nhất trong count frame đầu tiên từ lúc bấm (after) hoặc count frame
+        cuối cùng tính đến lúc bấm. Returns: như select(), hoặc None nếu không có frame nào /
+        (after) chưa đọc đủ count frame sau lúc bấm, trừ khi partial=True.
+        """
+        with self._lock:
+            frames = list(self._frames)
+        if after:
+            candidates = [item for item in frames if item[0] >= timestamp][:count]
+            if len(candidates) < count and not partial:
+                return None
+        else:
+            candidates = [item for item in frames if item[0] <= timestamp][-count:]
+        if not candidates:
+            return None
+        return _best(candidates, score)
+
+
+def _best(candidates, score):
+    best = None
+    for frame_time, frame, frame_score in candidates:
+        if frame_score is None:
+            frame_score = score(frame) if score is not None else 0.0
+        if best is None or frame_score > best[2]:
+            best = (frame, frame_time, frame_score)
+    return best
+
+
+class TriggerQueue(QObject):
+    """
+    Hàng đợi lệnh chụp (MicroTouch, phím Space): mỗi lần bấm mang timestamp lúc bấm.
+    Lần bấm cách lần được nhận trước đó ít hơn debounce_s (rung tiếp điểm) bị gộp vào lần đó;
+    các lần bấm được nhận xếp hàng và emit lần lượt, nên N lần bấm cách nhau từ debounce_s
+    trở lên cho N ảnh thay vì bị bỏ qua như cooldown cũ.
+
+    ready(press_time): False khi frame cho lần bấm chưa đọc xong (VD: chọn trong các frame sau
+    lúc bấm); lần bấm đó và các lần sau chờ trong hàng đợi (vẫn tính trong pending(), clear() hủy được).
+    """
+    triggered = pyqtSignal(float) # time.perf_counter() lúc bấm
+
+    def __init__(self, debounce_s=0.2, max_pending=8, ready=None, parent=None):
+        super().__init__(parent)
+        self.debounce_s = debounce_s
+        self.max_pending = max_pending
+        self.ready = ready
+        self._pending = deque()
+        self._last_press = None
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._drain)
+
+    def pending(self):
+        return len(self._pending)
+
+    def press(self, timestamp=None):
+        """Ghi nhận một lần bấm (gọi ở GUI thread). Returns: True nếu được xếp hàng chụp."""
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        # Chỉ tính từ lần bấm được nhận: chuỗi bấm đều nhau không bị gộp hết vào lần đầu
+        if self._last_press is not None and timestamp - self._last_press < self.debounce_s:
+            metrics.inc("triggers_debounced")
+            return False
+        if len(self._pending) >= self.max_pending:
+            metrics.inc("triggers_dropped")
+            print("Capture queue full, trigger dropped.")
+            return False
+        self._last_press = timestamp
+        self._pending.append(timestamp)
+        metrics.inc("triggers")
+        if not self._timer.isActive():
+            # Chụp ở vòng event loop sau: press() trả về ngay, các lần bấm đến cùng lúc được gom
+            self._timer.start(0)
+        return True
+
+    def clear(self):
+        """Hủy mọi lần bấm chưa chụp (VD: reset phiên, đóng cửa sổ)."""
+        self._pending.clear()
+        self._timer.stop()
+
+    def _drain(self):
+        while self._pending:
+            press_time = self._pending[0]
+            if self.ready is not None and not self.ready(press_time):
+                self._timer.start(RETRY_MS) # Giữ thứ tự: các lần bấm sau chờ lần này
+                return
+            self._pending.popleft()
+            self.triggered.emit(press_time)
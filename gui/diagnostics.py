@@ -0,0 +1,169 @@
+import os
+import time
+
+from PyQt6.QtWidgets import QDockWidget, QWidget, QFormLayout, QLabel
+from PyQt6.QtCore import Qt, QTimer
+
+from core.metrics import metrics
+
+try:
+    import psutil # Tùy chọn: CPU / RSS / tốc độ ghi đĩa của process
+except ImportError:
+    psutil = None
+
+
+class DiagnosticsSampler:
+    """
+    Lấy số liệu cho bảng chẩn đoán: FPS camera / hiển thị, frame bị gộp, độ trễ scan,
+    lưu ảnh, độ lệch lúc bấm - frame được chụp, độ dài các hàng đợi, tốc độ ghi đĩa,
+    CPU và RSS của process.
+    Tốc độ (FPS, MB/s, CPU%) tính theo chênh lệch giữa hai lần sample().
+
+    live_view: widget có frames_received / frames_painted (LiveFrameMixin)
+    queues: hàm trả về dict {tên hàng đợi: số phần tử}
+    """
+    def __init__(self, live_view, queues=None, registry=metrics, clock=time.perf_counter):
+        self.live_view = live_view
+        self.queues = queues or (lambda: {})
+        self.registry = registry
+        self.clock = clock
+        self.process = psutil.Process() if psutil is not None else None
+        self._last = None
+
+    def _counters(self):
+        if self.process is not None:
+            with self.process.oneshot():
+                cpu = sum(self.process.cpu_times()[:2])
+                try:
+                    written = self.process.io_counters().write_bytes
+                except (AttributeError, psutil.Error): # macOS không có io_counters
+                    written = self.registry.counter("bytes_saved").value
+        else:
+            cpu = time.process_time()
+            written = self.registry.counter("bytes_saved").value # Chỉ tính ảnh chụp
+        return {
+            "time": self.clock(),
+            "received": self.live_view.frames_received,
+            "painted": self.live_view.frames_painted,
+            "cpu": cpu,
+            "written": written,
+        }
+
+    def _rss_mb(self):
+        if self.process is not None:
+            return self.process.memory_info().rss / 2 ** 20
+        try:
+            with open("/proc/self/statm") as f: # Linux không có psutil
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    def _latency(self, name):
+        hist = self.registry.histogram(name)
+        if not hist.count:
+            return None
+        return hist.percentile(50), hist.percentile(95)
+
+    def reset(self):
+        self._last = None
+
+    def sample(self):
+        """Returns: dict số liệu; các tốc độ là None ở lần gọi đầu tiên."""
+        now = self._counters()
+        last, self._last = self._last, now
+        stats = {
+            "capture_fps": None, "display_fps": None, "dropped_per_s": None,
+            "disk_mb_s": None, "cpu_percent": None,
+            "dropped": now["received"] - now["painted"],
+            "scan_ms": self._latency("scan_decode"),
+            "save_ms": self._latency("capture_to_saved"),
+            "skew_ms": self._latency("capture_skew"),
+            "queues": self.queues(),
+            "rss_mb": self._rss_mb(),
+        }
+        elapsed = now["time"] - last["time"] if last else 0
+        if elapsed > 0:
+            received = now["received"] - last["received"]
+            painted = now["painted"] - last["painted"]
+            stats["capture_fps"] = received / elapsed
+            stats["display_fps"] = painted / elapsed
+            stats["dropped_per_s"] = max(0, received - painted) / elapsed
+            stats["disk_mb_s"] = (now["written"] - last["written"]) / elapsed / 2 ** 20
+            stats["cpu_percent"] = (now["cpu"] - last["cpu"]) / elapsed * 100
+        return stats
+
+
+def _fmt(value, spec, unit=""):
+    return "-" if value is None else f"{value:{spec}}{unit}"
+
+
+class DiagnosticsDock(QDockWidget):
+    """
+    Bảng chẩn đoán (F12) để biết máy chậm do camera, scanner hay ổ đĩa.
+    Chỉ cập nhật khi đang hiện (UPDATE_MS), chỉ đổi text của vài QLabel nên không ảnh
+    hưởng live view. Khi mở bảng, metrics được bật tạm để có độ trễ scan / lưu ảnh.
+    """
+    UPDATE_MS = 250
+
+    ROWS = (
+        ("capture_fps", "Capture FPS"),
+        ("display_fps", "Display FPS"),
+        ("dropped", "Dropped frames"),
+        ("scan_ms", "Scan p50 / p95"),
+        ("save_ms", "Save p50 / p95"),
+        ("skew_ms", "Press-frame skew p50 / p95"),
+        ("queues", "Pending"),
+        ("disk_mb_s", "Disk write"),
+        ("cpu_percent", "Process CPU"),
+        ("rss_mb", "Process RSS"),
+    )
+
+    def __init__(self, sampler, parent=None):
+        super().__init__("Diagnostics", parent)
+        self.setObjectName("DiagnosticsDock")
+        self.sampler = sampler
+        self._metrics_was_enabled = metrics.enabled
+
+        body = QWidget()
+        layout = QFormLayout(body)
+        self.labels = {}
+        for key, title in self.ROWS:
+            label = QLabel("-")
+            label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse) # Cho support copy số liệu
+            layout.addRow(f"{title}:", label)
+            self.labels[key] = label
+        if psutil is None:
+            layout.addRow(QLabel("(install psutil for full CPU / memory / disk stats)"))
+        self.setWidget(body)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.visibilityChanged.connect(self.on_visibility_changed)
+
+    def on_visibility_changed(self, visible):
+        if visible:
+            self._metrics_was_enabled = metrics.enabled
+            metrics.enable()
+            self.sampler.reset()
+            self.refresh()
+            self.timer.start(self.UPDATE_MS)
+        else:
+            self.timer.stop()
+            metrics.enable(self._metrics_was_enabled)
+
+    def refresh(self):
+        s = self.sampler.sample()
+        text = {
+            "capture_fps": _fmt(s["capture_fps"], ".1f"),
+            "display_fps": _fmt(s["display_fps"], ".1f"),
+            "dropped": f"{s['dropped']} ({_fmt(s['dropped_per_s'], '.1f', '/s')})",
+            "scan_ms": "-" if s["scan_ms"] is None else "%.1f / %.1f ms" % s["scan_ms"],
+            "save_ms": "-" if s["save_ms"] is None else "%.1f / %.1f ms" % s["save_ms"],
+            "skew_ms": "-" if s["skew_ms"] is None else "%.1f / %.1f ms" % s["skew_ms"],
+            "queues": ", ".join(f"{name} {depth}" for name, depth in s["queues"].items()) or "-",
+            "disk_mb_s": _fmt(s["disk_mb_s"], ".2f", " MB/s"),
+            "cpu_percent": _fmt(s["cpu_percent"], ".0f", "%"),
+            "rss_mb": _fmt(s["rss_mb"], ".0f", " MB"),
+        }
+        for key, label in self.labels.items():
+            label.setText(text[key])
@@ -0,0 +1,176 @@
+import ctypes
+
+from PyQt6.QtCore import QRectF
+from PyQt6.QtGui import QPainter, QOpenGLContext, QOffscreenSurface
+from PyQt6 import sip
+
+from gui.widgets import LiveFrameMixin, LiveView
+
+try:
+    from PyQt6.QtOpenGLWidgets import QOpenGLWidget
+    from PyQt6.QtOpenGL import (QOpenGLBuffer, QOpenGLTexture, QOpenGLTextureBlitter, QOpenGLPixelTransferOptions,
+                                QOpenGLVersionFunctionsFactory, QOpenGLVersionProfile)
+    HAS_QT_OPENGL = True
+except ImportError: # Bản PyQt6 không có module OpenGL
+    QOpenGLWidget = object
+    HAS_QT_OPENGL = False
+
+BACKEND_RASTER = "raster"
+BACKEND_OPENGL = "opengl"
+
+GL_COLOR_BUFFER_BIT = 0x4000
+
+_gl_supported = None
+
+
+def opengl_available():
+    """Thử tạo OpenGL context (>= 2.0) một lần; False nếu driver / platform không hỗ trợ."""
+    global _gl_supported
+    if _gl_supported is None:
+        _gl_supported = False
+        if HAS_QT_OPENGL:
+            context = QOpenGLContext()
+            surface = QOffscreenSurface()
+            surface.create()
+            if context.create() and surface.isValid() and context.makeCurrent(surface):
+                _gl_supported = _gl_functions(context) is not None
+                context.doneCurrent()
+    return _gl_supported
+
+
+def _gl_functions(context):
+    profile = QOpenGLVersionProfile()
+    profile.setVersion(2, 0)
+    try:
+        return QOpenGLVersionFunctionsFactory.get(profile, context)
+    except Exception:
+        return None
+
+
+def create_live_view(backend=BACKEND_RASTER, text="", parent=None):
+    """
+    Tạo widget live view theo cấu hình "preview_backend".
+    "opengl" dùng GLLiveView nếu máy có OpenGL, nếu không tự quay về LiveView (raster).
+    """
+    if backend == BACKEND_OPENGL:
+        if opengl_available():
+            return GLLiveView(text, parent)
+        print("OpenGL preview unavailable, falling back to raster live view")
+    return LiveView(text, parent)
+
+
+class GLLiveView(LiveFrameMixin, QOpenGLWidget):
+    """
+    Live view vẽ bằng OpenGL: frame BGR được upload thành texture (GL tự đổi BGR -> RGB)
+    và co giãn trên GPU bằng QOpenGLTextureBlitter, CPU chỉ còn chép dữ liệu frame.
+
+    Upload qua Pixel Buffer Object khi có: dữ liệu được chép vào PBO vừa "orphan"
+    (allocate lại mỗi frame) rồi glTexSubImage2D đọc từ PBO, nên driver chuyển lên GPU
+    bất đồng bộ mà không phải chờ frame trước vẽ xong. Không có PBO thì upload trực tiếp.
+
+    Chỉ frame mới nhất được upload, theo cùng cơ chế gộp / giới hạn số lần vẽ như LiveView.
+    Nếu khởi tạo GL lỗi, paintGL vẽ bằng QPainter như LiveView.
+    """
+    def __init__(self, text="", parent=None):
+        super().__init__(parent)
+        self._init_live_view(text)
+        self._gl = None
+        self._texture = None
+        self._blitter = None
+        self._pbo = None
+        self._uploaded = None # Frame đang nằm trong texture
+        self._transfer = None
+        self.use_pbo = True
+
+    def initializeGL(self):
+        self._gl = _gl_functions(self.context())
+        if self._gl is None:
+            print("GLLiveView: OpenGL 2.0 functions unavailable, painting with QPainter")
+            return
+        self._blitter = QOpenGLTextureBlitter()
+        if not self._blitter.create():
+            print("GLLiveView: texture blitter unavailable, painting with QPainter")
+            self._gl = None
+            return
+        self._transfer = QOpenGLPixelTransferOptions()
+        self._transfer.setAlignment(1) # Dòng BGR không nhất thiết chia hết cho 4 byte
+        self._gl.glClearColor(0.0, 0.0, 0.0, 1.0)
+        self.context().aboutToBeDestroyed.connect(self._release_gl)
+
+    def _release_gl(self):
+        self.makeCurrent()
+        if self._texture is not None:
+            self._texture.destroy()
+        if self._pbo is not None:
+            self._pbo.destroy()
+        if self._blitter is not None:
+            self._blitter.destroy()
+        self._texture = self._pbo = self._blitter = None
+        self._uploaded = None
+        self.doneCurrent()
+
+    def _upload(self, frame):
+        height, width = frame.shape[:2]
+        if self._texture is None or self._texture.width() != width or self._texture.height() != height:
+            if self._texture is not None:
+                self._texture.destroy()
+            self._texture = QOpenGLTexture(QOpenGLTexture.Target.Target2D)
+            self._texture.setSize(width, height)
+            self._texture.setFormat(QOpenGLTexture.TextureFormat.RGB8_UNorm)
+            self._texture.setMinMagFilters(QOpenGLTexture.Filter.Linear, QOpenGLTexture.Filter.Linear)
+            self._texture.setWrapMode(QOpenGLTexture.WrapMode.ClampToEdge)
+            self._texture.allocateStorage(QOpenGLTexture.PixelFormat.BGR, QOpenGLTexture.PixelType.UInt8)
+
+        if self.use_pbo and self._upload_pbo(frame):
+            return
+        self._texture.setData(QOpenGLTexture.PixelFormat.BGR, QOpenGLTexture.PixelType.UInt8,
+                              sip.voidptr(frame.ctypes.data), self._transfer)
+
+    def _upload_pbo(self, frame):
+        if self._pbo is None:
+            self._pbo = QOpenGLBuffer(QOpenGLBuffer.Type.PixelUnpackBuffer)
+            self._pbo.setUsagePattern(QOpenGLBuffer.UsagePattern.StreamDraw)
+            if not self._pbo.create():
+                print("GLLiveView: pixel buffer objects unavailable, uploading directly")
+                self.use_pbo = False
+                self._pbo = None
+                return False
+        self._pbo.bind()
+        try:
+            self._pbo.allocate(frame.nbytes) # Orphan: driver cấp vùng nhớ mới, không chờ GPU đọc xong frame trước
+            ptr = self._pbo.map(QOpenGLBuffer.Access.WriteOnly)
+            if not ptr:
+                self.use_pbo = False
+                return False
+            ctypes.memmove(int(ptr), frame.ctypes.data, frame.nbytes)
+            self._pbo.unmap()
+            # PBO đang bind: con trỏ dữ liệu là offset trong buffer
+            self._texture.setData(QOpenGLTexture.PixelFormat.BGR, QOpenGLTexture.PixelType.UInt8,
+                                  sip.voidptr(0), self._transfer)
+            return True
+        finally:
+            self._pbo.release()
+
+    def paintGL(self):
+        if self._gl is None or self._image is None:
+            painter = QPainter(self)
+            self._paint_with_painter(painter)
+            painter.end()
+            self._frame_painted()
+            return
+
+        if self._uploaded is not self._frame:
+            self._upload(self._frame)
+            self._uploaded = self._frame
+
+        ratio = self.devicePixelRatio()
+        viewport = self.rect()
+        viewport.setSize(viewport.size() * ratio)
+        target = QRectF(self.target_rect())
+        target = QRectF(target.x() * ratio, target.y() * ratio, target.width() * ratio, target.height() * ratio)
+        self._gl.glClear(GL_COLOR_BUFFER_BIT)
+        self._blitter.bind()
+        self._blitter.blit(self._texture.textureId(), QOpenGLTextureBlitter.targetTransform(target, viewport),
+                           QOpenGLTextureBlitter.Origin.OriginTopLeft)
+        self._blitter.release()
+        self._frame_painted()
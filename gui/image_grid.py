@@ -0,0 +1,276 @@
+import os
+from collections import OrderedDict
+
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QRect, QSize, pyqtSignal
+from PyQt6.QtGui import QPixmap, QImageReader, QColor, QPen, QFont
+from PyQt6.QtWidgets import QTableView, QStyledItemDelegate, QAbstractItemView, QHeaderView
+
+from core.metrics import metrics
+
+CELL_HEADER = "header"
+CELL_NG = "ng"
+CELL_SLOT = "slot"
+CELL_EMPTY = "empty"
+
+KIND_ROLE = Qt.ItemDataRole.UserRole
+PATH_ROLE = Qt.ItemDataRole.UserRole + 1
+SLOT_ROLE = Qt.ItemDataRole.UserRole + 2
+
+HEADER_HEIGHT = 24
+POINT_SIZE = QSize(110, 90) # Bằng ImageBox cũ
+NG_WIDTH = 170
+TITLE_HEIGHT = 14
+
+
+class ThumbnailCache:
+    """
+    LRU cache thumbnail (QPixmap) theo (đường dẫn, kích thước).
+    Ảnh được decode thẳng ở kích thước thumbnail (QImageReader.setScaledSize,
+    JPEG giải mã thu nhỏ nhanh hơn nhiều so với decode full rồi scale).
+    """
+    def __init__(self, max_items=256):
+        self.max_items = max_items
+        self._items = OrderedDict()
+
+    def get(self, path, size):
+        key = (path, size.width(), size.height())
+        pixmap = self._items.get(key)
+        if pixmap is not None:
+            self._items.move_to_end(key)
+            return pixmap
+        with metrics.time("thumbnail"):
+            pixmap = self._load(path, size)
+        self._items[key] = pixmap
+        if len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+        return pixmap
+
+    @staticmethod
+    def _load(path, size):
+        reader = QImageReader(path)
+        source = reader.size()
+        if source.isValid():
+            reader.setScaledSize(source.scaled(size, Qt.AspectRatioMode.KeepAspectRatio))
+        image = reader.read()
+        return QPixmap.fromImage(image) if not image.isNull() else QPixmap()
+
+    def discard(self, path):
+        """Bỏ mọi thumbnail của path (VD: chụp lại ghi đè cùng tên file)."""
+        for key in [k for k in self._items if k[0] == path]:
+            del self._items[key]
+
+    def clear(self):
+        self._items.clear()
+
+
+class InspectionGridModel(QAbstractTableModel):
+    """
+    Bảng ô ảnh của template, đọc trạng thái từ SessionModel.
+
+    Mỗi category gồm một dòng tiêu đề (span hết bảng) và rows_for(category) dòng ô ảnh;
+    cột 0 là ảnh NG mẫu (span các dòng ô ảnh của category), cột 1.. là các điểm chụp.
+    Model không giữ ảnh: delegate chỉ load thumbnail của các ô đang hiện trên màn hình.
+    """
+    def __init__(self, template, session_model, ng_image_dir, parent=None):
+        super().__init__(parent)
+        self.template = template
+        self.session_model = session_model
+        self.ng_image_dir = ng_image_dir
+        self.thumbnails = ThumbnailCache()
+        self._build_layout()
+        session_model.slot_filled.connect(lambda index, path: self._slot_changed(index, path))
+        session_model.slot_cleared.connect(lambda index: self._slot_changed(index))
+        session_model.model_reset.connect(self._all_slots_changed)
+
+    def _build_layout(self):
+        ppr = self.template.points_per_row
+        self._rows = [] # row -> (kind, cat_idx, dòng thứ mấy trong category)
+        self._slot_cells = [] # slot index -> (row, col)
+        self._cat_first_slot = {}
+        self.spans = [] # (row, col, row_span, col_span)
+        for cat_idx, cat in enumerate(self.template.categories):
+            self.spans.append((len(self._rows), 0, 1, ppr + 1))
+            self._rows.append((CELL_HEADER, cat_idx, 0))
+            first_row = len(self._rows)
+            n_rows = self.template.rows_for(cat)
+            if n_rows > 1:
+                self.spans.append((first_row, 0, n_rows, 1))
+            self._cat_first_slot[cat_idx] = len(self._slot_cells)
+            for r in range(n_rows):
+                self._rows.append((CELL_SLOT, cat_idx, r))
+            for p in range(cat.points):
+                self._slot_cells.append((first_row + p // ppr, 1 + p % ppr))
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.template.points_per_row + 1
+
+    def row_kind(self, row):
+        return self._rows[row][0]
+
+    def slot_at(self, row, col):
+        """Index của ô chụp tại (row, col), hoặc -1."""
+        kind, cat_idx, cat_row = self._rows[row]
+        if kind != CELL_SLOT or col == 0:
+            return -1
+        point = cat_row * self.template.points_per_row + (col - 1)
+        if point >= self.template.categories[cat_idx].points:
+            return -1
+        return self._cat_first_slot[cat_idx] + point
+
+    def cell_kind(self, row, col):
+        kind, _, _ = self._rows[row]
+        if kind == CELL_HEADER:
+            return CELL_HEADER
+        if col == 0:
+            return CELL_NG
+        return CELL_SLOT if self.slot_at(row, col) >= 0 else CELL_EMPTY
+
+    def ng_image_path(self, cat_idx):
+        filename = self.template.categories[cat_idx].ng_image
+        if not filename:
+            return ""
+        path = os.path.join(self.ng_image_dir, filename)
+        return path if os.path.exists(path) else ""
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row, col = index.row(), index.column()
+        kind = self.cell_kind(row, col)
+        cat_idx = self._rows[row][1]
+        if role == KIND_ROLE:
+            return kind
+        if role == SLOT_ROLE:
+            return self.slot_at(row, col)
+        if role == Qt.ItemDataRole.DisplayRole:
+            if kind == CELL_HEADER:
+                return self.template.categories[cat_idx].label
+            if kind == CELL_NG:
+                return "NG Example"
+            if kind == CELL_SLOT:
+                return f"Pt {self.template.slots[self.slot_at(row, col)][1]}"
+            return None
+        if role == PATH_ROLE:
+            if kind == CELL_NG:
+                return self.ng_image_path(cat_idx)
+            if kind == CELL_SLOT:
+                return self.session_model.path(self.slot_at(row, col))
+        return None
+
+    def flags(self, index):
+        return Qt.ItemFlag.ItemIsEnabled
+
+    def slot_index(self, slot):
+        row, col = self._slot_cells[slot]
+        return self.index(row, col)
+
+    def _slot_changed(self, slot, path=None):
+        if path:
+            self.thumbnails.discard(path)
+        index = self.slot_index(slot)
+        self.dataChanged.emit(index, index, [PATH_ROLE])
+
+    def _all_slots_changed(self):
+        self.thumbnails.clear()
+        if self._rows:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self._rows) - 1, self.columnCount() - 1), [PATH_ROLE])
+
+
+class ThumbnailDelegate(QStyledItemDelegate):
+    """Vẽ tiêu đề category, ô ảnh NG mẫu và ô chụp; thumbnail được load khi ô được vẽ."""
+    def __init__(self, thumbnails, parent=None):
+        super().__init__(parent)
+        self.thumbnails = thumbnails
+
+    def paint(self, painter, option, index):
+        kind = index.data(KIND_ROLE)
+        rect = option.rect.adjusted(2, 2, -2, -2)
+        painter.save()
+        if kind == CELL_HEADER:
+            font = QFont(option.font)
+            font.setBold(True)
+            painter.setFont(font)
+            painter.setPen(QColor("black"))
+            painter.drawText(rect.adjusted(4, 0, 0, 0), Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+                             index.data())
+        elif kind == CELL_NG:
+            self._paint_image_cell(painter, rect, index, QColor("#D32F2F"), 2, "#f0f0f0", "No Ref")
+        elif kind == CELL_SLOT:
+            self._paint_image_cell(painter, rect, index, QColor("black"), 1, "#e0e0e0", "")
+        painter.restore()
+
+    def _paint_image_cell(self, painter, rect, index, border, border_width, background, empty_text):
+        title_rect = QRect(rect.left(), rect.bottom() - TITLE_HEIGHT + 1, rect.width(), TITLE_HEIGHT)
+        image_rect = QRect(rect.left(), rect.top(), rect.width(), rect.height() - TITLE_HEIGHT)
+        painter.fillRect(image_rect, QColor(background))
+
+        path = index.data(PATH_ROLE)
+        if path:
+            pixmap = self.thumbnails.get(path, image_rect.size())
+            if not pixmap.isNull():
+                target = QRect(0, 0, pixmap.width(), pixmap.height())
+                target.moveCenter(image_rect.center())
+                painter.drawPixmap(target, pixmap)
+            else:
+                painter.drawText(image_rect, Qt.AlignmentFlag.AlignCenter, "No Image")
+        elif empty_text:
+            painter.drawText(image_rect, Qt.AlignmentFlag.AlignCenter, empty_text)
+
+        font = QFont(painter.font())
+        font.setBold(True)
+        font.setPixelSize(10)
+        painter.setFont(font)
+        painter.setPen(border)
+        painter.drawText(title_rect, Qt.AlignmentFlag.AlignCenter, index.data())
+        painter.setPen(QPen(border, border_width))
+        painter.drawRect(rect.adjusted(0, 0, -1, -1))
+
+    def sizeHint(self, option, index):
+        return POINT_SIZE
+
+
+class InspectionGridView(QTableView):
+    """
+    Grid ảnh ảo hóa: chỉ các ô đang hiện trên màn hình được vẽ (và load thumbnail),
+    số widget không tăng theo số điểm chụp của template.
+    """
+    slot_right_clicked = pyqtSignal(int) # index của ô chụp
+    ng_clicked = pyqtSignal(str) # đường dẫn ảnh NG mẫu
+
+    def __init__(self, grid_model, parent=None):
+        super().__init__(parent)
+        self.setModel(grid_model)
+        self.setItemDelegate(ThumbnailDelegate(grid_model.thumbnails, self))
+        self.horizontalHeader().hide()
+        self.verticalHeader().hide()
+        self.setShowGrid(False)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.setHorizontalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+
+        vertical = self.verticalHeader()
+        vertical.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        vertical.setDefaultSectionSize(POINT_SIZE.height())
+        for row in range(grid_model.rowCount()):
+            if grid_model.row_kind(row) == CELL_HEADER:
+                self.setRowHeight(row, HEADER_HEIGHT)
+        horizontal = self.horizontalHeader()
+        horizontal.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        horizontal.setDefaultSectionSize(POINT_SIZE.width())
+        self.setColumnWidth(0, NG_WIDTH)
+        for row, col, row_span, col_span in grid_model.spans:
+            self.setSpan(row, col, row_span, col_span)
+
+    def mousePressEvent(self, event):
+        index = self.indexAt(event.position().toPoint())
+        if index.isValid():
+            kind = index.data(KIND_ROLE)
+            if kind == CELL_SLOT and event.button() == Qt.MouseButton.RightButton:
+                self.slot_right_clicked.emit(index.data(SLOT_ROLE))
+            elif kind == CELL_NG and event.button() == Qt.MouseButton.LeftButton and index.data(PATH_ROLE):
+                self.ng_clicked.emit(index.data(PATH_ROLE))
+        super().mousePressEvent(event)
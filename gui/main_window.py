@@ -1,27 +1,48 @@
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QPushButton, QLabel, QGridLayout, QMessageBox, QGroupBox, QComboBox, QLineEdit)
-from PyQt6.QtCore import Qt, pyqtSlot, QEvent
-from PyQt6.QtGui import QImage, QPixmap
-import cv2
+from PyQt6.QtCore import Qt, pyqtSignal, pyqtSlot, QEvent, QTimer
+from PyQt6.QtGui import QShortcut, QKeySequence
 import datetime
 import os
-import winsound # For sound effects
-import threading
-from pynput import mouse, keyboard
-
-from gui.widgets import ImageBox, ClickableLabel, ZoomDialog
+try:
+    import winsound # For sound effects
+except ImportError: # winsound chỉ có trên Windows: Linux / CI chạy không có âm thanh
+    winsound = None
+import time
+from collections import deque
+
+from gui.widgets import ZoomDialog
+from gui.image_grid import InspectionGridModel, InspectionGridView
+from gui.gl_view import create_live_view
+from gui.diagnostics import DiagnosticsSampler, DiagnosticsDock
 from core.camera import CameraThread
 from core.scanner import Scanner
-from core.storage import StorageManager
-from core.storage import StorageManager
-from core.pdf_generator import PDFGenerator
-from core.dino_sdk import DNX64
-from core.email_sender import EmailSender
-from PyQt6.QtCore import QMetaObject, Q_ARG
+from core.storage import StorageManager, SESSION_INFO_FILE
+from core.inspection_template import load_template_or_default, resource_path, DEFAULT_TEMPLATE_PATH
+from core.outbox import EmailOutbox, OutboxWorker
+from core.attachment_policy import AttachmentPolicy, DEFAULT_MAX_BYTES, session_report_regenerator
+from core.digest import DigestScheduler, DigestThread
+from core.session_model import SessionModel
+from core.startup import startup_profiler, CameraEnumThread
+from core.dino_service import DinoService
+from core.dino_device import DinoDeviceState
+from core.metrics import metrics
+from core.profiler import ProfilerThread
+from core.event_log import event_log, elapsed_ms
+from core.trigger import TriggerQueue
+from core.focus import focus_score
 import json
-from PyQt6.QtWidgets import QDialog, QFormLayout, QDialogButtonBox
+from PyQt6.QtWidgets import QDialog, QFormLayout, QDialogButtonBox, QProgressDialog
+
+
+
+CAPTURE_WAIT_S = 1.0 # best_next / sharpest: chờ frame sau lúc bấm tối đa, sau đó chọn trong các frame đã có
+PRESET_WAIT_S = 3.0 # Lệnh preset camera treo: không giữ lần bấm lâu hơn
 
 
+def beep(frequency, duration_ms):
+    if winsound is not None:
+        winsound.Beep(frequency, duration_ms)
 
 # Custom Application to intercept ALL events
 # Custom Application to intercept ALL events
@@ -35,6 +56,7 @@ class GlobalInputListener:
     Class chạy thread riêng để lắng nghe toàn bộ sự kiện chuột/phím của hệ thống.
     """
     def __init__(self, callback_func):
+        from pynput import mouse, keyboard
         self.callback = callback_func
         self.mouse_listener = mouse.Listener(on_click=self.on_click, on_scroll=self.on_scroll)
         self.key_listener = keyboard.Listener(on_press=self.on_press)
@@ -57,24 +79,27 @@ class GlobalInputListener:
         pass # Removed Debug
 
 class MainWindow(QMainWindow):
+    camera_preset_done = pyqtSignal(str, str) # (category, lỗi hoặc ""); emit từ thread của DinoService
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Socket Inspection App")
         self.setGeometry(100, 100, 1200, 800)
         
-        # QC Categories Definition
-        # Note: Index 0-6 are captured. Index 7 (Handwork) and 8 (Hole Fill) are manual/X-RAY.
-        # Custom QC Categories from User Request
-        self.qc_categories = [
-            "1. Linh kiện của adapter",
-            "2. Bụi bẩn",
-            "3. Các chân tiếp xúc của socket",
-            "4. Các điểm tiếp nối"
-        ]
-        # Total images captured is 4 categories * 8 = 32.
-        self.scan_categories_count = 4 
-        self.total_images = self.scan_categories_count * 8 
-        self.image_widgets = []
+        # Load Config
+        with startup_profiler.phase("load config"):
+            self.config = self.load_config()
+        self.update_worker_settings()
+
+        # QC Categories Definition - lấy từ inspection template (dùng chung với PDF)
+        with startup_profiler.phase("load template"):
+            # File template thiếu / lỗi: dùng template mặc định, báo cho user khi cửa sổ đã hiện
+            self.template, template_error = load_template_or_default(
+                self.config.get("inspection_template", DEFAULT_TEMPLATE_PATH))
+        self.qc_categories = [c.label for c in self.template.categories]
+        # Total images captured, VD: 4 categories * 8 = 32.
+        self.scan_categories_count = len(self.template.categories)
+        self.total_images = self.template.total_points
 
         
         # Core modules
@@ -86,14 +111,87 @@ class MainWindow(QMainWindow):
         self.session_path = None # Đường dẫn lưu ảnh hiện tại
         self.current_image_count = 0
         self.is_scanning = True # Mặc định ban đầu là chế độ scan
-        
+
+        # Trạng thái các ô ảnh: grid ảnh chỉ hiển thị theo signal của model
+        self.session_model = SessionModel(self.total_images, parent=self)
+        self.session_model.counts_changed.connect(self.on_slot_counts_changed)
+
+        # PDF export chạy nền
+        self.export_thread = None
+        self.export_progress = None
+        self.export_unit = "images"
+        
+        # Email gửi nền qua outbox (SQLite), tự thử lại khi mất mạng
+        with startup_profiler.phase("open outbox"):
+            self.outbox = EmailOutbox(os.path.join(self.storage.base_dir, "outbox.db"))
+        self.email_sender = None # Chỉ OutboxWorker đọc / ghi (create_email_sender)
+        self.email_sender_key = None
+        self.outbox_queued = 0
+        # File vượt email_max_bytes: nén lại ảnh -> zip -> chép vào share_path và gửi link
+        attachment_policy = AttachmentPolicy(
+            max_bytes=self.config.get("email_max_bytes", DEFAULT_MAX_BYTES),
+            share_dir=self.config.get("share_path") or None,
+            regenerate=session_report_regenerator(self.storage, self.create_pdf_generator))
+        self.outbox_worker = OutboxWorker(self.outbox, self.create_email_sender,
+                                          attachment_policy=attachment_policy)
+
         # Debounce scan
         self.last_scan_time = 0
         self.scan_cooldown = 2.0 # Giây
 
+        # Lệnh chụp (MicroTouch / Space) xếp hàng kèm thời điểm bấm; bấm cách nhau dưới capture_debounce_ms
+        # được gộp làm một. Frame lấy từ history của CameraThread (frame_history_size frame gần nhất):
+        # capture_mode "nearest" = frame gần lúc bấm nhất, "sharpest" = frame nét nhất trong ± capture_window_ms,
+        # "best_next" / "best_previous" = frame nét nhất trong capture_best_of frame sau / trước lúc bấm
+        # (rung máy khi bấm MicroTouch). Các chế độ chọn ảnh nét được chấm điểm sẵn trong camera thread.
+        self.capture_mode = self.config.get("capture_mode", "nearest")
+        self.capture_window = self.config.get("capture_window_ms", 100) / 1000
+        self.capture_best_of = self.config.get("capture_best_of", 5)
+        self.triggers = TriggerQueue(self.config.get("capture_debounce_ms", 200) / 1000,
+                                     ready=self.capture_ready, parent=self)
+        self.triggers.triggered.connect(self.capture_image)
         
         # Init UI
-        self.init_ui()
+        with startup_profiler.phase("build UI"):
+            self.init_ui()
+
+        self.outbox_worker.counts_changed.connect(self.update_outbox_counts)
+        self.outbox_worker.message_sent.connect(self.on_email_sent)
+        self.outbox_worker.message_failed.connect(self.on_email_failed)
+        self.outbox_worker.start()
+
+        # Digest: gom các socket của ca thành một email tại các mốc digest_times (VD: "06:00")
+        self.digest_thread = None
+        self.pending_digests = deque() # (since, until) chờ digest trước dựng xong
+        self.digest_scheduler = DigestScheduler(self.storage.base_dir, self.config.get("digest_times", []),
+                                                shift_hours=self.config.get("shift_hours", 8), parent=self)
+        self.digest_scheduler.digest_due.connect(self.send_digest)
+        self.digest_scheduler.start()
+
+        # Metrics (metrics_enabled): độ trễ từng bước, ghi ra metrics.json định kỳ và khi bấm Ctrl+Shift+M
+        if self.config.get("metrics_enabled", False):
+            metrics.enable()
+        self.metrics_path = os.path.join(self.storage.base_dir, "metrics.json")
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.timeout.connect(self.dump_metrics)
+        dump_interval = self.config.get("metrics_dump_interval_s", 60)
+        if metrics.enabled and dump_interval > 0:
+            self.metrics_timer.start(int(dump_interval * 1000))
+        QShortcut(QKeySequence("Ctrl+Shift+M"), self, activated=lambda: self.dump_metrics(show_status=True))
+
+        # Bảng chẩn đoán (F12): FPS, frame bị gộp, độ trễ scan / lưu ảnh, hàng đợi, đĩa, CPU, RAM
+        self.diagnostics_dock = DiagnosticsDock(DiagnosticsSampler(self.live_view, self.pending_work), parent=self)
+        self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.diagnostics_dock)
+        self.diagnostics_dock.hide()
+        QShortcut(QKeySequence("F12"), self, activated=self.toggle_diagnostics)
+
+        # Profile khi app đang chạy (Ctrl+Shift+P): lấy mẫu stack mọi thread trong profile_seconds giây,
+        # ghi file .folded (flamegraph) vào folder phiên hiện tại
+        self.profiler_thread = None
+        QShortcut(QKeySequence("Ctrl+Shift+P"), self, activated=self.start_profiling)
+        if template_error:
+            QTimer.singleShot(0, lambda: QMessageBox.warning(
+                self, "Inspection Template", f"{template_error}\n\nUsing the built-in default template."))
         
         # Start Global Input Debugger (Disabled for production)
         # self.input_listener = GlobalInputListener(self.handle_global_input)
@@ -101,7 +199,7 @@ class MainWindow(QMainWindow):
         
         # Install Event Filter to catch clicks on the video label 
         # (Dino-Lite MicroTouch often acts as a mouse click)
-        self.live_view_label.installEventFilter(self)
+        self.live_view.installEventFilter(self)
         
         # Init Camera - Sẽ do populate_cameras trigger hoặc gọi thủ công
         # self.camera_thread = CameraThread(camera_id=None) 
@@ -109,35 +207,83 @@ class MainWindow(QMainWindow):
         # self.camera_thread.status_update.connect(self.update_status)
         # self.camera_thread.start()
         
-        # Populate cameras (Will auto-select Dino if found and start camera)
-        self.populate_cameras()
-
-        # Init Dino-Lite MicroTouch SDK
-        self.init_dino_sdk()
-
-        # Load Config
-        self.config = self.load_config()
-
+        # Tìm camera và init Dino-Lite SDK song song trong thread nền: cửa sổ hiện lên ngay,
+        # populate_cameras (auto-select Dino và start camera) chạy khi có danh sách camera
+        self.camera_enum_thread = CameraEnumThread(self)
+        self.camera_enum_thread.cameras_found.connect(self.populate_cameras)
+        self.camera_enum_thread.start()
+        # Mọi lệnh DNX64.dll chạy tuần tự trong DinoService (dino_backend: "dll" hoặc "fake" để chạy không cần thiết bị)
+        backend = None
+        if self.config.get("dino_backend", "dll") == "fake":
+            from core.dino_sdk import FakeDNX64Dll
+            backend = FakeDNX64Dll()
+        self.dino = DinoService(backend=backend) # Không parent: lệnh DLL treo không được chặn việc hủy cửa sổ
+        # Preset camera (exposure, LED, lens) theo category trong inspection template, chỉ gửi giá trị thay đổi
+        self.dino_state = DinoDeviceState(self.dino, self.config.get("dino_device_index", 0))
+        self.preset_category = None
+        self.presets_pending = 0 # Lần bấm chờ preset gửi xong: frame trước đó còn exposure / LED của category cũ
+        self.preset_applied_at = 0.0
+        self.camera_preset_done.connect(self.on_camera_preset_done)
+        self.dino.sdk_ready.connect(self.init_dino_sdk)
+        self.dino.microtouch_pressed.connect(self.on_microtouch_press)
+        self.dino.start()
+
+
+    def init_dino_sdk(self, available):
+        """DinoService đã Init SDK và đăng ký callback MicroTouch (available=False nếu không có DLL)"""
+        if available:
+            print("Dino-Lite SDK Initialized.")
+            # Chưa biết trạng thái thiết bị: gửi lại đủ preset của category đang chụp
+            self.dino_state.invalidate()
+            self.preset_category = None
+            self.apply_camera_preset()
+        else:
+            print("Dino-Lite SDK not available (DLL missing).")
 
-    def init_dino_sdk(self):
-        """Initialize Dino-Lite SDK for MicroTouch"""
+    def apply_camera_preset(self):
+        """Khi ô chụp tiếp theo thuộc category mới: gửi preset camera của category đó trong một lô lệnh"""
+        slot = self.session_model.first_free()
+        if self.current_pid is None or slot == -1:
+            return
+        category = self.template.categories[self.template.slots[slot][0]]
+        if category.index == self.preset_category:
+            return
+        self.preset_category = category.index
+        if not category.camera or not self.dino.available:
+            return
         try:
-            self.dino = DNX64()
-            if self.dino.dnx64:
-                self.dino.Init()
-                self.dino.EnableMicroTouch(True)
-                self.dino.SetEventCallback(self.on_microtouch_press)
-                print("Dino-Lite SDK Initialized.")
-            else:
-                print("Dino-Lite SDK not available (DLL missing).")
-        except Exception as e:
-            print(f"Failed to init Dino SDK: {e}")
+            future = self.dino_state.apply(category.camera)
+        except ValueError as e:
+            print(f"Invalid camera preset for {category.label}: {e}")
+            self.update_status(f"Invalid camera preset ({category.label}): {e}")
+            return
+        event_log.log("camera_preset", category=category.name, settings=category.camera)
+        if future.done() and future.exception() is None:
+            return # Thiết bị đã đúng preset
+        self.presets_pending += 1
+        label = category.label
+
+        def done(f):
+            try:
+                self.camera_preset_done.emit(label, str(f.exception() or ""))
+            except RuntimeError:
+                pass # Cửa sổ đã đóng trước khi lệnh DLL xong
+        future.add_done_callback(done)
+
+    def on_camera_preset_done(self, label, error):
+        """Preset camera đã gửi xong (hoặc lỗi): bỏ các frame cũ trong history, thả các lần bấm đang chờ"""
+        self.presets_pending -= 1
+        self.preset_applied_at = time.perf_counter()
+        if hasattr(self, 'camera_thread'):
+            self.camera_thread.history.clear()
+        if error:
+            self.update_status(f"Camera preset failed ({label}): {error}")
+            event_log.log("camera_preset_failed", category=label, error=error)
 
-    def on_microtouch_press(self):
-        """Callback from ctypes thread when MicroTouch is pressed"""
+    def on_microtouch_press(self, press_time):
+        """MicroTouch được nhấn (signal từ thread của DLL, Qt chuyển về GUI thread; press_time lấy lúc bấm)"""
         print("MicroTouch Pressed!")
-        # Use invokeMethod to call capture_image on the GUI thread
-        QMetaObject.invokeMethod(self, "capture_image", Qt.ConnectionType.QueuedConnection)
+        self.triggers.press(press_time)
 
 
     def init_ui(self):
@@ -149,12 +295,10 @@ class MainWindow(QMainWindow):
         # --- LEFT PANEL: CAMERA VIEW ---
         left_layout = QVBoxLayout()
         
-        # Live View Label
-        self.live_view_label = QLabel("Camera Offline")
-        self.live_view_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.live_view_label.setStyleSheet("background-color: black; color: white;")
-        self.live_view_label.setMinimumSize(640, 480)
-        self.live_view_label.setScaledContents(True) # Scale ảnh fit label
+        # Live View: tự vẽ frame, giữ tỉ lệ, giới hạn theo tần số quét màn hình
+        # preview_backend: "raster" (QPainter) hoặc "opengl" (texture trên GPU, tự quay về raster nếu không có GL)
+        self.live_view = create_live_view(self.config.get("preview_backend", "raster"), "Camera Offline")
+        self.live_view.setMinimumSize(640, 480)
         
         # Info Panel
         info_group = QGroupBox("Session Info")
@@ -162,6 +306,7 @@ class MainWindow(QMainWindow):
         self.lbl_pid = QLabel("Socket info: N/A")
         self.lbl_pid.setStyleSheet("font-size: 16px; font-weight: bold; color: blue;")
         self.lbl_status = QLabel("Status: Ready")
+        self.lbl_outbox = QLabel("Email: 0 queued | 0 sent | 0 failed")
         
         # Camera Selection
         self.combo_cameras = QComboBox()
@@ -181,6 +326,7 @@ class MainWindow(QMainWindow):
         # Status & PID
         info_layout.addWidget(self.lbl_pid)
         info_layout.addWidget(self.lbl_status)
+        info_layout.addWidget(self.lbl_outbox)
 
         # Input Grid Layout
         input_grid = QGridLayout()
@@ -207,7 +353,7 @@ class MainWindow(QMainWindow):
         controls_layout = QHBoxLayout()
         self.btn_capture = QPushButton("Capture (Space)")
         self.btn_capture.setShortcut("Space") # Map phím Space
-        self.btn_capture.clicked.connect(self.capture_image)
+        self.btn_capture.clicked.connect(lambda: self.triggers.press())
         self.btn_capture.setStyleSheet("background-color: #4CAF50; color: white; font-weight: bold; padding: 10px;")
         self.btn_capture.setEnabled(False) # Disable initially until Info is set
         
@@ -215,7 +361,10 @@ class MainWindow(QMainWindow):
         self.btn_reset.clicked.connect(self.reset_session)
         
         self.btn_export = QPushButton("Export PDF")
-        self.btn_export.clicked.connect(self.export_pdf)
+        self.btn_export.clicked.connect(lambda: self.export_pdf())
+
+        self.btn_shift_report = QPushButton("Shift Report")
+        self.btn_shift_report.clicked.connect(self.export_shift_report)
 
         self.btn_email = QPushButton("Send Email")
         self.btn_email.clicked.connect(self.send_email_action)
@@ -227,121 +376,26 @@ class MainWindow(QMainWindow):
         controls_layout.addWidget(self.btn_capture)
         controls_layout.addWidget(self.btn_reset)
         controls_layout.addWidget(self.btn_export)
+        controls_layout.addWidget(self.btn_shift_report)
         controls_layout.addWidget(self.btn_email)
         controls_layout.addWidget(self.btn_settings)
 
 
         left_layout.addWidget(info_group)
-        left_layout.addWidget(self.live_view_label, stretch=1)
+        left_layout.addWidget(self.live_view, stretch=1)
         left_layout.addLayout(controls_layout)
 
-        # --- RIGHT PANEL: IMAGE GRID (SCROLLABLE) ---
-        from PyQt6.QtWidgets import QScrollArea
+        # --- RIGHT PANEL: IMAGE GRID (VIRTUALIZED) ---
+        # Một QTableView cho cả template: chỉ vẽ ô đang hiện, thumbnail / ảnh NG load khi cần
         right_layout = QVBoxLayout()
-        
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-        scroll_content = QWidget()
-        scroll_layout = QVBoxLayout(scroll_content)
-        
-        # Updated QC Categories for display loop logic
-        self.qc_categories = [
-            "1. Linh kiện của adapter",
-            "2. Bụi bẩn",
-            "3. Các chân tiếp xúc của socket",
-            "4. Các điểm tiếp nối"
-        ]
-        self.image_widgets = []
-        
-        
-        # NG Example Images Map (based on PDF Generator logic)
-        ng_images_map = {
-             0: "Adapter Components.png",
-             1: "Foreign material.png",
-             2: "Pin.png",
-             3: "Pad.png"
-        }
-        pdf_img_dir = os.path.join(os.getcwd(), "pdf image")
 
-        for cat_idx in range(self.scan_categories_count):
-            cat_name = self.qc_categories[cat_idx]
-            group = QGroupBox(cat_name)
-            
-            # Use HBox to separate NG Example (Left) and Captured Images (Right)
-            group_layout = QHBoxLayout()
-            
-            # --- LEFT: NG Example Column ---
-            ng_container = QWidget()
-            ng_layout = QVBoxLayout(ng_container)
-            ng_layout.setContentsMargins(0, 0, 0, 0) # Right margin for spacing
-            
-            lbl_ng_title = QLabel("NG Example")
-            lbl_ng_title.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            lbl_ng_title.setStyleSheet("font-weight: bold; color: #D32F2F; font-size: 11px;")
-            
-            lbl_ng_img = ClickableLabel()
-            lbl_ng_img.setFixedSize(160, 120) # Slightly larger than captured thumbs
-            lbl_ng_img.setScaledContents(True)
-            lbl_ng_img.setStyleSheet("border: 2px solid #D32F2F; background-color: #f0f0f0; cursor: pointer;")
-            lbl_ng_img.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            
-            # Load Image
-            img_filename = ng_images_map.get(cat_idx, "")
-            current_ng_path = ""
-            if img_filename:
-                img_path = os.path.join(pdf_img_dir, img_filename)
-                if os.path.exists(img_path):
-                    current_ng_path = img_path
-                    pix = QPixmap(img_path)
-                    if not pix.isNull():
-                        lbl_ng_img.setPixmap(pix)
-                    else:
-                        lbl_ng_img.setText("Invalid Img")
-                else:
-                    lbl_ng_img.setText("Not Found")
-            else:
-                lbl_ng_img.setText("No Ref")
-
-            # Connect click signal using lambda to pass path
-            if current_ng_path:
-                # Need to capture current_ng_path in lambda default arg or it binds to last loop var
-                lbl_ng_img.clicked.connect(lambda p=current_ng_path: self.show_zoom_dialog(p))
-
-            ng_layout.addWidget(lbl_ng_title)
-            ng_layout.addWidget(lbl_ng_img)
-            ng_layout.addStretch() # Push to top
-            
-            group_layout.addWidget(ng_container)
-
-            # --- RIGHT: Captured Images Grid ---
-            grid_container = QWidget()
-            grid = QGridLayout(grid_container)
-            grid.setSpacing(5)
-            # Remove margins on grid container to align well
-            grid.setContentsMargins(0, 0, 0, 0)
-            
-            for i in range(8):
-                # 8 images per category
-                img_box = ImageBox(f"Pt {i+1}")
-                # Store index in widget for easy access
-                img_box.index = len(self.image_widgets)
-                img_box.right_clicked.connect(self.handle_image_right_click)
-                self.image_widgets.append(img_box)
-                # Arrange: 2 rows of 4
-                row = i // 4
-                col = i % 4
-                grid.addWidget(img_box, row, col)
-            
-            group_layout.addWidget(grid_container)
-            
-            group.setLayout(group_layout)
-            scroll_layout.addWidget(group)
-            
-        scroll_layout.addStretch() # Push everything up
-        scroll_content.setLayout(scroll_layout)
-        scroll_area.setWidget(scroll_content)
+        pdf_img_dir = os.path.abspath(resource_path("pdf image"))
+        self.grid_model = InspectionGridModel(self.template, self.session_model, pdf_img_dir, parent=self)
+        self.image_grid = InspectionGridView(self.grid_model)
+        self.image_grid.slot_right_clicked.connect(self.handle_slot_right_click)
+        self.image_grid.ng_clicked.connect(self.show_zoom_dialog)
 
-        right_layout.addWidget(scroll_area)
+        right_layout.addWidget(self.image_grid)
 
         # Add to Main Layout
         main_layout.addLayout(left_layout, stretch=6)
@@ -352,7 +406,7 @@ class MainWindow(QMainWindow):
         Catch mouse clicks specifically on the live view label.
         This helps if the MainWindow doesn't receive the event directly.
         """
-        if source == self.live_view_label and event.type() == QEvent.Type.MouseButtonPress:
+        if source == self.live_view and event.type() == QEvent.Type.MouseButtonPress:
             # self.capture_image() # Disable mouse click capture
             return True
         return super().eventFilter(source, event)
@@ -377,32 +431,27 @@ class MainWindow(QMainWindow):
              # self.capture_image() # Disable Global Mouse capture
              pass
 
-    @pyqtSlot(object)
-    def update_live_view(self, cv_img):
-        """Nhận frame từ thread và hiển thị lên UI"""
+    @pyqtSlot(object, float)
+    def update_live_view(self, cv_img, timestamp=None):
+        """Nhận frame từ thread và hiển thị lên UI (timestamp: lúc camera đọc xong frame)"""
         # Lưu frame hiện tại vào biến tạm để dùng khi chụp
         self.current_frame = cv_img.copy()
         
         # Logic SCAN PID
         if self.is_scanning and self.current_pid is None:
             # Throttle scan để không lag UI
-            import time
             if time.time() - self.last_scan_time > 0.5: # Scan mỗi 0.5s
                 pid = self.scanner.scan(cv_img)
                 if pid:
                     # Sound: Success Scan
-                    winsound.Beep(1000, 200) # 1000Hz, 200ms
+                    beep(1000, 200) # 1000Hz, 200ms
                     self.start_session(pid)
                 self.last_scan_time = time.time()
 
         # Vẽ hình chữ nhật định hướng chụp nếu cần (Optional)
         
-        # Convert để hiển thị
-        rgb_img = cv2.cvtColor(cv_img, cv2.COLOR_BGR2RGB)
-        h, w, ch = rgb_img.shape
-        bytes_per_line = ch * w
-        q_img = QImage(rgb_img.data, w, h, bytes_per_line, QImage.Format.Format_RGB888)
-        self.live_view_label.setPixmap(QPixmap.fromImage(q_img))
+        # Hiển thị: LiveView dùng thẳng current_frame (BGR), không convert / copy thêm
+        self.live_view.set_frame(self.current_frame, timestamp)
 
     def start_session(self, pid):
         """Bắt đầu phiên làm việc mới khi scan được PID"""
@@ -420,25 +469,33 @@ class MainWindow(QMainWindow):
         if os.path.exists(self.session_path):
             import  glob
             files = glob.glob(os.path.join(self.session_path, "*_*.jpg"))
+            files.append(os.path.join(self.session_path, SESSION_INFO_FILE))
             for f in files:
+                if not os.path.exists(f):
+                    continue
                 try:
                     os.remove(f)
                 except Exception as e:
                     print(f"Failed to cleanup old image {f}: {e}")
 
+        info = self.storage.save_session_info(self.session_path, pid,
+                                              self.txt_model.text().strip() or "N/A",
+                                              self.txt_inspector.text().strip() or "N/A")
+        event_log.log("session_start", pid=pid, model=info["model"], inspector=info["inspector"])
+        self.preset_category = None
+        self.apply_camera_preset()
+
     @pyqtSlot(str)
     def update_status(self, msg):
         self.lbl_status.setText(f"Status: {msg}")
         if "OFFLINE" in msg:
              self.lbl_status.setStyleSheet("font-size: 14px; font-weight: bold; color: red;")
-             self.live_view_label.setText("DINO-LITE OFFLINE")
+             self.live_view.setText("DINO-LITE OFFLINE")
         else:
              self.lbl_status.setStyleSheet("font-size: 14px; font-weight: bold; color: green;")
 
-    def populate_cameras(self):
-        """Lấy danh sách camera và đưa vào ComboBox"""
-        cameras = CameraThread.get_available_cameras()
-        
+    def populate_cameras(self, cameras):
+        """Đưa danh sách camera (từ CameraEnumThread) vào ComboBox"""
         # Block signals to prevent triggering change_camera while populating
         self.combo_cameras.blockSignals(True)
         self.combo_cameras.clear()
@@ -474,7 +531,8 @@ class MainWindow(QMainWindow):
             self.camera_thread.wait() # Chờ thread tắt hẳn
         
         # Start new thread
-        self.camera_thread = CameraThread(camera_id=camera_id)
+        self.camera_thread = CameraThread(camera_id=camera_id, history_size=self.config.get("frame_history_size", 15),
+                                          score_frames=self.capture_mode != "nearest")
         self.camera_thread.image_data.connect(self.update_live_view)
         self.camera_thread.status_update.connect(self.update_status)
         self.camera_thread.start()
@@ -487,7 +545,7 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Warning", "Please scan a socket info first!")
             return
 
-        if self.current_image_count < 32:
+        if self.current_image_count < self.total_images:
             # Simple sequential logic if needed
             idx = self.current_image_count
             # ... (Logic below is actually unused because we use find_first_empty_slot logic mostly, but let's keep it consistent)
@@ -497,10 +555,10 @@ class MainWindow(QMainWindow):
             # With 32 images and grid, the loop logic in next block usually takes precedence.
             pass 
             
-            if self.current_image_count == 32:
+            if self.current_image_count == self.total_images:
                 QMessageBox.information(self, "Finished", "Session Completed! You can Export PDF now.")
         else:
-             QMessageBox.warning(self, "Full", "Completed 32 images. Please Export or start New Session.")
+             QMessageBox.warning(self, "Full", f"Completed {self.total_images} images. Please Export or start New Session.")
 
     def set_info(self):
         """Khóa input và bắt đầu cho phép chụp"""
@@ -519,6 +577,12 @@ class MainWindow(QMainWindow):
         self.txt_inspector.setEnabled(False)
         self.btn_set_info.setEnabled(False)
         self.btn_set_info.setText("Info Locked (Ready)")
+
+        if self.session_path:
+            self.storage.save_session_info(self.session_path, self.current_pid,
+                                           self.txt_model.text().strip(), self.txt_inspector.text().strip())
+        event_log.log("session_info", pid=self.current_pid, model=self.txt_model.text().strip(),
+                      inspector=self.txt_inspector.text().strip())
         
         # Enable Capture
         self.btn_capture.setEnabled(True)
@@ -531,7 +595,9 @@ class MainWindow(QMainWindow):
         if confirm == QMessageBox.StandardButton.No:
             return
 
-        self.current_image_count = 0
+        event_log.log("session_reset", pid=self.current_pid, filled=self.session_model.filled_count)
+        self.triggers.clear() # Lần bấm còn chờ frame không được lưu vào phiên sau
+        self.session_model.reset()
         self.current_pid = None
         self.session_path = None
         self.is_scanning = True # Bật lại scan
@@ -539,10 +605,6 @@ class MainWindow(QMainWindow):
         self.lbl_pid.setText("Socket info: [Scanning...]")
         self.update_status("Waiting for socket info scan...")
         
-        # Reset Widgets
-        for box in self.image_widgets:
-            box.reset()
-            
         # Unlock inputs for new session
         self.txt_model.setEnabled(True)
         self.txt_inspector.setEnabled(True)
@@ -550,11 +612,25 @@ class MainWindow(QMainWindow):
         self.btn_set_info.setText("Start Inspection (Set Info)")
         self.btn_capture.setEnabled(False)
 
-    def export_pdf(self):
+    def create_pdf_generator(self):
+        from core.pdf_generator import PDFGenerator # ReportLab chỉ import khi xuất PDF lần đầu
+        # Cũng được gọi từ OutboxWorker: chỉ đọc pdf_settings. pdf_archival: xuất PDF/A-2b cho lưu trữ lâu dài
+        engine, pdfa = self.pdf_settings
+        return PDFGenerator(self.template, engine=engine, pdfa=pdfa)
+
+    def export_pdf(self, on_success=None):
+        """
+        Xuất PDF trong PDFExportThread để UI không bị đơ.
+        on_success: callable(pdf_path) gọi sau khi xuất xong (VD: gửi email tiếp).
+        """
         if not self.current_pid or not self.session_path:
              QMessageBox.warning(self, "Warning", "No active session to export!")
              return
 
+        if self.export_thread is not None and self.export_thread.isRunning():
+            self.update_status("PDF export already in progress...")
+            return
+
         # Nhập thông tin bổ sung (Lấy từ UI)
         model_name = self.txt_model.text().strip()
         inspector_name = self.txt_inspector.text().strip()
@@ -564,106 +640,241 @@ class MainWindow(QMainWindow):
         if not inspector_name:
             inspector_name = "N/A"
 
-        try:
-            generator = PDFGenerator()
+        pid = self.current_pid
+        session_path = self.session_path
+        self.storage.save_session_info(session_path, pid, model_name, inspector_name)
+        generator = self.create_pdf_generator()
+
+        def job(progress_callback, cancel_check):
             # Pass extra info to generator
-            pdf_path = generator.generate_report(self.current_pid, self.session_path, model_name, inspector_name)
-            
-            if pdf_path:
-                QMessageBox.information(self, "Success", f"PDF Exported successfully:\n{pdf_path}")
-                os.startfile(pdf_path)
-            else:
-                QMessageBox.critical(self, "Error", "Failed to generate PDF.")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"An error occurred: {str(e)}")
+            return generator.generate_report(pid, session_path, model_name, inspector_name,
+                                             progress_callback=progress_callback,
+                                             cancel_check=cancel_check)
+
+        self.start_export_job(job, "images", on_success)
+
+    def export_shift_report(self):
+        """Xuất một PDF gộp tất cả socket đã kiểm tra trong ca (shift_hours gần nhất)."""
+        if self.export_thread is not None and self.export_thread.isRunning():
+            self.update_status("PDF export already in progress...")
+            return
+
+        shift_hours = self.config.get("shift_hours", 8)
+        now = datetime.datetime.now()
+        sessions = self.storage.list_sessions(since=now - datetime.timedelta(hours=shift_hours))
+        if not sessions:
+            QMessageBox.warning(self, "Warning", f"No sessions found in the last {shift_hours} hours!")
+            return
+
+        pdf_path = os.path.join(self.storage.base_dir, f"Shift_Report_{now.strftime('%Y%m%d_%H%M')}.pdf")
+        generator = self.create_pdf_generator()
+
+        def job(progress_callback, cancel_check):
+            return generator.generate_combined_report(sessions, pdf_path,
+                                                      progress_callback=progress_callback,
+                                                      cancel_check=cancel_check)
+
+        self.start_export_job(job, "pages")
+
+    def start_export_job(self, job, unit, on_success=None):
+        """Chạy job xuất PDF trong PDFExportThread với progress dialog có nút Cancel."""
+        from core.export_worker import PDFExportThread
+        self.export_unit = unit
+        self.export_started = time.perf_counter()
+        event_log.log("export_start", kind="session" if unit == "images" else "shift", pid=self.current_pid)
+        self.export_progress = QProgressDialog("Exporting PDF...", "Cancel", 0, 0, self)
+        self.export_progress.setWindowTitle("Export PDF")
+        self.export_progress.setWindowModality(Qt.WindowModality.WindowModal)
+        self.export_progress.setMinimumDuration(0)
+        self.export_progress.setAutoClose(False)
+        self.export_progress.setAutoReset(False)
+
+        self.export_thread = PDFExportThread(job, parent=self)
+        self.export_thread.progress.connect(self.on_export_progress)
+        self.export_thread.export_done.connect(lambda path: self.on_export_done(path, on_success))
+        self.export_thread.export_failed.connect(self.on_export_failed)
+        self.export_thread.export_cancelled.connect(self.on_export_cancelled)
+        self.export_thread.finished.connect(self.on_export_finished)
+        self.export_progress.canceled.connect(self.export_thread.cancel)
+
+        self.btn_export.setEnabled(False)
+        self.btn_shift_report.setEnabled(False)
+        self.btn_email.setEnabled(False)
+        self.update_status("Exporting PDF...")
+        self.export_thread.start()
+
+    @pyqtSlot(int, int)
+    def on_export_progress(self, done, total):
+        if self.export_progress is None:
+            return
+        self.export_progress.setMaximum(max(total, 1))
+        self.export_progress.setValue(done)
+        self.export_progress.setLabelText(f"Exporting PDF... ({done}/{total} {self.export_unit})")
+
+    def on_export_done(self, pdf_path, on_success=None):
+        event_log.log("export_done", path=pdf_path, bytes=os.path.getsize(pdf_path),
+                      duration_ms=elapsed_ms(self.export_started))
+        self.update_status("PDF Exported.")
+        self.close_export_progress()
+        QMessageBox.information(self, "Success", f"PDF Exported successfully:\n{pdf_path}")
+        os.startfile(pdf_path)
+        if on_success:
+            on_success(pdf_path)
+
+    @pyqtSlot(str)
+    def on_export_failed(self, msg):
+        event_log.log("export_failed", error=msg, duration_ms=elapsed_ms(self.export_started))
+        self.update_status("PDF Export Failed.")
+        self.close_export_progress()
+        QMessageBox.critical(self, "Error", f"Failed to generate PDF.\n{msg}")
+
+    @pyqtSlot()
+    def on_export_cancelled(self):
+        event_log.log("export_cancelled", duration_ms=elapsed_ms(self.export_started))
+        self.close_export_progress()
+        self.update_status("PDF Export Cancelled.")
+
+    @pyqtSlot()
+    def on_export_finished(self):
+        self.btn_export.setEnabled(True)
+        self.btn_shift_report.setEnabled(True)
+        self.btn_email.setEnabled(True)
+        self.export_thread = None
+
+    def close_export_progress(self):
+        if self.export_progress is not None:
+            self.export_progress.close()
+            self.export_progress = None
     
-    def capture_image(self):
+    def capture_image(self, press_time=None):
+        """Lưu frame của lần bấm lúc press_time (time.perf_counter(), chọn theo capture_mode) vào ô trống đầu tiên"""
         if not hasattr(self, 'current_frame') or self.current_frame is None:
             return
 
         if self.current_pid is None:
             QMessageBox.warning(self, "Warning", "Please scan a PID first!")
             return
-        
-        # Check cooldown 1.0s
-        import time
-        current_time = time.time()
-        if hasattr(self, 'last_capture_time') and (current_time - self.last_capture_time < 1.0):
-            return
+
+        frame, frame_info = self.select_capture_frame(press_time)
+        capture_start = metrics.now()
+        log_start = time.perf_counter()
 
         # Find first empty slot
-        target_idx = -1
-        for i in range(self.total_images):
-            # Check if widget has an image. 
-            # Note: reset() clears pixmap so it should be None.
-            box = self.image_widgets[i]
-            if box.image_label.pixmap() is None or box.image_label.pixmap().isNull():
-                target_idx = i
-                break
+        target_idx = self.session_model.first_free()
         
         if target_idx == -1:
-             QMessageBox.warning(self, "Full", "Session is Full (32 images). Please Export or start New Session.")
+             QMessageBox.warning(self, "Full", f"Session is Full ({self.total_images} images). Please Export or start New Session.")
              return
 
         # Use target_idx instead of current_image_count logic for position
         idx = target_idx
         
         # Determine Category and Point Index
-        cat_idx = idx // 8
-        point_idx = (idx % 8) + 1
-        cat_name_raw = self.qc_categories[cat_idx]
+        cat_idx, point_idx = self.template.slots[idx]
+        category = self.template.categories[cat_idx]
+        cat_name_raw = category.label
         
         # Clean category name for filename
-        parts = cat_name_raw.split(". ", 1)
-        cat_num = parts[0]
-        cat_text = parts[-1] if len(parts) > 1 else parts[0]
-        cat_name_clean = cat_text.replace(" ", "_").replace(",", "")
+        file_suffix = category.file_prefix
         
-        file_suffix = f"{cat_num}_{cat_name_clean}"
-        
-        saved_path = self.storage.save_image(self.session_path, self.current_frame, file_suffix, point_idx)
+        saved_path = self.storage.save_image(self.session_path, frame, file_suffix, point_idx)
         
         if saved_path:
-            winsound.Beep(2000, 100)
-            self.image_widgets[idx].set_image(image_path=saved_path)
-            # Store path in widget for deletion reference
-            self.image_widgets[idx].current_image_path = saved_path
+            metrics.observe("capture_to_saved", capture_start)
+            metrics.inc("captures")
+            beep(2000, 100)
+            self.session_model.fill(idx, saved_path) # Grid tự vẽ lại ô qua signal của model
+            event_log.log("capture", pid=self.current_pid, slot=idx, category=category.name, point=point_idx,
+                          path=saved_path, duration_ms=elapsed_ms(log_start), **frame_info)
+        else:
+            event_log.log("capture_failed", pid=self.current_pid, slot=idx, category=category.name, point=point_idx)
         
-        # Recalculate count based on filled slots for status
-        filled_count = sum(1 for w in self.image_widgets if w.image_label.pixmap() is not None and not w.image_label.pixmap().isNull())
-        self.current_image_count = filled_count # Sync counter
+        filled_count = self.session_model.filled_count
         
         self.update_status(f"Captured: {cat_name_raw} - Pt {point_idx} ({filled_count}/{self.total_images})")
         
-        self.last_capture_time = current_time
-        
         if filled_count == self.total_images:
             QMessageBox.information(self, "Finished", "Session Completed! Auto-exporting PDF...")
             self.export_pdf()
 
-    def handle_image_right_click(self, widget):
-        if not widget.image_label.pixmap() or widget.image_label.pixmap().isNull():
-            return # Ignore empty widgets
+    def capture_time(self, press_time):
+        """Thời điểm chọn frame: lúc bấm, hoặc lúc preset camera gửi xong nếu lần bấm đến trước đó"""
+        return max(press_time, self.preset_applied_at)
+
+    def capture_ready(self, press_time):
+        """
+        TriggerQueue hỏi trước khi chụp: chờ preset camera đang gửi, sau đó best_next cần capture_best_of
+        frame sau lúc bấm, sharpest cần đọc hết ± capture_window_ms quanh lúc bấm.
+        Camera đứng / chậm thì không chờ quá CAPTURE_WAIT_S (PRESET_WAIT_S với preset).
+        """
+        if self.presets_pending and time.perf_counter() - press_time < PRESET_WAIT_S:
+            return False
+        if not hasattr(self, 'camera_thread'):
+            return True
+        start = self.capture_time(press_time)
+        if time.perf_counter() - start > CAPTURE_WAIT_S:
+            return True
+        history = self.camera_thread.history
+        if self.capture_mode == "best_next":
+            return history.count_since(start) >= self.capture_best_of
+        if self.capture_mode == "sharpest":
+            return history.count_since(start + self.capture_window) > 0
+        return len(history) > 0 # Vừa đổi preset: chờ frame đầu tiên sau preset
+
+    def select_capture_frame(self, press_time):
+        """
+        Frame cho lần bấm lúc press_time theo capture_mode, lấy từ history của camera thread.
+        Returns: (frame, dict cho log: skew_ms = thời điểm frame - capture_time(), focus_score, select_ms = từ lúc bấm
+        đến khi chọn xong).
+        """
+        if press_time is None or not hasattr(self, 'camera_thread'):
+            return self.current_frame, {}
+        history = self.camera_thread.history
+        start = self.capture_time(press_time)
+        if self.capture_mode == "sharpest":
+            match = history.select(start, self.capture_window, focus_score)
+        elif self.capture_mode in ("best_next", "best_previous"):
+            # capture_ready đã chờ đủ frame (hoặc hết CAPTURE_WAIT_S): chọn trong các frame đang có
+            after = self.capture_mode == "best_next"
+            match = history.best_of(start, self.capture_best_of, after, focus_score, partial=True)
+            match = match or history.select(start)
+        else:
+            match = history.select(start)
+        if match is None:
+            return self.current_frame, {}
+        frame, frame_time, score = match
+        skew = frame_time - start
+        selected = time.perf_counter() - press_time
+        metrics.record("capture_skew", abs(skew))
+        metrics.record("capture_select", selected)
+        info = {"skew_ms": round(skew * 1000, 1), "select_ms": round(selected * 1000, 1)}
+        if score is not None:
+            info["focus_score"] = round(score, 1)
+        return frame, info
+
+    def handle_slot_right_click(self, index):
+        if not self.session_model.is_filled(index):
+            return # Ignore empty slots
 
         reply = QMessageBox.question(self, "Delete Image", 
-                                     f"Delete image at {widget.title_label.text()}?",
+                                     f"Delete image at Pt {self.template.slots[index][1]}?",
                                      QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         
         if reply == QMessageBox.StandardButton.Yes:
-            # Clear widget
-            widget.reset()
-            # Also try to delete file if we stored path
-            if hasattr(widget, 'current_image_path') and widget.current_image_path:
+            # Clear slot and delete the file
+            image_path = self.session_model.clear(index)
+            event_log.log("image_deleted", pid=self.current_pid, slot=index, path=image_path)
+            if image_path:
                 try:
-                    os.remove(widget.current_image_path)
+                    os.remove(image_path)
                 except OSError:
                     pass
-                widget.current_image_path = None
             
-            # Update status count
-            filled_count = sum(1 for w in self.image_widgets if w.image_label.pixmap() is not None and not w.image_label.pixmap().isNull())
-            self.current_image_count = filled_count
-            self.update_status(f"Image Deleted. ({filled_count}/{self.total_images})")
+            self.update_status(f"Image Deleted. ({self.session_model.filled_count}/{self.total_images})")
+
+    def on_slot_counts_changed(self, filled, total):
+        self.current_image_count = filled # Sync counter
+        self.apply_camera_preset() # Ô tiếp theo có thể sang category khác
 
     def show_zoom_dialog(self, image_path):
         """Show the image in a larger dialog"""
@@ -673,11 +884,70 @@ class MainWindow(QMainWindow):
         dialog.exec()
 
     def closeEvent(self, event):
-        self.camera_thread.stop()
+        self.triggers.clear()
+        if self.export_thread is not None and self.export_thread.isRunning():
+            self.export_thread.cancel()
+            self.export_thread.wait()
+        self.digest_scheduler.stop()
+        if self.digest_thread is not None:
+            self.digest_thread.wait()
+        self.outbox_worker.stop()
+        # Camera chỉ có sau khi CameraEnumThread tìm thấy thiết bị
+        self.camera_enum_thread.wait()
+        # Không chờ mãi nếu thiết bị đang treo trong một lệnh DLL
+        self.dino.shutdown(2000)
+        if hasattr(self, 'camera_thread'):
+            self.camera_thread.stop()
         if hasattr(self, 'input_listener'):
             self.input_listener.stop()
+        if self.profiler_thread is not None:
+            self.profiler_thread.stop()
+            self.profiler_thread.wait()
+        self.dump_metrics()
         event.accept()
 
+    def start_profiling(self):
+        if self.profiler_thread is not None:
+            self.update_status("Profiler is already recording.")
+            return
+        seconds = self.config.get("profile_seconds", 10)
+        out_dir = self.session_path or self.storage.base_dir
+        self.profiler_thread = ProfilerThread(seconds, out_dir, parent=self)
+        self.profiler_thread.profile_saved.connect(self.on_profile_saved)
+        self.profiler_thread.profile_failed.connect(lambda msg: self.update_status(f"Profiling failed: {msg}"))
+        self.profiler_thread.finished.connect(self.on_profiling_finished)
+        self.profiler_thread.start()
+        self.update_status(f"Profiling for {seconds}s...")
+
+    def on_profile_saved(self, path, samples):
+        self.update_status(f"Profile saved ({samples} samples): {path}")
+
+    def on_profiling_finished(self):
+        self.profiler_thread.deleteLater()
+        self.profiler_thread = None
+
+    def toggle_diagnostics(self):
+        self.diagnostics_dock.setVisible(not self.diagnostics_dock.isVisible())
+
+    def pending_work(self):
+        """Các hàng đợi cho bảng chẩn đoán (ảnh chụp được lưu ngay nên không có hàng đợi lưu)"""
+        exporting = self.export_thread is not None and self.export_thread.isRunning()
+        return {"email outbox": self.outbox_queued, "PDF export": int(exporting), "DNX64 calls": self.dino.pending(),
+                "capture triggers": self.triggers.pending()}
+
+    def dump_metrics(self, show_status=False):
+        """Ghi counter / histogram độ trễ ra metrics.json (chỉ khi bật metrics_enabled)"""
+        if not metrics.enabled:
+            if show_status:
+                self.update_status("Metrics disabled (set metrics_enabled in config.json)")
+            return
+        try:
+            metrics.dump(self.metrics_path)
+            if show_status:
+                self.update_status(f"Metrics saved: {self.metrics_path}")
+        except Exception as e:
+            print(f"Error saving metrics: {e}")
+
     def load_config(self):
         config_path = "config.json"
         default_config = {
@@ -700,9 +970,21 @@ class MainWindow(QMainWindow):
             with open("config.json", 'w') as f:
                 json.dump(new_config, f, indent=4)
             self.config = new_config
+            self.update_worker_settings()
         except Exception as e:
             print(f"Error saving config: {e}")
 
+    def update_worker_settings(self):
+        """
+        Chụp cấu hình cho thread nền (gọi ở GUI thread sau khi load / lưu config). Mỗi nhóm là một
+        tuple bất biến thay bằng một phép gán: OutboxWorker / thread tạo lại PDF đọc một lần
+        là có bộ giá trị nhất quán, không đọc self.config trong lúc dialog Settings đang ghi.
+        """
+        config = self.config
+        self.smtp_settings = (config.get("smtp_server", "smtp.gmail.com"), config.get("smtp_port", 587),
+                              config.get("sender_email", ""), config.get("password", ""))
+        self.pdf_settings = (config.get("pdf_engine", "table"), config.get("pdf_archival", False))
+
     def open_settings_dialog(self):
         dialog = QDialog(self)
         dialog.setWindowTitle("Email Settings")
@@ -714,12 +996,15 @@ class MainWindow(QMainWindow):
         txt_password = QLineEdit(self.config.get("password", ""))
         txt_password.setEchoMode(QLineEdit.EchoMode.Password)
         txt_recipient = QLineEdit(self.config.get("recipient_email", ""))
+        txt_digest = QLineEdit(", ".join(map(str, self.config.get("digest_times", []))))
+        txt_digest.setPlaceholderText("VD: 06:00, 14:00, 22:00 (trống = tắt)")
         
         layout.addRow("SMTP Server:", txt_server)
         layout.addRow("Port:", txt_port)
         layout.addRow("Sender Email:", txt_sender)
         layout.addRow("Password (App Pwd):", txt_password)
         layout.addRow("Default Recipient:", txt_recipient)
+        layout.addRow("Digest Times:", txt_digest)
         
         buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
         buttons.accepted.connect(dialog.accept)
@@ -727,14 +1012,18 @@ class MainWindow(QMainWindow):
         layout.addRow(buttons)
         
         if dialog.exec():
-            new_conf = {
+            # Giữ lại các key khác (template, shift_hours, ...) khi lưu
+            new_conf = dict(self.config)
+            new_conf.update({
                 "smtp_server": txt_server.text(),
                 "smtp_port": int(txt_port.text()) if txt_port.text().isdigit() else 587,
                 "sender_email": txt_sender.text(),
                 "password": txt_password.text(),
-                "recipient_email": txt_recipient.text()
-            }
+                "recipient_email": txt_recipient.text(),
+                "digest_times": self.parse_digest_times(txt_digest.text())
+            })
             self.save_config(new_conf)
+            self.restart_digest_scheduler()
             QMessageBox.information(self, "Saved", "Settings saved successfully!")
 
     def send_email_action(self):
@@ -755,11 +1044,9 @@ class MainWindow(QMainWindow):
             # Try to auto-export first if not exists?
             reply = QMessageBox.question(self, "PDF Not Found", "PDF Report not found. Export now?", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
             if reply == QMessageBox.StandardButton.Yes:
-                self.export_pdf()
-                if not os.path.exists(pdf_path):
-                    return # Still failed
-            else:
-                return
+                # Export chạy nền, gửi email tiếp khi export xong
+                self.export_pdf(on_success=lambda path: self.send_email_action())
+            return
 
         # 2. Get Config
         recipient = self.config.get("recipient_email", "")
@@ -770,14 +1057,6 @@ class MainWindow(QMainWindow):
              else:
                  return
         
-        # 3. Send
-        sender = EmailSender(
-            smtp_server=self.config.get("smtp_server", "smtp.gmail.com"),
-            smtp_port=self.config.get("smtp_port", 587),
-            sender_email=self.config.get("sender_email", ""),
-            password=self.config.get("password", "")
-        )
-        
         # Format Subject: [QA] [Socket Inspection] [Model] [Socket Name] [Pass]
         model_name = self.txt_model.text().strip() or "N/A"
         socket_name = self.current_pid or "N/A"
@@ -805,24 +1084,91 @@ class MainWindow(QMainWindow):
         </html>
         """
         
-        # UI Feedback - maybe show a progress dialog or simple wait cursor
-        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
-        self.update_status("Sending Email...")
-        
-        success, msg = sender.send_email(
-            recipient_email=recipient,
-            subject=subject,
-            body=body_html,
-            attachment_path=pdf_path,
-            is_html=True
-        )
-        
-        QApplication.restoreOverrideCursor()
-        
-        if success:
-            QMessageBox.information(self, "Success", f"Email sent to {recipient}")
-            self.update_status("Email Sent Successfully.")
-        else:
-            QMessageBox.critical(self, "Error", f"Failed to send email:\n{msg}")
-            self.update_status("Email Sending Failed.")
+        # 3. Enqueue - OutboxWorker gửi nền, UI không bị chặn
+        item_id = self.outbox.enqueue(recipient, subject, body_html, attachment_path=pdf_path, is_html=True)
+        event_log.log("email_queued", item_id=item_id, recipient=recipient, pid=self.current_pid)
+        self.outbox_worker.wake()
+        self.update_status(f"Email queued (#{item_id}) to {recipient}.")
+
+    @staticmethod
+    def parse_digest_times(text):
+        times = []
+        for part in text.replace(";", ",").split(","):
+            part = part.strip()
+            try:
+                datetime.datetime.strptime(part, "%H:%M")
+            except ValueError:
+                continue
+            times.append(part)
+        return times
+
+    def restart_digest_scheduler(self):
+        self.digest_scheduler.stop()
+        self.digest_scheduler.set_schedule(self.config.get("digest_times", []), self.config.get("shift_hours", 8))
+        self.digest_scheduler.start()
+
+    def send_digest(self, since, until):
+        """
+        Dựng digest trong DigestThread (không chặn màn hình chụp) rồi đưa vào outbox.
+        Scheduler đã đánh dấu mốc là đã gửi: digest trước còn đang dựng thì xếp hàng, không bỏ.
+        """
+        self.pending_digests.append((since, until))
+        if self.digest_thread is not None and self.digest_thread.isRunning():
+            print(f"Digest {since:%Y-%m-%d %H:%M} - {until:%H:%M} queued: previous digest still running.")
+            event_log.log("digest_deferred", since=since.isoformat(), until=until.isoformat(),
+                          pending=len(self.pending_digests))
+            self.update_status("Digest queued: previous digest still running.")
+            return
+        self.start_next_digest()
+
+    def start_next_digest(self):
+        if not self.pending_digests:
+            return
+        since, until = self.pending_digests.popleft()
+        recipient = self.config.get("recipient_email", "")
+        if not recipient:
+            self.update_status("Digest skipped: no default recipient.")
+            event_log.log("digest_skipped", since=since.isoformat(), until=until.isoformat(), reason="no recipient")
+            self.start_next_digest()
+            return
 
+        self.digest_thread = DigestThread(self.storage, self.outbox, recipient, since, until, parent=self)
+        self.digest_thread.finished.connect(self.start_next_digest)
+        self.digest_thread.digest_queued.connect(self.on_digest_queued)
+        self.digest_thread.digest_skipped.connect(lambda msg: self.update_status(f"Digest skipped: {msg}"))
+        self.digest_thread.digest_failed.connect(lambda msg: self.update_status(f"Digest Failed: {msg}"))
+        self.digest_thread.start()
+
+    @pyqtSlot(int, int)
+    def on_digest_queued(self, item_id, count):
+        event_log.log("email_queued", item_id=item_id, kind="digest", sockets=count)
+        self.outbox_worker.wake()
+        self.update_status(f"Digest email queued (#{item_id}, {count} sockets).")
+
+    def create_email_sender(self):
+        # Gọi từ OutboxWorker: dùng lại cùng EmailSender (giữ kết nối SMTP) khi cấu hình không đổi
+        key = self.smtp_settings # Đọc snapshot một lần, không đọc self.config từ thread này
+        if self.email_sender is None or self.email_sender_key != key:
+            from core.email_sender import EmailSender # smtplib / email chỉ import khi gửi mail lần đầu
+            self.email_sender = EmailSender(
+                smtp_server=key[0],
+                smtp_port=key[1],
+                sender_email=key[2],
+                password=key[3]
+            )
+            self.email_sender_key = key
+        return self.email_sender
+
+    @pyqtSlot(int, int, int)
+    def update_outbox_counts(self, queued, sent, failed):
+        self.outbox_queued = queued
+        self.lbl_outbox.setText(f"Email: {queued} queued | {sent} sent | {failed} failed")
+
+    @pyqtSlot(int, str)
+    def on_email_sent(self, item_id, recipient):
+        self.update_status(f"Email #{item_id} sent to {recipient}.")
+
+    @pyqtSlot(int, str)
+    def on_email_failed(self, item_id, error):
+        self.update_status(f"Email #{item_id} Sending Failed.")
+        QMessageBox.critical(self, "Error", f"Failed to send email #{item_id}:\n{error}")
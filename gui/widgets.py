@@ -1,14 +1,10 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QFrame, QDialog, QScrollArea, QSizePolicy
-from PyQt6.QtCore import Qt, pyqtSignal
-from PyQt6.QtGui import QPixmap, QImage
-import cv2
-
-class ClickableLabel(QLabel):
-    clicked = pyqtSignal()
-    def mousePressEvent(self, event):
-        if event.button() == Qt.MouseButton.LeftButton:
-            self.clicked.emit()
-        super().mousePressEvent(event)
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QDialog, QScrollArea
+from PyQt6.QtCore import Qt, QTimer, QRect
+from PyQt6.QtGui import QPixmap, QImage, QPainter, QColor
+import time
+from collections import deque
+
+from core.metrics import metrics
 
 class ZoomDialog(QDialog):
     def __init__(self, image_path, title="Zoom Image", parent=None):
@@ -36,81 +32,133 @@ class ZoomDialog(QDialog):
         scroll_area.setWidget(img_label)
         layout.addWidget(scroll_area)
 
-class ImageBox(QWidget):
+class LiveFrameMixin:
     """
-    Widget hiển thị một ô ảnh (thumbnail) với tiêu đề.
+    Phần chung của các widget live view (LiveView, GLLiveView): nhận frame,
+    gộp / giới hạn số lần vẽ theo tần số quét màn hình, tính hình chữ nhật
+    giữ tỉ lệ và đo độ trễ frame -> màn hình. Lớp con gọi _init_live_view()
+    trong __init__ và _frame_painted() sau mỗi lần vẽ.
     """
-    clicked = pyqtSignal(str) # Signal emit khi click vào box (optional hook)
-    right_clicked = pyqtSignal(object) # Signal emit khi right click, send self
-
-    def __init__(self, title="Image", parent=None):
-        super().__init__(parent)
-        self.layout = QVBoxLayout()
-        self.layout.setContentsMargins(2, 2, 2, 2)
-        self.layout.setSpacing(2)
-        
-        # Frame bao ngoài để tạo viền
-        self.frame = QFrame()
-        self.frame.setFrameShape(QFrame.Shape.Box)
-        self.frame.setFrameShadow(QFrame.Shadow.Plain)
-        self.frame.setLineWidth(1)
-        
-        self.frame_layout = QVBoxLayout(self.frame)
-        self.frame_layout.setContentsMargins(0, 0, 0, 0)
-        self.frame_layout.setSpacing(0)
-
-        # Label hiển thị ảnh
-        self.image_label = QLabel()
-        self.image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.image_label.setStyleSheet("background-color: #e0e0e0;") # Placeholder color
-        self.image_label.setMinimumSize(80, 60) # Kích thước tối thiểu
-        self.image_label.setScaledContents(False) # Tắt auto-stretch làm méo ảnh
+    DEFAULT_REFRESH_HZ = 60.0
 
+    def _init_live_view(self, text):
+        self._text = text
+        self._image = None
+        self._frame = None # Giữ numpy array sống khi QImage còn trỏ vào dữ liệu
+        self._frame_time = None
+        self._target_rect = None
+        self._last_paint = 0.0
+        self._repaint_timer = QTimer(self)
+        self._repaint_timer.setSingleShot(True)
+        self._repaint_timer.timeout.connect(self.update)
+        self._latencies = deque(maxlen=300)
+        self.frames_received = 0
+        self.frames_painted = 0
 
-        # Label tiêu đề (VD: Top 1, Bot 1)
-        self.title_label = QLabel(title)
-        self.title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.title_label.setStyleSheet("font-weight: bold; font-size: 10px;")
+    def setText(self, text):
+        """Hiện thông báo (VD: "DINO-LITE OFFLINE") thay cho hình."""
+        self._text = text
+        self._image = None
+        self._frame = None
+        self._target_rect = None
+        self.update()
 
-        self.frame_layout.addWidget(self.image_label, stretch=1)
-        self.frame_layout.addWidget(self.title_label, stretch=0)
-
-        self.layout.addWidget(self.frame)
-        self.setLayout(self.layout)
-        
-        # FIX: Set fixed size to avoid ugly stretching when maximized
-        self.setFixedSize(110, 90)
-    
-    def mousePressEvent(self, event):
-        if event.button() == Qt.MouseButton.RightButton:
-            self.right_clicked.emit(self)
-        super().mousePressEvent(event)
-    
-    def set_image(self, image_path=None, cv_img=None):
+    def set_frame(self, cv_img, timestamp=None):
         """
-        Hiển thị ảnh lên label. Hỗ trợ cả đường dẫn file hoặc ảnh OpenCV.
+        Nhận frame OpenCV (BGR). Không copy: không được ghi vào cv_img sau khi gọi.
+        timestamp: time.perf_counter() lúc có frame (mặc định: lúc gọi).
         """
-        pixmap = None
-        if cv_img is not None:
-            # Convert OpenCV image (BGR) to QPixmap
-            height, width, channel = cv_img.shape
-            bytes_per_line = 3 * width
-            q_img = QImage(cv_img.data, width, height, bytes_per_line, QImage.Format.Format_RGB888).rgbSwapped()
-            pixmap = QPixmap.fromImage(q_img)
-        elif image_path:
-            pixmap = QPixmap(image_path)
-        
-        if pixmap and not pixmap.isNull():
-            # Scale ảnh vừa khung nhưng giữ tỉ lệ
-            scaled_pixmap = pixmap.scaled(self.image_label.size(), 
-                                          Qt.AspectRatioMode.KeepAspectRatio, 
-                                          Qt.TransformationMode.SmoothTransformation)
-            self.image_label.setPixmap(scaled_pixmap)
+        if not cv_img.flags["C_CONTIGUOUS"]:
+            cv_img = cv_img.copy() # QImage / texture upload cần các pixel liền nhau
+        height, width = cv_img.shape[:2]
+        if self._image is None or self._image.width() != width or self._image.height() != height:
+            self._target_rect = None
+        self._frame = cv_img
+        self._image = QImage(cv_img.data, width, height, cv_img.strides[0], QImage.Format.Format_BGR888)
+        self._frame_time = timestamp if timestamp is not None else time.perf_counter()
+        self.frames_received += 1
+        self._schedule_repaint()
+
+    def _schedule_repaint(self):
+        if self._repaint_timer.isActive():
+            return # Đã hẹn vẽ, frame mới sẽ được vẽ thay frame cũ
+        interval = 1.0 / self.refresh_rate()
+        wait = interval - (time.perf_counter() - self._last_paint)
+        if wait <= 0:
+            self.update()
         else:
-            self.image_label.clear()
-            self.image_label.setText("No Image")
+            self._repaint_timer.start(int(wait * 1000))
+
+    def refresh_rate(self):
+        screen = self.screen()
+        rate = screen.refreshRate() if screen is not None else 0
+        return rate if rate > 0 else self.DEFAULT_REFRESH_HZ
+
+    def target_rect(self):
+        """Hình chữ nhật giữ tỉ lệ, căn giữa widget. Cache tới khi resize / đổi cỡ frame."""
+        if self._target_rect is None and self._image is not None:
+            img_w, img_h = self._image.width(), self._image.height()
+            scale = min(self.width() / img_w, self.height() / img_h)
+            w, h = int(img_w * scale), int(img_h * scale)
+            self._target_rect = QRect((self.width() - w) // 2, (self.height() - h) // 2, w, h)
+        return self._target_rect
+
+    def resizeEvent(self, event):
+        self._target_rect = None
+        super().resizeEvent(event)
+
+    def _paint_with_painter(self, painter):
+        """Vẽ bằng QPainter (đường raster, và fallback của GLLiveView)."""
+        painter.fillRect(self.rect(), QColor("black"))
+        if self._image is not None:
+            painter.drawImage(self.target_rect(), self._image)
+        elif self._text:
+            painter.setPen(QColor("white"))
+            painter.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter, self._text)
+
+    def _frame_painted(self):
+        self._last_paint = time.perf_counter()
+        if self._frame_time is not None:
+            self._latencies.append(self._last_paint - self._frame_time)
+            metrics.record("frame_emit_to_display", self._last_paint - self._frame_time)
+            self._frame_time = None
+            self.frames_painted += 1
+
+    def latency_stats(self):
+        """Độ trễ frame -> màn hình (ms) của ~300 frame gần nhất, và số frame bị gộp."""
+        values = sorted(self._latencies)
+        if not values:
+            return {"count": 0, "mean_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0,
+                    "received": self.frames_received, "painted": self.frames_painted}
+        return {
+            "count": len(values),
+            "mean_ms": sum(values) / len(values) * 1000,
+            "p95_ms": values[min(len(values) - 1, int(len(values) * 0.95))] * 1000,
+            "max_ms": values[-1] * 1000,
+            "received": self.frames_received,
+            "painted": self.frames_painted,
+        }
+
+
+class LiveView(LiveFrameMixin, QWidget):
+    """
+    Widget hiển thị live view của camera.
+
+    Thay cho QLabel.setPixmap + setScaledContents: frame BGR được bọc thành QImage
+    (không cvtColor, không copy) và vẽ thẳng trong paintEvent vào hình chữ nhật
+    giữ tỉ lệ, chỉ tính lại khi resize hoặc đổi kích thước frame.
+
+    Nhiều frame đến giữa hai lần vẽ được gộp lại (chỉ vẽ frame mới nhất), số lần
+    vẽ không vượt quá tần số quét của màn hình. Độ trễ frame -> màn hình
+    (từ lúc set_frame đến khi vẽ xong) được ghi lại, xem latency_stats().
+    """
+    def __init__(self, text="", parent=None):
+        super().__init__(parent)
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent) # Tự tô nền, Qt không cần xóa trước
+        self._init_live_view(text)
 
-    def reset(self):
-        """Reset về trạng thái ban đầu"""
-        self.image_label.clear()
-        self.image_label.setStyleSheet("background-color: #e0e0e0;")
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        self._paint_with_painter(painter)
+        painter.end()
+        self._frame_painted()
@@ -1,11 +1,46 @@
 import sys
-from gui.main_window import MainWindow, DinoApp
+import time
+_PROCESS_START = time.perf_counter()
+
+import argparse
+from PyQt6.QtCore import QTimer
+
+from core.startup import startup_profiler
+from core.metrics import metrics
+from core.event_log import event_log, DEFAULT_LOG_PATH
 
 def main():
-    app = DinoApp(sys.argv)
-    window = MainWindow()
-    window.show()
-    sys.exit(app.exec())
+    parser = argparse.ArgumentParser(description="Socket Inspection App")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="In thời gian từng giai đoạn khởi động")
+    parser.add_argument("--metrics", action="store_true",
+                        help="Bật đo độ trễ (như metrics_enabled trong config.json)")
+    parser.add_argument("--event-log", default=DEFAULT_LOG_PATH,
+                        help="File log sự kiện JSONL (để trống để tắt)")
+    args, qt_args = parser.parse_known_args()
+    if args.profile_startup:
+        startup_profiler.enable(_PROCESS_START)
+    if args.metrics:
+        metrics.enable()
+    # Log sự kiện + mọi print / traceback (bản windowed không có console)
+    if args.event_log:
+        event_log.open(args.event_log)
+        event_log.capture_stdio()
+        event_log.log("app_start", argv=sys.argv[1:])
+
+    with startup_profiler.phase("import GUI"):
+        from gui.main_window import MainWindow, DinoApp
+    with startup_profiler.phase("create QApplication"):
+        app = DinoApp(sys.argv[:1] + qt_args)
+    with startup_profiler.phase("MainWindow.__init__"):
+        window = MainWindow()
+    with startup_profiler.phase("window.show"):
+        window.show()
+    QTimer.singleShot(0, lambda: startup_profiler.mark("event loop running"))
+    exit_code = app.exec()
+    event_log.log("app_exit", code=exit_code)
+    event_log.close()
+    sys.exit(exit_code)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,96 @@
+"""
+SMTP server giả chạy local (thay cho aiosmtpd) để test EmailSender mà không cần mạng.
+Nhận mọi AUTH, lưu email nhận được và đếm số kết nối.
+"""
+import threading
+import socketserver
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write((line + "\r\n").encode("ascii"))
+
+    def handle(self):
+        stub = self.server.stub
+        with stub.lock:
+            stub.connections += 1
+        self.reply("220 localhost SMTP stub")
+        mail_from, rcpts = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("ascii", "replace").strip()
+            verb = command.split(" ", 1)[0].upper()
+            with stub.lock:
+                stub.commands.append(verb)
+            if verb == "EHLO":
+                self.wfile.write(b"250-localhost\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME\r\n")
+            elif verb == "HELO":
+                self.reply("250 localhost")
+            elif verb == "AUTH":
+                self.reply("235 Authentication successful")
+            elif verb == "MAIL":
+                mail_from, rcpts = command[10:].strip(), []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                rcpts.append(command[8:].strip())
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = bytearray()
+                size = 0
+                while True:
+                    chunk = self.rfile.readline()
+                    if not chunk or chunk == b".\r\n":
+                        break
+                    if chunk.startswith(b".."):
+                        chunk = chunk[1:] # Bỏ dot-stuffing
+                    size += len(chunk)
+                    if stub.keep_data:
+                        data += chunk
+                with stub.lock:
+                    stub.messages.append((mail_from, rcpts, bytes(data) if stub.keep_data else size))
+                self.reply("250 OK queued")
+                if stub.drop_after_data:
+                    stub.drop_after_data = False
+                    return # Giả lập server cắt kết nối
+            elif verb in ("NOOP", "RSET"):
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class _ThreadingServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SMTPStub:
+    """
+    Dùng:
+        with SMTPStub() as stub:
+            EmailSender("127.0.0.1", stub.port, use_tls=False, ...)
+    """
+    def __init__(self, keep_data=True):
+        self.keep_data = keep_data # False: chỉ đếm số byte (benchmark bộ nhớ)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.commands = []
+        self.messages = [] # (mail_from, [rcpt], data bytes hoặc số byte nếu keep_data=False)
+        self.drop_after_data = False
+        self._server = _ThreadingServer(("127.0.0.1", 0), _SMTPHandler)
+        self._server.stub = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,59 @@
+import os
+import sys
+import shutil
+import tempfile
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from core.storage import StorageManager
+from core.pdf_generator import PDFGenerator
+from core.attachment_policy import AttachmentPolicy, session_report_regenerator
+
+
+def test_attachment_policy_steps():
+    print("Testing attachment size policy...")
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        storage = StorageManager(base_dir=os.path.join(tmp_dir, "CapturedImages"))
+        pid = "SOCKET_BIG"
+        session_path = storage.create_session_folder(pid)
+        storage.save_session_info(session_path, pid, "Model X", "Lan")
+        rng = np.random.default_rng(0)
+        for i in range(1, 9):
+            img = rng.integers(0, 255, (960, 1280, 3), dtype=np.uint8) # Nhiễu: JPEG rất lớn
+            storage.save_image(session_path, img, "1_Linh_kiện_của_adapter", i)
+        pdf_path = PDFGenerator().generate_report(pid, session_path)
+        original = os.path.getsize(pdf_path)
+
+        # 1. Vừa budget -> gửi nguyên bản
+        plan = AttachmentPolicy(max_bytes=original).prepare(pdf_path)
+        assert plan.method == "original" and plan.attachment_path == pdf_path
+
+        # 2. Tạo lại PDF với ảnh thu nhỏ
+        regenerate = session_report_regenerator(storage, PDFGenerator)
+        plan = AttachmentPolicy(max_bytes=original // 3, regenerate=regenerate).prepare(pdf_path)
+        assert plan.method == "recompressed", plan.summary()
+        assert plan.final_bytes <= original // 3 and plan.bytes_saved > 0
+        assert os.path.getsize(plan.attachment_path) == plan.final_bytes
+
+        # 3. File nén được (không tạo lại được) -> zip
+        log_path = os.path.join(tmp_dir, "inspection.log")
+        with open(log_path, "w") as f:
+            f.write("PASS\n" * 50000)
+        plan = AttachmentPolicy(max_bytes=50000).prepare(log_path)
+        assert plan.method == "zipped" and plan.attachment_path.endswith(".zip")
+
+        # 4. Không cách nào vừa -> chép vào thư mục chia sẻ và gửi link
+        share_dir = os.path.join(tmp_dir, "share")
+        plan = AttachmentPolicy(max_bytes=1000, share_dir=share_dir, regenerate=regenerate).prepare(pdf_path)
+        assert plan.method == "shared_link" and plan.attachment_path is None
+        assert os.path.exists(os.path.join(share_dir, os.path.basename(pdf_path)))
+        assert plan.link in plan.apply_to_body("<html><body><p>Hi</p></body></html>", is_html=True)
+        print(f"SUCCESS: {original / 1024:.0f} KB report handled by every policy step")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    test_attachment_policy_steps()
@@ -0,0 +1,78 @@
+import os
+import sys
+import shutil
+import zipfile
+import tempfile
+from datetime import datetime, timedelta
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.storage import StorageManager
+from core.outbox import EmailOutbox
+from core.digest import DigestScheduler, DigestThread
+
+
+def test_digest_build_and_schedule():
+    print("Testing digest email...")
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        storage = StorageManager(base_dir=os.path.join(tmp_dir, "CapturedImages"))
+        for pid in ("SOCKET_A", "SOCKET_B"):
+            session_path = storage.create_session_folder(pid)
+            storage.save_session_info(session_path, pid, "Model X", "Lan")
+        with open(os.path.join(storage.base_dir, "SOCKET_A", "SOCKET_A_Report.pdf"), "wb") as f:
+            f.write(b"%PDF-1.4 test")
+        # Folder không phải phiên (VD: log sự kiện của bản cũ) không được tính vào digest
+        os.makedirs(os.path.join(storage.base_dir, "logs"))
+        with open(os.path.join(storage.base_dir, "logs", "events.jsonl"), "w") as f:
+            f.write("{}\n")
+        assert sorted(s["pid"] for s in storage.list_sessions()) == ["SOCKET_A", "SOCKET_B"]
+
+        outbox = EmailOutbox(os.path.join(tmp_dir, "outbox.db"))
+        now = datetime.now()
+        thread = DigestThread(storage, outbox, "qa@example.com", now - timedelta(hours=8), now + timedelta(minutes=1))
+        queued = []
+        thread.digest_queued.connect(lambda item_id, count: queued.append((item_id, count)))
+        thread.run() # Chạy đồng bộ trong test
+
+        assert len(queued) == 1 and queued[0][1] == 2
+        item = outbox.get(queued[0][0])
+        assert "SOCKET_A" in item["body"] and "SOCKET_B" in item["body"] and "Not exported" in item["body"]
+        with zipfile.ZipFile(item["attachment_path"]) as zf:
+            assert zf.namelist() == ["SOCKET_A_Report.pdf"]
+        outbox.close()
+
+        # Scheduler: lần đầu chỉ ghi mốc, mốc mới -> digest_due một lần, không trùng sau khi khởi động lại
+        due = []
+        scheduler = DigestScheduler(tmp_dir, ["06:00", "14:00", "22:00"], shift_hours=8)
+        scheduler.digest_due.connect(lambda since, until: due.append((since, until)))
+        day = datetime(2026, 1, 5)
+        scheduler.check(day.replace(hour=13))
+        assert due == []
+        scheduler.check(day.replace(hour=14, minute=1))
+        assert due == [(day.replace(hour=6), day.replace(hour=14))]
+
+        scheduler = DigestScheduler(tmp_dir, ["06:00", "14:00", "22:00"], shift_hours=8)
+        scheduler.digest_due.connect(lambda since, until: due.append((since, until)))
+        scheduler.check(day.replace(hour=15))
+        assert len(due) == 1
+        scheduler.check(day + timedelta(days=1, hours=1)) # Mốc 22:00 hôm trước được gửi bù
+        assert due[-1] == (day.replace(hour=14), day.replace(hour=22))
+
+        # App tắt qua nhiều ca: mỗi mốc bị lỡ một digest, theo thứ tự
+        del due[:]
+        scheduler.check(day + timedelta(days=2, hours=15))
+        slots = [day + timedelta(days=d, hours=h) for d, h in ((1, 6), (1, 14), (1, 22), (2, 6), (2, 14))]
+        assert due == [(slot - timedelta(hours=8), slot) for slot in slots]
+        scheduler.check(day + timedelta(days=2, hours=16))
+        assert len(due) == len(slots)
+
+        # Giờ sai định dạng trong config bị bỏ qua, không làm hỏng lịch
+        scheduler.set_schedule(["25:00", "14:00", "abc", "06:00"])
+        assert [t.hour for t in scheduler.times] == [6, 14]
+        print("SUCCESS: digest built and scheduled")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    test_digest_build_and_schedule()
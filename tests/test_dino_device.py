@@ -0,0 +1,76 @@
+import os
+import sys
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.dino_service import DinoService
+from core.dino_sdk import FakeDNX64Dll
+from core.dino_device import DinoDeviceState
+from core.inspection_template import InspectionTemplate
+
+
+class FlakyDll(FakeDNX64Dll):
+    fail_lens = True
+
+    def SetLensPos(self, device_index, value):
+        self._call("SetLensPos", (device_index, value))
+        if self.fail_lens:
+            raise OSError("lens motor stalled")
+        self.state["LensPos"] = value
+
+
+def test_dino_device_state():
+    print("Testing Dino-Lite device state and presets...")
+    template = InspectionTemplate.from_dict({"categories": [
+        {"name": "Pins", "points": 2, "camera": {"exposure": 120, "led": 1, "lens": 400}},
+        {"name": "Dust", "points": 2, "camera": {"exposure": 80, "led": 1, "lens": 400}},
+        {"name": "Pads", "points": 2},
+    ]})
+    assert template.categories[2].camera == {}
+
+    dll = FlakyDll()
+    service = DinoService(backend=dll)
+    service.start()
+    state = DinoDeviceState(service, device_index=0)
+    try:
+        # Typed wrapper đọc giới hạn lens qua con trỏ ctypes
+        assert service.call("GetLensPosLimits", 0).result(timeout=5) == (1000, 0)
+
+        # Preset đầu tiên: gửi đủ, theo thứ tự AE -> exposure -> LED -> lens, trong một lô
+        dll.calls.clear()
+        try:
+            state.apply(template.categories[0].camera).result(timeout=5)
+            assert False, "lens failure should surface through the future"
+        except OSError:
+            pass
+        assert [name for name, _ in dll.calls] == ["SetAutoExposure", "SetExposureValue", "SetLEDState", "SetLensPos"]
+        assert state.values == {} # Lô lỗi: quên cả lô, lần sau gửi lại
+
+        dll.fail_lens = False
+        state.apply(template.categories[0].camera).result(timeout=5)
+        assert state.values == {"auto_exposure": 0, "exposure": 120, "led": 1, "lens": 400}
+
+        # Sang category mới: chỉ exposure đổi
+        dll.calls.clear()
+        state.apply(template.categories[1].camera).result(timeout=5)
+        assert dll.calls == [("SetExposureValue", (0, 80))]
+        assert state.apply(template.categories[1].camera).result(timeout=5) == []
+        assert dll.state["ExposureValue"] == 80 and dll.state["AutoExposure"] == 0
+
+        # Giá trị đọc lại không ghi đè giá trị đã biết
+        dll.state["AETarget"] = 55
+        assert state.refresh().result(timeout=5)["ae_target"] == 55
+        assert state.values["ae_target"] == 55 and state.values["exposure"] == 80
+
+        try:
+            state.apply({"gain": 3})
+            assert False, "Unknown settings should be rejected"
+        except ValueError:
+            pass
+    finally:
+        service.stop()
+        service.wait(2000)
+    print(f"SUCCESS: {state.calls_skipped} unchanged settings skipped")
+
+if __name__ == "__main__":
+    test_dino_device_state()
@@ -0,0 +1,178 @@
+import os
+import sys
+import time
+import threading
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen") # Không cần màn hình
+
+from PyQt6.QtCore import Qt, QEvent
+from PyQt6.QtWidgets import QApplication
+from core.dino_service import DinoService
+from core.dino_sdk import FakeDNX64Dll
+
+
+def test_dino_service():
+    print("Testing DinoService with the fake DLL...")
+    app = QApplication.instance() or QApplication(sys.argv[:1]) # Không dùng QCoreApplication: test widget chạy sau trong cùng process
+    dll = FakeDNX64Dll(delay=0.05) # Thiết bị chậm: 50 ms mỗi lệnh
+    service = DinoService(backend=dll)
+    ready, presses = [], []
+    service.sdk_ready.connect(ready.append, Qt.ConnectionType.DirectConnection)
+    service.microtouch_pressed.connect(presses.append)
+    service.start()
+
+    # call() không chờ DLL: 10 lệnh vào hàng đợi gần như tức thì
+    start = time.perf_counter()
+    futures = [service.call("SetExposureValue", 0, 100 + i) for i in range(10)]
+    futures.append(service.call("GetExposureValue", 0))
+    bad = service.call("NoSuchCall")
+    assert time.perf_counter() - start < 0.05 and service.pending() > 0
+
+    assert futures[-1].result(timeout=5) == 109 # Lệnh chạy tuần tự, theo thứ tự gửi
+    try:
+        bad.result(timeout=5)
+        assert False, "Unknown DNX64 call should fail"
+    except AttributeError:
+        pass
+    assert ready == [True]
+    names = [name for name, _ in dll.calls]
+    assert names[:3] == ["Init", "EnableMicroTouch", "SetEventCallback"]
+    assert names.count("SetExposureValue") == 10
+
+    stats = service.latency_stats()
+    assert stats["SetExposureValue"]["count"] == 10 and stats["SetExposureValue"]["p50_ms"] >= 45
+
+    # Nút MicroTouch: callback chạy ở thread của DLL, slot chạy ở thread của app
+    press_thread = threading.Thread(target=dll.press)
+    before = time.perf_counter()
+    press_thread.start()
+    press_thread.join()
+    after = time.perf_counter()
+    assert presses == [] # Chưa chạy: signal được xếp hàng về thread của app
+    app.processEvents()
+    assert len(presses) == 1 and before <= presses[0] <= after # Timestamp lúc bấm, không phải lúc slot chạy
+
+    service.stop()
+    assert service.wait(2000)
+    print(f"SUCCESS: SetExposureValue p50 {stats['SetExposureValue']['p50_ms']:.0f} ms, GUI never blocked")
+
+def wait_until(app, condition, timeout):
+    end = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < end:
+        app.processEvents()
+        time.sleep(0.01)
+    return condition()
+
+
+def test_dino_service_stalled_shutdown():
+    print("Testing DinoService shutdown during a stalled DLL call...")
+    import gc
+    from core import dino_service
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    dll = FakeDNX64Dll()
+    service = DinoService(backend=dll)
+    service.start()
+    assert service.call("GetExposureValue", 0).result(timeout=5) is not None
+    dll.delay = 0.8 # Thiết bị treo trong lệnh tiếp theo
+    service.call("SetLEDState", 0, 1)
+    assert wait_until(app, lambda: service.busy() is not None, 2)
+
+    assert not service.shutdown(100) # Không chờ hết lệnh treo
+    assert service in dino_service._stalled
+    thread_ref = service
+    del service
+    gc.collect() # Cửa sổ bị hủy: object vẫn được giữ, Qt không abort
+    assert thread_ref.isRunning()
+    del thread_ref
+    assert wait_until(app, lambda: not dino_service._stalled, 3) # Lệnh trả về -> thread dừng, tham chiếu được bỏ
+    print("SUCCESS: stalled service outlived its owner and was released after finishing")
+
+
+def test_close_window_during_slow_call():
+    print("Testing MainWindow close during a slow DNX64 call...")
+    from gui.main_window import MainWindow
+    import gc
+    from core import dino_service
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    load_config = MainWindow.load_config
+    MainWindow.load_config = lambda self: dict(load_config(self), dino_backend="fake")
+    try:
+        window = MainWindow()
+    finally:
+        MainWindow.load_config = load_config
+    window.show()
+    service = window.dino
+    assert wait_until(app, lambda: service.available, 3)
+    service.backend.delay = 3.0 # Lâu hơn thời gian closeEvent chờ (2 s)
+    service.call("SetLEDState", 0, 1)
+    assert wait_until(app, lambda: service.busy() is not None, 2)
+
+    window.close()
+    window.deleteLater()
+    app.sendPostedEvents(None, QEvent.Type.DeferredDelete) # processEvents() không chạy deleteLater
+    del window
+    gc.collect()
+    assert service.isRunning() and service in dino_service._stalled
+    assert wait_until(app, lambda: not dino_service._stalled, 5)
+    print("SUCCESS: window destroyed while the DNX64 call was still running")
+
+def test_capture_waits_for_camera_preset():
+    print("Testing capture held until the category camera preset is applied...")
+    from gui.main_window import MainWindow
+    import shutil
+    import cv2
+    import numpy as np
+    from core.camera import CameraThread
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    load_config = MainWindow.load_config
+    MainWindow.load_config = lambda self: dict(load_config(self), dino_backend="fake")
+    try:
+        window = MainWindow()
+    finally:
+        MainWindow.load_config = load_config
+    service = window.dino
+    assert wait_until(app, lambda: service.available, 3)
+    window.camera_thread = CameraThread(0) # Không start: frame đưa thẳng vào history
+    import copy
+    window.template = copy.deepcopy(window.template) # load_template() cache dùng chung: không sửa bản gốc
+    window.template.categories[0].camera = {"exposure": 120}
+    window.template.categories[1].camera = {"exposure": 300}
+
+    def frame(value):
+        return np.full((48, 64, 3), value, dtype=np.uint8)
+    window.current_frame = frame(10)
+    window.camera_thread.history.add(frame(10), time.perf_counter())
+    service.backend.delay = 0.3
+    window.start_session("TEST-PRESET")
+    try:
+        # Bấm khi preset đang gửi: chờ trong TriggerQueue, không lấy frame của exposure cũ
+        assert window.triggers.press()
+        wait_until(app, lambda: False, 0.1)
+        assert window.triggers.pending() == 1 and window.session_model.filled_count == 0
+        assert wait_until(app, lambda: window.presets_pending == 0, 2)
+        window.camera_thread.history.add(frame(200), time.perf_counter())
+        assert wait_until(app, lambda: window.session_model.filled_count == 1, 2)
+        assert cv2.imread(window.session_model._paths[0])[0, 0, 0] > 150
+
+        # Preset lỗi: báo trên thanh trạng thái, lần bấm vẫn được chụp
+        def failing(*args):
+            raise OSError("device unplugged")
+        service.backend.delay = 0
+        service.backend.SetExposureValue = failing
+        window.template.slots[1] = (1, 0) # Ô tiếp theo thuộc category khác
+        window.preset_category = None
+        window.apply_camera_preset()
+        assert wait_until(app, lambda: window.presets_pending == 0, 2)
+        assert "Camera preset failed" in window.lbl_status.text()
+    finally:
+        window.triggers.clear()
+        window.close()
+        shutil.rmtree(window.session_path, ignore_errors=True)
+    print("SUCCESS: capture used a frame read after the preset; preset failure shown")
+
+if __name__ == "__main__":
+    test_dino_service()
+    test_dino_service_stalled_shutdown()
+    test_close_window_during_slow_call()
+    test_capture_waits_for_camera_preset()
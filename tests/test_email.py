@@ -0,0 +1,96 @@
+import os
+import sys
+import email
+import tempfile
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.email_sender import EmailSender
+from smtp_stub import SMTPStub
+
+
+def make_sender(stub, **kwargs):
+    return EmailSender(smtp_server="127.0.0.1", smtp_port=stub.port, sender_email="qc@example.com",
+                       password="secret", use_tls=False, timeout=5, **kwargs)
+
+
+def test_email_connection_reuse():
+    print("Testing pooled SMTP sending...")
+    with SMTPStub() as stub:
+        sender = make_sender(stub)
+        messages = [{"recipient_email": "qa@example.com", "subject": f"Report {i}", "body": "<p>OK</p>",
+                     "is_html": True} for i in range(5)]
+        results = sender.send_many(messages)
+        assert all(success for success, _, _ in results)
+        assert len(stub.messages) == 5 and stub.connections == 1
+        assert sender.last_batch_stats["connects"] == 1
+        assert stub.commands.count("AUTH") == 1
+
+        # Keepalive bằng NOOP, kết nối vẫn được dùng lại
+        assert sender.keepalive()
+        assert sender.send_email("qa@example.com", "Again", "body")[0]
+        assert stub.connections == 1
+
+        # Server cắt kết nối -> tự kết nối lại và gửi
+        stub.drop_after_data = True
+        assert sender.send_email("qa@example.com", "Before drop", "body")[0]
+        assert sender.send_email("qa@example.com", "After drop", "body")[0]
+        assert stub.connections == 2 and len(stub.messages) == 8
+
+        sender.close()
+        assert not sender.is_connected and stub.commands[-1] == "QUIT"
+    print("SUCCESS: 8 emails sent over 2 SMTP sessions")
+
+def test_email_idle_close():
+    print("Testing idle SMTP connection close...")
+    import time
+    with SMTPStub() as stub:
+        sender = make_sender(stub, keepalive_interval=0.05, max_idle=0.3)
+        assert sender.send_email("qa@example.com", "Once", "body")[0]
+        # Outbox gọi keepalive() mỗi vòng rảnh: NOOP không được làm kết nối sống mãi
+        deadline = time.monotonic() + 1.0
+        while time.monotonic() < deadline:
+            sender.keepalive()
+            time.sleep(0.1)
+        assert stub.commands.count("NOOP") >= 1
+        assert not sender.is_connected and stub.commands[-1] == "QUIT"
+        # Gửi tiếp thì tự kết nối lại
+        assert sender.send_email("qa@example.com", "Later", "body")[0]
+        assert stub.connections == 2
+        sender.close()
+    print("SUCCESS: idle connection closed after max_idle")
+
+def test_email_streamed_attachment():
+    print("Testing streamed attachment...")
+    fd, attachment_path = tempfile.mkstemp(suffix="_Report.pdf")
+    payload = os.urandom(300 * 1024 + 7)
+    with os.fdopen(fd, "wb") as f:
+        f.write(payload)
+    try:
+        with SMTPStub() as stub:
+            sender = make_sender(stub)
+            body = "Dòng 1\n.Dòng bắt đầu bằng dấu chấm\n."
+            success, msg = sender.send_email("qa@example.com", "[QA] Báo cáo", body, attachment_path)
+            assert success, msg
+            # Body ASCII gửi dạng 7bit: dòng bắt đầu bằng "." phải được dot-stuff
+            assert sender.send_email("qa@example.com", "Dots", "a\n.b\n..c\n.")[0]
+            sender.close()
+
+        received = email.message_from_bytes(stub.messages[0][2])
+        assert str(email.header.make_header(email.header.decode_header(received["Subject"]))) == "[QA] Báo cáo"
+        text_part, attachment = received.get_payload()
+        assert text_part.get_payload(decode=True).decode("utf-8") == body
+        assert attachment.get_filename() == os.path.basename(attachment_path)
+        assert attachment.get_content_type() == "application/pdf"
+        assert attachment.get_payload(decode=True) == payload
+        dots = email.message_from_bytes(stub.messages[1][2]).get_payload()[0]
+        assert dots.get_payload(decode=True).decode().splitlines() == ["a", ".b", "..c", "."]
+    finally:
+        os.remove(attachment_path)
+    print("SUCCESS: attachment received intact")
+
+if __name__ == "__main__":
+    test_email_connection_reuse()
+    test_email_idle_close()
+    test_email_streamed_attachment()
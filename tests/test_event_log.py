@@ -0,0 +1,48 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.event_log import EventLog, read_events, summarize
+
+
+def test_event_log():
+    print("Testing event log...")
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp_dir, "logs", "events.jsonl")
+        log = EventLog()
+        log.log("ignored") # Chưa open: bỏ qua
+        log.open(path, max_bytes=2000, backups=2, flush_interval=0.05)
+        log.log("session_start", pid="SOCKET_1")
+        for slot in range(60):
+            log.log("capture", pid="SOCKET_1", slot=slot, path=f"ảnh_{slot}.jpg", duration_ms=float(slot))
+        log.error("export_failed", ValueError("disk full"))
+        log.close()
+        log.log("after_close")
+
+        # Xoay file: chỉ giữ file hiện tại + 2 bản cũ, mỗi file không vượt quá nhiều max_bytes
+        files = sorted(os.listdir(os.path.dirname(path)))
+        assert files == ["events.jsonl", "events.jsonl.1", "events.jsonl.2"], files
+        for name in files:
+            with open(os.path.join(tmp_dir, "logs", name), encoding="utf-8") as f:
+                for line in f:
+                    json.loads(line) # Mỗi dòng là một JSON hoàn chỉnh
+
+        # Đọc lại theo thứ tự thời gian, kể cả file đã xoay
+        captures = list(read_events(path, event="capture"))
+        slots = [r["slot"] for r in captures]
+        assert slots == sorted(slots) and slots[-1] == 59 and "ảnh_59.jpg" == captures[-1]["path"]
+        summary = summarize(read_events(path))
+        assert summary["export_failed"]["errors"] == 1
+        assert "after_close" not in summary and "ignored" not in summary
+        assert summary["capture"]["count"] == len(captures) and summary["capture"]["p95_ms"] >= 50
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    print(f"SUCCESS: {len(captures)} captures read back across rotated files")
+
+if __name__ == "__main__":
+    test_event_log()
@@ -0,0 +1,62 @@
+import os
+import sys
+import shutil
+import tempfile
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen") # Không cần màn hình
+
+import cv2
+import numpy as np
+from PyQt6.QtWidgets import QApplication
+
+from core.inspection_template import InspectionTemplate, InspectionCategory
+from core.session_model import SessionModel
+from gui.image_grid import InspectionGridModel, InspectionGridView, CELL_HEADER, CELL_NG, CELL_SLOT, CELL_EMPTY
+
+
+def test_virtual_grid():
+    print("Testing virtualized image grid...")
+    app = QApplication.instance() or QApplication(sys.argv)
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        # Template lớn: 50 category x 10 điểm = 500 ô
+        categories = [InspectionCategory(i, f"Cat {i + 1}", points=10) for i in range(50)]
+        template = InspectionTemplate(categories, points_per_row=4)
+        session = SessionModel(template.total_points)
+        model = InspectionGridModel(template, session, tmp_dir)
+        assert model.rowCount() == 50 * (1 + 3) and model.columnCount() == 5
+
+        # Dòng 0: tiêu đề; dòng 1-3: điểm 1-10 của Cat 1, cột 0 là ảnh NG
+        assert model.cell_kind(0, 2) == CELL_HEADER and model.cell_kind(1, 0) == CELL_NG
+        assert model.slot_at(1, 1) == 0 and model.slot_at(3, 2) == 9
+        assert model.cell_kind(3, 3) == CELL_EMPTY # Điểm 11 không tồn tại
+        assert model.slot_at(5, 1) == 10 and model.data(model.index(5, 1)) == "Pt 1"
+        for slot in (0, 9, 10, 499):
+            index = model.slot_index(slot)
+            assert model.slot_at(index.row(), index.column()) == slot
+
+        changed = []
+        model.dataChanged.connect(lambda top_left, bottom_right, roles: changed.append(top_left.row()))
+        path = os.path.join(tmp_dir, "pt.jpg")
+        cv2.imwrite(path, np.full((480, 640, 3), 128, dtype=np.uint8))
+        session.fill(0, path)
+        session.fill(499, path)
+        assert changed == [1, model.slot_index(499).row()]
+
+        # Chỉ ô đang hiện được vẽ -> chỉ thumbnail của ô 0 được load
+        view = InspectionGridView(model)
+        view.resize(640, 400)
+        view.show()
+        app.processEvents()
+        view.grab()
+        cached = list(model.thumbnails._items)
+        assert cached and all(key[0] == path for key in cached), cached
+        assert model.cell_kind(model.slot_index(0).row(), 1) == CELL_SLOT
+        view.close()
+        print(f"SUCCESS: {template.total_points} slots in one view, {len(cached)} thumbnail(s) loaded")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    test_virtual_grid()
@@ -0,0 +1,56 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.metrics import MetricsRegistry, LatencyHistogram
+
+
+def test_metrics_registry():
+    print("Testing metrics registry...")
+    registry = MetricsRegistry()
+
+    # Tắt: không ghi gì, now() = 0
+    assert registry.now() == 0.0
+    with registry.time("pdf_build"):
+        pass
+    registry.observe("frame_read", registry.now())
+    registry.inc("frames_read")
+    assert registry.snapshot()["latency"] == {} and registry.snapshot()["counters"] == {}
+
+    registry.enable()
+    for ms in range(1, 1001): # 1..1000 ms
+        registry.record("scan_decode", ms / 1000.0)
+    registry.inc("frames_read", 3)
+    registry.set("outbox_queued", 2)
+    start = registry.now()
+    registry.observe("frame_read", start)
+
+    scan = registry.snapshot()["latency"]["scan_decode"]
+    assert scan["count"] == 1000 and scan["min_ms"] == 1.0 and scan["max_ms"] == 1000.0
+    for key, expected in (("p50_ms", 500), ("p90_ms", 900), ("p99_ms", 990)):
+        assert abs(scan[key] - expected) / expected < 0.02, (key, scan[key]) # Sai số bucket ~1.6%
+    assert registry.snapshot()["counters"]["frames_read"] == 3
+    assert registry.snapshot()["latency"]["frame_read"]["count"] == 1
+
+    # Bucket bao trọn giá trị ở mọi độ lớn
+    for value in (0, 1, 127, 128, 129, 1000, 65535, 10 ** 6, 3 * 10 ** 9):
+        bucket = LatencyHistogram.bucket_of(value)
+        assert value <= LatencyHistogram.bucket_value(bucket)
+        assert bucket == 0 or LatencyHistogram.bucket_value(bucket - 1) < value
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        path = registry.dump(os.path.join(tmp_dir, "metrics.json"))
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        assert data["gauges"]["outbox_queued"] == 2 and "scan_decode" in data["latency"]
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    print(f"SUCCESS: metrics recorded (scan p99 {scan['p99_ms']:.1f} ms)")
+
+if __name__ == "__main__":
+    test_metrics_registry()
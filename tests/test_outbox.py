@@ -0,0 +1,70 @@
+import os
+import sys
+import shutil
+import tempfile
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.outbox import EmailOutbox, OutboxWorker
+
+
+class FlakySender:
+    """EmailSender giả: lỗi `failures` lần đầu rồi gửi thành công."""
+    def __init__(self, failures):
+        self.failures = failures
+        self.sent = []
+
+    def send_email(self, recipient_email, subject, body, attachment_path=None, is_html=False):
+        if self.failures > 0:
+            self.failures -= 1
+            return False, "Connection refused"
+        self.sent.append((recipient_email, subject))
+        return True, "Email sent successfully!"
+
+    def send_many(self, messages):
+        return [self.send_email(**m) + (0.0,) for m in messages]
+
+
+def test_outbox_retry_and_persistence():
+    print("Testing email outbox...")
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(tmp_dir, "outbox.db")
+        outbox = EmailOutbox(db_path)
+        item_id = outbox.enqueue("qa@example.com", "Report", "<p>Hi</p>", is_html=True)
+        outbox.close()
+
+        # Hàng đợi còn nguyên sau khi mở lại (VD: khởi động lại app)
+        outbox = EmailOutbox(db_path)
+        assert outbox.counts() == {"queued": 1, "sent": 0, "failed": 0}
+
+        sender = FlakySender(failures=2)
+        worker = OutboxWorker(outbox, lambda: sender, max_attempts=5, base_delay=10.0)
+        for attempt in range(1, 3):
+            # Giả lập thời gian trôi tới lần thử kế tiếp
+            worker.send_items(outbox.due(now=outbox.next_wakeup()))
+            assert outbox.due() == [] # Đang chờ backoff
+            item = outbox.get(item_id)
+            assert item["attempts"] == attempt and item["last_error"] == "Connection refused"
+
+        worker.send_items(outbox.due(now=outbox.next_wakeup()))
+        assert sender.sent == [("qa@example.com", "Report")]
+        assert outbox.counts() == {"queued": 0, "sent": 1, "failed": 0}
+
+        # Hết số lần thử -> failed, retry_failed đưa lại hàng đợi
+        outbox.enqueue("qa@example.com", "Report 2", "body")
+        worker = OutboxWorker(outbox, lambda: FlakySender(failures=99), max_attempts=1)
+        worker.send_items(outbox.due())
+        assert outbox.counts()["failed"] == 1
+        assert outbox.retry_failed() == 1 and outbox.counts()["queued"] == 1
+
+        delays = [OutboxWorker(outbox, None, base_delay=30, max_delay=3600).retry_delay(n) for n in (1, 2, 3, 10)]
+        assert 27 <= delays[0] <= 33 and 54 <= delays[1] <= 66 and 108 <= delays[2] <= 132
+        assert delays[3] <= 3600 * 1.1
+        outbox.close()
+        print("SUCCESS: Outbox retried and persisted emails")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    test_outbox_retry_and_persistence()
@@ -4,8 +4,9 @@ import shutil
 # Add project root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from core.pdf_generator import PDFGenerator
+from core.pdf_generator import PDFGenerator, ExportCancelled
 from core.storage import StorageManager
+from core.inspection_template import InspectionTemplate, load_template_or_default, DEFAULT_TEMPLATE, DEFAULT_TEMPLATE_PATH
 import cv2
 import numpy as np
 
@@ -17,33 +18,200 @@ def test_pdf_generation():
     pid = "TEST_PID_123"
     session_path = storage.create_session_folder(pid)
     
-    # Create dummy images
-    # 8 top, 8 bot
-    for i in range(1, 9):
-        # Top: Blue image
-        img_top = np.zeros((480, 640, 3), dtype=np.uint8)
-        img_top[:] = (255, 0, 0) 
-        cv2.putText(img_top, f"Top {i}", (50, 240), cv2.FONT_HERSHEY_SIMPLEX, 3, (255, 255, 255), 3)
-        storage.save_image(session_path, img_top, i, "top")
-        
-        # Bot: Red image
-        img_bot = np.zeros((480, 640, 3), dtype=np.uint8)
-        img_bot[:] = (0, 0, 255)
-        cv2.putText(img_bot, f"Bot {i}", (50, 240), cv2.FONT_HERSHEY_SIMPLEX, 3, (255, 255, 255), 3)
-        storage.save_image(session_path, img_bot, i, "bot")
+    # Create dummy images: một ảnh cho mỗi điểm của template mặc định,
+    # đặt tên theo file_prefix như lúc chụp thật
+    template = PDFGenerator().template
+    for cat_idx, point_idx in template.slots:
+        img = np.zeros((480, 640, 3), dtype=np.uint8)
+        img[:] = (255, 0, 0) if cat_idx % 2 == 0 else (0, 0, 255)
+        cv2.putText(img, f"{cat_idx + 1}.{point_idx}", (50, 240), cv2.FONT_HERSHEY_SIMPLEX, 3, (255, 255, 255), 3)
+        storage.save_image(session_path, img, template.categories[cat_idx].file_prefix, point_idx)
         
     print(f"Created mock images in {session_path}")
     
     # 2. Generate PDF
-    generator = PDFGenerator()
-    pdf_path = generator.generate_report(pid, session_path)
+    progress = []
+    generator = PDFGenerator(template)
+    pdf_path = generator.generate_report(pid, session_path,
+                                         progress_callback=lambda done, total: progress.append((done, total)))
     
-    # 3. Verify
-    if pdf_path and os.path.exists(pdf_path):
-        print(f"SUCCESS: PDF generated at {pdf_path}")
-        print(f"File size: {os.path.getsize(pdf_path)} bytes")
-    else:
-        print("FAILURE: PDF not found.")
+    # 3. Verify: mọi ảnh đều được tìm thấy và nhúng vào báo cáo
+    assert pdf_path and os.path.exists(pdf_path), "PDF not found"
+    assert progress[-1] == (template.total_points, template.total_points)
+    with open(pdf_path, "rb") as f:
+        assert f.read().count(b"/Subtype /Image") >= template.total_points
+    print(f"SUCCESS: PDF generated at {pdf_path}")
+    print(f"File size: {os.path.getsize(pdf_path)} bytes")
+
+def test_pdf_export_cancel():
+    print("Testing PDF Export Cancel...")
+
+    storage = StorageManager(base_dir="TestImages")
+    pid = "TEST_PID_CANCEL"
+    session_path = storage.create_session_folder(pid)
+
+    img = np.zeros((480, 640, 3), dtype=np.uint8)
+    for i in range(1, 9):
+        storage.save_image(session_path, img, "1_Linh_kiện_của_adapter", i)
+
+    progress = []
+    generator = PDFGenerator()
+    try:
+        generator.generate_report(pid, session_path,
+                                  progress_callback=lambda done, total: progress.append((done, total)),
+                                  cancel_check=lambda: len(progress) > 3)
+        cancelled = False
+    except ExportCancelled:
+        cancelled = True
+
+    pdf_path = os.path.join(session_path, f"{pid}_Report.pdf")
+    assert cancelled, "Export should raise ExportCancelled"
+    assert not os.path.exists(pdf_path), "Partial PDF should be removed"
+    assert progress[0] == (0, 8)
+    print(f"SUCCESS: Export cancelled after {len(progress)} progress updates")
+
+def test_pdf_custom_template():
+    print("Testing PDF Generation with a 6x12 template...")
+
+    template = InspectionTemplate.from_dict({
+        "points_per_row": 6,
+        "categories": [{"name": f"Mục {i}", "points": 12} for i in range(1, 7)],
+    })
+    layout = template.layout()
+    assert template.total_points == 72
+    assert layout.num_cols == 6 + 6 + 2
+    assert layout.num_rows == 1 + 6 * 2
+    assert layout.point_cells[(5, 12)] == (12, 11)
+
+    storage = StorageManager(base_dir="TestImages")
+    pid = "TEST_PID_6x12"
+    session_path = storage.create_session_folder(pid)
+    img = np.zeros((480, 640, 3), dtype=np.uint8)
+    for category in template.categories:
+        storage.save_image(session_path, img, category.file_prefix, 12)
+
+    progress = []
+    generator = PDFGenerator(template)
+    pdf_path = generator.generate_report(pid, session_path,
+                                         progress_callback=lambda done, total: progress.append(total))
+    assert pdf_path and os.path.exists(pdf_path)
+    assert progress[-1] == 6
+    print(f"SUCCESS: PDF generated at {pdf_path}")
+
+def test_pdf_canvas_engine():
+    print("Testing PDF Generation with the canvas engine...")
+
+    storage = StorageManager(base_dir="TestImages")
+    pid = "TEST_PID_CANVAS"
+    session_path = storage.create_session_folder(pid)
+    img = np.zeros((480, 640, 3), dtype=np.uint8)
+    for i in range(1, 9):
+        storage.save_image(session_path, img, "2_Bụi_bẩn", i)
+
+    progress = []
+    generator = PDFGenerator(engine="canvas")
+    pdf_path = generator.generate_report(pid, session_path,
+                                         progress_callback=lambda done, total: progress.append((done, total)))
+    assert pdf_path and os.path.exists(pdf_path)
+    assert progress[-1] == (8, 8)
+
+    # Dòng ngày ở đầu trang giống hệt engine "table"
+    def date_header(path):
+        import re
+        import zlib
+        with open(path, "rb") as f:
+            data = f.read()
+        texts = []
+        for stream in re.findall(rb"stream\r?\n(.*?)endstream", data, re.S):
+            try:
+                texts += re.findall(rb"\((Date :[^)]*)\)", zlib.decompress(stream))
+            except zlib.error:
+                pass
+        return texts
+    canvas_header = date_header(pdf_path)
+    table_path = PDFGenerator().generate_report(pid, session_path, pdf_path=os.path.join(session_path, "table.pdf"))
+    assert len(canvas_header) == 1 and canvas_header == date_header(table_path), canvas_header
+    print(f"SUCCESS: PDF generated at {pdf_path}")
+
+def test_pdf_archival_shared_images():
+    print("Testing PDF/A output and shared NG images...")
+
+    storage = StorageManager(base_dir="TestImages")
+    pid = "TEST_PID_PDFA"
+    session_path = storage.create_session_folder(pid)
+    img = np.zeros((480, 640, 3), dtype=np.uint8)
+    storage.save_image(session_path, img, "1_Linh_kiện_của_adapter", 1)
+
+    generator = PDFGenerator(pdfa=True)
+    pdf_path = generator.generate_report(pid, session_path, inspector_name="Lan")
+    assert pdf_path and os.path.exists(pdf_path)
+    with open(pdf_path, "rb") as f:
+        data = f.read()
+    assert b"/GTS_PDFA1" in data and b"<pdfaid:part>2</pdfaid:part>" in data
+    assert b"/BaseFont /Helvetica" not in data # Mọi font phải được nhúng
+
+    # Ảnh NG mẫu chỉ được nhúng một lần dù có nhiều trang
+    def image_count(sessions):
+        path = os.path.join(session_path, "combined.pdf")
+        assert PDFGenerator().generate_combined_report(sessions, path) == path
+        with open(path, "rb") as f:
+            return f.read().count(b"/Subtype /Image")
+
+    session = {"pid": pid, "session_path": session_path}
+    assert image_count([session]) == image_count([session] * 3)
+    print(f"SUCCESS: PDF/A generated at {pdf_path}")
+
+def test_template_fallback():
+    print("Testing inspection template fallback...")
+    import tempfile
+    # File template đi kèm app (không phụ thuộc thư mục chạy pytest) khớp template mặc định
+    bundled = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', DEFAULT_TEMPLATE_PATH)
+    template, error = load_template_or_default(bundled)
+    assert error is None and template.total_points == 32
+
+    # File thiếu hoặc JSON hỏng: không raise, dùng template mặc định và trả thông báo lỗi
+    folder = tempfile.mkdtemp()
+    broken = os.path.join(folder, "broken.json")
+    with open(broken, "w", encoding="utf-8") as f:
+        f.write('{"categories": [')
+    for path in (os.path.join(folder, "missing.json"), broken):
+        template, error = load_template_or_default(path)
+        assert error and path in error
+        assert [c.name for c in template.categories] == [c["name"] for c in DEFAULT_TEMPLATE["categories"]]
+    shutil.rmtree(folder)
+    print("SUCCESS: missing / invalid template falls back to the default")
+
+def test_combined_report_overflow():
+    print("Testing combined report with a summary longer than one page...")
+    from io import BytesIO
+    from reportlab.pdfgen import canvas
+    from reportlab.platypus import Frame, Spacer
+    from reportlab.platypus.doctemplate import LayoutError
+
+    storage = StorageManager(base_dir="TestImages")
+    session_path = storage.create_session_folder("TEST_PID_SHIFT")
+    sessions = [{"pid": f"TEST_PID_{i:03d}", "session_path": session_path} for i in range(60)]
+    generator = PDFGenerator()
+    path = os.path.join(session_path, "shift.pdf")
+    assert generator.generate_combined_report(sessions, path) == path
+    # 60 dòng không vừa một trang: bảng tổng hợp sang trang tiếp thay vì mất các dòng cuối
+    assert generator.last_stats["pages"] > len(sessions) + 1, generator.last_stats
+
+    c = canvas.Canvas(BytesIO())
+    new_frame = lambda: Frame(0, 0, 500, 300)
+    assert PDFGenerator._draw_pages(c, [Spacer(1, 200)] * 3, new_frame) == 3
+    try:
+        PDFGenerator._draw_pages(c, [Spacer(1, 2000)], new_frame)
+        assert False, "LayoutError expected"
+    except LayoutError:
+        pass
+    print(f"SUCCESS: summary spread over {generator.last_stats['pages'] - len(sessions)} pages")
 
 if __name__ == "__main__":
     test_pdf_generation()
+    test_pdf_export_cancel()
+    test_pdf_custom_template()
+    test_pdf_canvas_engine()
+    test_pdf_archival_shared_images()
+    test_template_fallback()
+    test_combined_report_overflow()
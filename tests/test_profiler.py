@@ -0,0 +1,68 @@
+import os
+import sys
+import shutil
+import tempfile
+import threading
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PyQt6.QtCore import QThread
+from core.profiler import SamplingProfiler, ProfilerThread
+
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+
+class BusyWorker(QThread):
+    def __init__(self, stop):
+        super().__init__()
+        self.stop = stop
+
+    def run(self):
+        busy_loop(self.stop)
+
+
+def test_sampling_profiler():
+    print("Testing sampling profiler...")
+    stop = threading.Event()
+    worker = BusyWorker(stop)
+    worker.start()
+    plain = threading.Thread(target=busy_loop, args=(stop,), name="plain-worker")
+    plain.start()
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        thread = ProfilerThread(0.3, tmp_dir, interval=0.002)
+        thread.start()
+        thread.wait() # GUI thread đang chờ ở đây cũng phải có trong profile
+        stop.set()
+        worker.wait()
+        plain.join()
+
+        files = os.listdir(tmp_dir)
+        samples = thread.profiler.sample_count
+        assert len(files) == 1 and files[0].endswith(".folded") and samples > 10
+        path = os.path.join(tmp_dir, files[0])
+        with open(path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        for line in lines: # Dạng folded: "thread;hàm;... số_mẫu"
+            stack, count = line.rsplit(" ", 1)
+            assert int(count) > 0 and ";" in stack
+        threads = {line.split(";", 1)[0] for line in lines}
+        assert {"GUI", "BusyWorker", "plain-worker"} <= threads, threads
+        assert any(line.startswith("BusyWorker;run (") and "busy_loop (" in line for line in lines)
+        assert not any("SamplingProfiler" in line or "sample (profiler.py" in line for line in lines)
+    finally:
+        stop.set()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    # Dừng sớm vẫn giữ các mẫu đã có
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.run(5, should_stop=lambda: profiler.sample_count >= 3)
+    assert profiler.sample_count == 3
+    print(f"SUCCESS: {samples} samples across {sorted(threads)}")
+
+if __name__ == "__main__":
+    test_sampling_profiler()
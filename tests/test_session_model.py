@@ -0,0 +1,50 @@
+import os
+import sys
+import time
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.session_model import SessionModel
+
+
+def test_session_model_slots():
+    print("Testing session slot model...")
+    model = SessionModel(8)
+    events = []
+    model.slot_filled.connect(lambda i, p: events.append(("filled", i)))
+    model.slot_cleared.connect(lambda i: events.append(("cleared", i)))
+    model.counts_changed.connect(lambda filled, total: events.append(("count", filled)))
+
+    for i in range(3):
+        model.fill(model.first_free(), f"img_{i}.jpg")
+    assert model.filled_count == 3 and model.first_free() == 3
+    assert events[-2:] == [("filled", 2), ("count", 3)]
+
+    # Xóa ô giữa -> ô đó được chụp lại trước
+    assert model.clear(1) == "img_1.jpg"
+    assert model.clear(1) is None # Ô đã trống
+    assert model.first_free() == 1 and model.filled_count == 2
+
+    # Fill trực tiếp một ô không phải ô trống nhỏ nhất
+    model.fill(5, "manual.jpg")
+    model.fill(5, "manual_retake.jpg") # Ghi đè không tăng số đếm
+    assert model.filled_count == 3 and model.path(5) == "manual_retake.jpg"
+    for expected in (1, 3, 4, 6, 7):
+        assert model.first_free() == expected
+        model.fill(expected, f"img_{expected}.jpg")
+    assert model.is_full() and model.first_free() == -1
+
+    model.reset()
+    assert model.filled_count == 0 and model.first_free() == 0 and model.filled_slots() == []
+
+    # Nhiều ô vẫn rẻ: mỗi lần tìm ô trống không phải duyệt cả grid
+    big = SessionModel(100000)
+    start = time.perf_counter()
+    while not big.is_full():
+        big.fill(big.first_free(), "x.jpg")
+    elapsed = time.perf_counter() - start
+    assert big.filled_count == 100000
+    print(f"SUCCESS: slot model consistent, 100000 slots filled in {elapsed * 1000:.0f} ms")
+
+if __name__ == "__main__":
+    test_session_model_slots()
@@ -0,0 +1,47 @@
+import os
+import sys
+import io
+import contextlib
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.startup import StartupProfiler, CameraEnumThread
+from core.dino_service import DinoService
+
+
+def test_startup_profiler():
+    print("Testing startup profiler...")
+    profiler = StartupProfiler()
+    with profiler.phase("disabled"):
+        pass
+    assert profiler._records == [] # Không bật thì không ghi
+
+    profiler.enable()
+    profiler.expected = {"camera enumeration", "event loop running"}
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        with profiler.phase("build UI"):
+            pass
+        with profiler.phase("camera enumeration"):
+            pass
+        assert out.getvalue() == "" # Chưa đủ các bước -> chưa in
+        profiler.mark("event loop running")
+        profiler.mark("late") # Đã in rồi thì không in lại
+    report = out.getvalue()
+    assert report.count("Startup profile") == 1
+    assert "build UI" in report and "event loop running" in report and "late" not in report
+
+    # Các thread nền emit kết quả ngay cả khi không có camera / DNX64.dll
+    found, ready = [], []
+    camera_thread = CameraEnumThread()
+    camera_thread.cameras_found.connect(found.append)
+    camera_thread.run()
+    dino_thread = DinoService()
+    dino_thread.sdk_ready.connect(ready.append)
+    dino_thread.stop() # run() init SDK, emit sdk_ready rồi thoát ngay
+    dino_thread.run()
+    assert len(found) == 1 and isinstance(found[0], list) and ready == [False]
+    print("SUCCESS: startup phases recorded and reported once")
+
+if __name__ == "__main__":
+    test_startup_profiler()
@@ -0,0 +1,138 @@
+import os
+import sys
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen") # Không cần màn hình
+
+from PyQt6.QtWidgets import QApplication
+from core.trigger import TriggerQueue, FrameHistory
+from core.focus import focus_score
+
+
+def test_trigger_queue():
+    print("Testing debounced capture trigger queue...")
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    triggers = TriggerQueue(debounce_s=0.2, max_pending=3)
+    fired = []
+    triggers.triggered.connect(fired.append)
+
+    # Rung tiếp điểm: 3 xung trong 20 ms -> một lần chụp
+    assert triggers.press(10.0)
+    assert not triggers.press(10.01)
+    assert not triggers.press(10.02)
+    # Bấm nhanh có chủ đích: mỗi lần là một ảnh, chưa chụp trước khi về event loop
+    assert triggers.press(10.3) and triggers.press(10.6)
+    assert fired == [] and triggers.pending() == 3
+    assert not triggers.press(10.9) # Hàng đợi đầy
+    app.processEvents()
+    assert fired == [10.0, 10.3, 10.6] and triggers.pending() == 0
+
+    assert triggers.press(11.5)
+    app.processEvents()
+    assert fired[-1] == 11.5
+
+    # Bấm đều nhau, mỗi lần cách lần trước ít hơn debounce nhưng cách lần được nhận đủ lâu
+    fired.clear()
+    presses = [20.0 + i * 0.15 for i in range(5)]
+    accepted = [triggers.press(t) for t in presses]
+    app.processEvents()
+    assert accepted == [True, False, True, False, True]
+    assert fired == presses[::2]
+    print("SUCCESS: bounces merged, rapid presses queued in order")
+
+
+def test_trigger_waits_until_ready():
+    print("Testing triggers held until their frames are read...")
+    import time
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    history = FrameHistory(size=10)
+    triggers = TriggerQueue(debounce_s=0.2, ready=lambda press: history.count_since(press) >= 2)
+    fired = []
+    triggers.triggered.connect(fired.append)
+
+    history.add("frame0", 0.9)
+    assert history.count_since(1.0) == 0
+    assert triggers.press(1.0) and triggers.press(1.5)
+    app.processEvents()
+    # Chưa có frame sau lúc bấm: cả hai lần bấm vẫn chờ trong hàng đợi, giữ thứ tự
+    assert fired == [] and triggers.pending() == 2
+    history.add("frame1", 1.1)
+    history.add("frame2", 1.2)
+    assert history.count_since(1.0) == 2
+    deadline = time.monotonic() + 1.0
+    while not fired and time.monotonic() < deadline:
+        app.processEvents()
+    assert fired == [1.0] and triggers.pending() == 1
+
+    # Reset phiên: lần bấm đang chờ bị hủy, không chụp sau đó
+    triggers.clear()
+    history.add("frame3", 1.6)
+    history.add("frame4", 1.7)
+    deadline = time.monotonic() + 0.1
+    while time.monotonic() < deadline:
+        app.processEvents()
+    assert fired == [1.0] and triggers.pending() == 0
+    print("SUCCESS: waiting triggers stay queued and are cancelled by clear()")
+
+
+def test_frame_history():
+    print("Testing frame history lookup...")
+    history = FrameHistory(size=4)
+    assert history.select(1.0) is None
+    for i in range(6):
+        history.add(f"frame{i}", 1.0 + i * 0.033)
+    assert len(history) == 4 # Chỉ giữ 4 frame gần nhất
+    assert history.select(1.07) == ("frame2", 1.066, None)
+    assert history.select(0.5)[0] == "frame2" # Quá cũ: frame cũ nhất còn giữ
+    assert history.select(9.0)[0] == "frame5"
+
+    # Chọn theo điểm trong ± window quanh lúc bấm; ngoài window không được chọn
+    sharpness = {"frame2": 5, "frame3": 9, "frame4": 7, "frame5": 100}
+    frame, frame_time, best = history.select(1.1, window=0.04, score=sharpness.get)
+    assert (frame, best) == ("frame3", 9) and abs(frame_time - 1.099) < 1e-9
+    assert history.select(3.0, window=0.04, score=sharpness.get)[2] is None # Không frame nào trong window: frame gần nhất
+
+    # Điểm tính sẵn (camera thread) được dùng thay cho score(frame)
+    history.add("frame6", 1.198, score=500)
+    assert history.select(1.19, window=0.04, score=sharpness.get)[::2] == ("frame6", 500)
+    history.clear()
+    assert history.select(1.0) is None
+    print("SUCCESS: capture picks the frame nearest the press, or the best one in the window")
+
+
+def test_best_of_frames():
+    print("Testing best-of-N frame selection...")
+    history = FrameHistory(size=10)
+    scores = [3, 8, 2, 6, 9, 1]
+    for i, score in enumerate(scores):
+        history.add(f"frame{i}", 1.0 + i * 0.033, score)
+    press = 1.05 # Giữa frame1 và frame2
+    # 3 frame sau lúc bấm: frame2..frame4 -> frame4 nét nhất
+    assert history.best_of(press, 3)[::2] == ("frame4", 9)
+    # 2 frame trước lúc bấm: frame0, frame1
+    assert history.best_of(press, 2, after=False)[::2] == ("frame1", 8)
+    # Chưa đọc đủ 5 frame sau lúc bấm: chờ, trừ khi hết thời gian chờ
+    assert history.best_of(press, 5) is None
+    assert history.best_of(press, 5, partial=True)[0] == "frame4"
+    assert history.best_of(0.5, 3, after=False) is None # Không còn frame nào trước lúc bấm
+    print("SUCCESS: sharpest of the next / previous N frames selected")
+
+
+def test_focus_score():
+    print("Testing focus score...")
+    import cv2
+    import numpy as np
+    rng = np.random.default_rng(0)
+    sharp = (rng.random((480, 640, 3)) * 255).astype(np.uint8)
+    blurred = cv2.GaussianBlur(sharp, (9, 9), 3)
+    assert focus_score(sharp) > 10 * focus_score(blurred)
+    assert focus_score(np.full((480, 640, 3), 128, np.uint8)) == 0
+    assert focus_score(sharp[:, :, 0]) > 0 # Ảnh xám
+    print("SUCCESS: sharp frame scores higher than blurred")
+
+if __name__ == "__main__":
+    test_trigger_queue()
+    test_trigger_waits_until_ready()
+    test_frame_history()
+    test_best_of_frames()
+    test_focus_score()